@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS tickers (
   symbol         TEXT NOT NULL UNIQUE,   -- e.g., 'AAPL'
   name           TEXT,                   -- e.g., 'Apple Inc.'
   exchange       TEXT,                   -- e.g., 'NASDAQ'
+  tier           SMALLINT NOT NULL DEFAULT 3 CHECK (tier BETWEEN 1 AND 3), -- 1 = most important
   created_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
@@ -24,6 +25,7 @@ COMMENT ON COLUMN tickers.ticker_key IS 'Legacy ticker id (former primary key)';
 COMMENT ON COLUMN tickers.symbol IS 'Ticker symbol, e.g., AAPL';
 COMMENT ON COLUMN tickers.name IS 'Company name (optional)';
 COMMENT ON COLUMN tickers.exchange IS 'Exchange (optional)';
+COMMENT ON COLUMN tickers.tier IS 'Importance tier (1 = highest); raises analysis job priority for its news';
 CREATE UNIQUE INDEX IF NOT EXISTS uq_tickers_ticker_key ON tickers (ticker_key);
 
 -- ------------------------------------------------------
@@ -47,6 +49,9 @@ CREATE TABLE IF NOT EXISTS news_events (
 
   raw_payload     JSONB,                  -- raw provider payload for debugging/replay
 
+  minhash         BIGINT[],               -- MinHash signature of title + content (near-dedup)
+  cluster_id      BIGINT,                 -- id of the near-duplicate cluster representative
+
   CONSTRAINT uq_news_events_news_id UNIQUE (news_id),
   CONSTRAINT uq_news_source_url UNIQUE (source, url)
 );
@@ -61,12 +66,15 @@ COMMENT ON COLUMN news_events.published_at IS 'Published time from provider (UTC
 COMMENT ON COLUMN news_events.ingested_at IS 'Ingestion time in SentinelStream (UTC)';
 COMMENT ON COLUMN news_events.tickers IS 'Tickers associated with this news event (MVP as TEXT[])';
 COMMENT ON COLUMN news_events.raw_payload IS 'Raw provider payload stored for debugging/replay';
+COMMENT ON COLUMN news_events.minhash IS '64-value MinHash signature of title + content word bigrams, NULL when the text is too short to cluster';
+COMMENT ON COLUMN news_events.cluster_id IS 'news_events.id of the near-duplicate cluster representative (= id for representatives)';
 
 -- Indexes for dashboard queries
 CREATE INDEX IF NOT EXISTS idx_news_published_at ON news_events (published_at DESC);
 CREATE INDEX IF NOT EXISTS idx_news_source ON news_events (source);
 CREATE INDEX IF NOT EXISTS idx_news_tickers_gin ON news_events USING GIN (tickers);
 CREATE INDEX IF NOT EXISTS idx_news_news_id ON news_events (news_id);
+CREATE INDEX IF NOT EXISTS idx_news_cluster_id ON news_events (cluster_id) WHERE cluster_id IS NOT NULL;
 
 -- ------------------------------------------------------
 -- 3) Raw news items (staging for replayable normalization)
@@ -83,6 +91,7 @@ CREATE TABLE IF NOT EXISTS raw_news_items (
   title        TEXT NULL,                     -- optional title if available
 
   dedup_key    TEXT NOT NULL,                 -- deterministic key (e.g., sha256(source|url))
+  payload_hash CHAR(64) NULL,                 -- sha256 of the canonical JSON payload
   status       TEXT NOT NULL DEFAULT 'fetched' CHECK (status IN ('fetched','normalized','failed')),
   attempts     INTEGER NOT NULL DEFAULT 0,    -- number of normalization attempts
   last_error   TEXT NULL,                     -- last error message if normalization failed
@@ -103,6 +112,7 @@ COMMENT ON COLUMN raw_news_items.published_at IS 'Published time from provider i
 COMMENT ON COLUMN raw_news_items.url IS 'Article URL if available';
 COMMENT ON COLUMN raw_news_items.title IS 'Article title if available';
 COMMENT ON COLUMN raw_news_items.dedup_key IS 'Deterministic key for deduplication (e.g., sha256(source|url))';
+COMMENT ON COLUMN raw_news_items.payload_hash IS 'sha256 of the sorted-key JSON payload; unchanged duplicates skip the update';
 COMMENT ON COLUMN raw_news_items.status IS 'Processing status: fetched | normalized | failed';
 COMMENT ON COLUMN raw_news_items.attempts IS 'Number of normalization attempts';
 COMMENT ON COLUMN raw_news_items.last_error IS 'Last error message for failed normalization';
@@ -114,6 +124,9 @@ CREATE INDEX IF NOT EXISTS idx_raw_news_status_fetched_at
 CREATE INDEX IF NOT EXISTS idx_raw_news_fetched_at
   ON raw_news_items (fetched_at DESC);
 
+CREATE INDEX IF NOT EXISTS idx_raw_news_fetched_at_id
+  ON raw_news_items (fetched_at, id);
+
 CREATE INDEX IF NOT EXISTS idx_raw_news_payload_gin
   ON raw_news_items USING GIN (raw_payload);
 
@@ -128,9 +141,12 @@ CREATE TABLE IF NOT EXISTS analysis_jobs (
   job_type    TEXT NOT NULL, -- e.g., llm_analysis, fetch_content
   status      TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending','running','done','failed')),
   attempts    INTEGER NOT NULL DEFAULT 0,
+  priority    INTEGER NOT NULL DEFAULT 0, -- higher is claimed first
+  published_at TIMESTAMPTZ NULL,          -- news_events.published_at, breaks priority ties
   run_after  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   locked_at   TIMESTAMPTZ NULL,
   locked_by   TEXT NULL,
+  lease_token UUID NULL,                  -- new per claim; finishing updates must match it
   last_error  TEXT NULL,
   created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
@@ -147,9 +163,12 @@ COMMENT ON COLUMN analysis_jobs.trace_id IS 'Correlation id for publishing this
 COMMENT ON COLUMN analysis_jobs.job_type IS 'Job type (e.g., llm_analysis, fetch_content)';
 COMMENT ON COLUMN analysis_jobs.status IS 'Job status: pending | running | done | failed';
 COMMENT ON COLUMN analysis_jobs.attempts IS 'Number of processing attempts';
+COMMENT ON COLUMN analysis_jobs.priority IS 'Claim priority from news recency, ticker tier and job type (jobs.priority); higher first';
+COMMENT ON COLUMN analysis_jobs.published_at IS 'Published time of the news event; fresher news is claimed first within a priority';
 COMMENT ON COLUMN analysis_jobs.run_after IS 'Earliest time this job should be run';
-COMMENT ON COLUMN analysis_jobs.locked_at IS 'Time the job was locked for processing';
+COMMENT ON COLUMN analysis_jobs.locked_at IS 'Time the job was locked, refreshed by lease heartbeats while it runs';
 COMMENT ON COLUMN analysis_jobs.locked_by IS 'Worker identifier holding the lock';
+COMMENT ON COLUMN analysis_jobs.lease_token IS 'Random token issued by each claim; a worker whose claim was recovered no longer matches it';
 COMMENT ON COLUMN analysis_jobs.last_error IS 'Last error message from processing';
 COMMENT ON COLUMN analysis_jobs.created_at IS 'Time the job was created';
 COMMENT ON COLUMN analysis_jobs.updated_at IS 'Time the job was last updated';
@@ -163,6 +182,18 @@ CREATE INDEX IF NOT EXISTS idx_analysis_jobs_created_at
 CREATE INDEX IF NOT EXISTS idx_analysis_jobs_job_uuid
   ON analysis_jobs (job_uuid);
 
+-- Claim order for pending jobs: highest priority, then freshest news, then earliest run_after.
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_pending_priority
+  ON analysis_jobs (priority DESC, published_at DESC NULLS LAST, run_after) WHERE status = 'pending';
+
+-- Archiver scan for finished jobs (jobs.archive).
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_finished_updated_at
+  ON analysis_jobs (updated_at) WHERE status IN ('done', 'failed');
+
+-- Stuck-job recovery only scans running jobs, a small slice of the table.
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_running_locked_at
+  ON analysis_jobs (locked_at) WHERE status = 'running';
+
 -- ------------------------------------------------------
 -- 5) LLM analyses (structured output + raw output)
 -- ------------------------------------------------------
@@ -191,6 +222,7 @@ CREATE TABLE IF NOT EXISTS llm_analyses (
   rationale       TEXT,                                -- optional short reasoning
 
   raw_output      JSONB,                               -- raw model output
+  inherited_from  BIGINT NULL REFERENCES llm_analyses(id) ON DELETE SET NULL,  -- copied from a near-duplicate
 
   CONSTRAINT uq_analysis_uuid UNIQUE (analysis_uuid),
   CONSTRAINT uq_analysis_unique_model UNIQUE (news_event_id, provider, model)
@@ -211,6 +243,7 @@ COMMENT ON COLUMN llm_analyses.confidence IS 'Overall confidence in [0,1]';
 COMMENT ON COLUMN llm_analyses.impact_score IS 'Optional impact score in [0,1]';
 COMMENT ON COLUMN llm_analyses.entities IS 'Extracted entities/tickers as JSON array';
 COMMENT ON COLUMN llm_analyses.raw_output IS 'Normalized raw output object for debugging/replay';
+COMMENT ON COLUMN llm_analyses.inherited_from IS 'Source analysis when copied from the cluster representative instead of calling the LLM';
 
 CREATE INDEX IF NOT EXISTS idx_analysis_news_event_created_at
   ON llm_analyses (news_event_id, created_at DESC);
@@ -235,3 +268,224 @@ COMMENT ON COLUMN analysis_tickers.ticker IS 'Extracted ticker symbol';
 
 CREATE UNIQUE INDEX IF NOT EXISTS uq_analysis_tickers
   ON analysis_tickers (analysis_id, ticker);
+
+-- ------------------------------------------------------
+-- 7) Rate limit buckets (shared token buckets)
+-- ------------------------------------------------------
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+  name        TEXT PRIMARY KEY,               -- bucket name, e.g., finnhub
+  tokens      DOUBLE PRECISION NOT NULL,      -- available tokens (negative = reserved debt)
+  updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE rate_limit_buckets IS 'Token buckets shared by processes calling rate-limited APIs';
+COMMENT ON COLUMN rate_limit_buckets.name IS 'Bucket name (one per rate-limited API or quota)';
+COMMENT ON COLUMN rate_limit_buckets.tokens IS 'Tokens left at updated_at; negative values are reservations still waiting';
+COMMENT ON COLUMN rate_limit_buckets.updated_at IS 'Time tokens was last refilled';
+
+-- ------------------------------------------------------
+-- 8) Ingestion watermarks (per-ticker incremental fetch state)
+-- ------------------------------------------------------
+CREATE TABLE IF NOT EXISTS ingestion_watermarks (
+  source             TEXT NOT NULL,           -- provider name (e.g., finnhub)
+  ticker             TEXT NOT NULL,           -- ticker symbol, e.g., AAPL
+  last_published_at  TIMESTAMPTZ NULL,        -- newest published_at seen for this ticker
+  last_fetched_at    TIMESTAMPTZ NULL,        -- last successful fetch for this ticker
+  updated_at         TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  CONSTRAINT pk_ingestion_watermarks PRIMARY KEY (source, ticker)
+);
+
+COMMENT ON TABLE ingestion_watermarks IS 'Per-ticker high-water marks for incremental news fetches';
+COMMENT ON COLUMN ingestion_watermarks.source IS 'Provider name (e.g., finnhub)';
+COMMENT ON COLUMN ingestion_watermarks.ticker IS 'Ticker symbol';
+COMMENT ON COLUMN ingestion_watermarks.last_published_at IS 'Newest published_at already staged; older items are dropped before insert';
+COMMENT ON COLUMN ingestion_watermarks.last_fetched_at IS 'Time of the last successful fetch; recent tickers are skipped';
+COMMENT ON COLUMN ingestion_watermarks.updated_at IS 'Time the watermark row was last updated';
+
+-- ------------------------------------------------------
+-- 9) Ingestion checkpoints (resumable streaming replays)
+-- ------------------------------------------------------
+CREATE TABLE IF NOT EXISTS ingestion_checkpoints (
+  name             TEXT PRIMARY KEY,          -- replay name, e.g., finnhub_replay
+  last_fetched_at  TIMESTAMPTZ NOT NULL,      -- fetched_at of the last committed row
+  last_id          BIGINT NOT NULL,           -- id of the last committed row
+  updated_at       TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE ingestion_checkpoints IS 'Keyset positions for resumable raw_news_items replays';
+COMMENT ON COLUMN ingestion_checkpoints.name IS 'Replay name';
+COMMENT ON COLUMN ingestion_checkpoints.last_fetched_at IS 'fetched_at of the last row whose chunk committed';
+COMMENT ON COLUMN ingestion_checkpoints.last_id IS 'id of the last row whose chunk committed';
+COMMENT ON COLUMN ingestion_checkpoints.updated_at IS 'Time the checkpoint last advanced';
+
+-- ------------------------------------------------------
+-- 10) Backfill units (resumable historical fetches)
+-- ------------------------------------------------------
+CREATE TABLE IF NOT EXISTS backfill_units (
+  backfill_name  TEXT NOT NULL,               -- backfill run name, reused to resume
+  ticker         TEXT NOT NULL,               -- ticker symbol, e.g., AAPL
+  day            DATE NOT NULL,               -- NYC calendar day fetched
+  status         TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending','done','failed')),
+  attempts       INTEGER NOT NULL DEFAULT 0,
+  items_count    INTEGER NULL,                -- items staged for this unit
+  last_error     TEXT NULL,
+  created_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  CONSTRAINT pk_backfill_units PRIMARY KEY (backfill_name, ticker, day)
+);
+
+COMMENT ON TABLE backfill_units IS 'Per-ticker, per-day work units for resumable backfills';
+COMMENT ON COLUMN backfill_units.backfill_name IS 'Backfill name; rerunning with the same name resumes pending units';
+COMMENT ON COLUMN backfill_units.ticker IS 'Ticker symbol';
+COMMENT ON COLUMN backfill_units.day IS 'NYC calendar day passed as from/to to /company-news';
+COMMENT ON COLUMN backfill_units.status IS 'Unit status: pending | done | failed';
+COMMENT ON COLUMN backfill_units.attempts IS 'Number of fetch attempts';
+COMMENT ON COLUMN backfill_units.items_count IS 'Items staged into raw_news_items for this unit';
+COMMENT ON COLUMN backfill_units.last_error IS 'Last fetch error for failed units';
+
+CREATE INDEX IF NOT EXISTS idx_backfill_units_status
+  ON backfill_units (backfill_name, status);
+
+-- ------------------------------------------------------
+-- 11) News MinHash bands (LSH index for near-dedup)
+-- ------------------------------------------------------
+CREATE TABLE IF NOT EXISTS news_event_minhash_bands (
+  band           SMALLINT NOT NULL,            -- band number (0-15)
+  band_value     BIGINT NOT NULL,              -- hash of the band's 4 signature values
+  news_event_id  BIGINT NOT NULL REFERENCES news_events(id) ON DELETE CASCADE,
+  published_at   TIMESTAMPTZ NOT NULL,         -- copied from news_events to bound lookups
+
+  CONSTRAINT pk_news_event_minhash_bands PRIMARY KEY (band, band_value, news_event_id)
+);
+
+COMMENT ON TABLE news_event_minhash_bands IS 'LSH bands of news_events.minhash; stories sharing a band are near-duplicate candidates';
+COMMENT ON COLUMN news_event_minhash_bands.band IS 'Band number; each band covers 4 of the 64 signature values';
+COMMENT ON COLUMN news_event_minhash_bands.band_value IS 'Signed 64-bit hash of the band values';
+COMMENT ON COLUMN news_event_minhash_bands.news_event_id IS 'FK to news_events.id';
+COMMENT ON COLUMN news_event_minhash_bands.published_at IS 'Published time of the story; limits candidates to a recent window';
+
+-- ------------------------------------------------------
+-- 12) Job wakeups (LISTEN/NOTIFY)
+-- ------------------------------------------------------
+-- Workers LISTEN on 'analysis_jobs' and claim as soon as a runnable job appears;
+-- polling is only a fallback. Statement-level triggers send at most one notification
+-- per statement, and Postgres folds identical notifications within a transaction.
+CREATE OR REPLACE FUNCTION notify_analysis_jobs() RETURNS trigger AS $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM new_jobs WHERE status = 'pending' AND run_after <= NOW()) THEN
+    PERFORM pg_notify('analysis_jobs', '');
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION notify_analysis_jobs() IS 'NOTIFY analysis_jobs when a statement leaves a runnable pending job';
+
+CREATE OR REPLACE TRIGGER trg_analysis_jobs_notify_insert
+  AFTER INSERT ON analysis_jobs
+  REFERENCING NEW TABLE AS new_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_analysis_jobs();
+
+-- Covers jobs returned to 'pending' by stuck-job recovery.
+CREATE OR REPLACE TRIGGER trg_analysis_jobs_notify_update
+  AFTER UPDATE ON analysis_jobs
+  REFERENCING NEW TABLE AS new_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_analysis_jobs();
+
+-- ------------------------------------------------------
+-- 13) Analysis job history (archive of finished jobs)
+-- ------------------------------------------------------
+-- jobs.archive moves done/failed jobs here so analysis_jobs only holds live work.
+-- Monthly partitions are created by the archiver and dropped after the retention period.
+CREATE TABLE IF NOT EXISTS analysis_jobs_history (
+  id            BIGINT NOT NULL,                -- analysis_jobs.id at archive time
+  job_uuid      UUID NOT NULL,
+  news_event_id BIGINT NOT NULL,
+  trace_id      UUID NOT NULL,
+  job_type      TEXT NOT NULL,
+  status        TEXT NOT NULL,                  -- done | failed
+  attempts      INTEGER NOT NULL,
+  priority      INTEGER NOT NULL,
+  published_at  TIMESTAMPTZ NULL,
+  run_after     TIMESTAMPTZ NOT NULL,
+  locked_at     TIMESTAMPTZ NULL,
+  locked_by     TEXT NULL,
+  last_error    TEXT NULL,
+  created_at    TIMESTAMPTZ NOT NULL,
+  updated_at    TIMESTAMPTZ NOT NULL,
+  finished_at   TIMESTAMPTZ NOT NULL,           -- partition key (updated_at when archived)
+  archived_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  CONSTRAINT pk_analysis_jobs_history PRIMARY KEY (id, finished_at)
+) PARTITION BY RANGE (finished_at);
+
+COMMENT ON TABLE analysis_jobs_history IS 'Finished analysis_jobs rows, partitioned by month of finished_at';
+COMMENT ON COLUMN analysis_jobs_history.id IS 'analysis_jobs.id of the archived job';
+COMMENT ON COLUMN analysis_jobs_history.status IS 'Final job status: done | failed';
+COMMENT ON COLUMN analysis_jobs_history.finished_at IS 'Time the job finished; partition key';
+COMMENT ON COLUMN analysis_jobs_history.archived_at IS 'Time the job was moved out of analysis_jobs';
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_history_news_type
+  ON analysis_jobs_history (news_event_id, job_type);
+
+-- ------------------------------------------------------
+-- 14) LLM circuit breakers (shared provider health)
+-- ------------------------------------------------------
+-- One row per provider:model. Workers stop claiming while a breaker is open; once
+-- opened_until passes, a single call probes the provider and closes or re-opens it.
+CREATE TABLE IF NOT EXISTS llm_circuit_breakers (
+  name                  TEXT PRIMARY KEY,             -- provider:model, e.g., openai:gpt-4o-mini
+  state                 TEXT NOT NULL DEFAULT 'closed', -- closed | open
+  consecutive_failures  INTEGER NOT NULL DEFAULT 0,
+  opened_until          TIMESTAMPTZ NULL,             -- no calls before this while open
+  last_error            TEXT NULL,
+  updated_at            TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  CONSTRAINT chk_llm_circuit_breakers_state CHECK (state IN ('closed', 'open'))
+);
+
+COMMENT ON TABLE llm_circuit_breakers IS 'Circuit breakers shared by analysis workers, one per LLM provider and model';
+COMMENT ON COLUMN llm_circuit_breakers.state IS 'closed: calls allowed; open: calls paused until opened_until';
+COMMENT ON COLUMN llm_circuit_breakers.consecutive_failures IS 'Outage-type failures (429, 5xx, timeouts) since the last success';
+COMMENT ON COLUMN llm_circuit_breakers.opened_until IS 'End of the current open period; the next call after it is a probe';
+COMMENT ON COLUMN llm_circuit_breakers.last_error IS 'Error that last counted against the breaker';
+
+-- ------------------------------------------------------
+-- 15) Published job keys (publish dedup)
+-- ------------------------------------------------------
+-- publish_job / publish_jobs insert the key and the job in one statement and enqueue only
+-- new keys. jobs.archive never deletes keys, so archived jobs (including ones whose history
+-- partition has been dropped) are not enqueued again.
+CREATE TABLE IF NOT EXISTS published_jobs (
+  news_event_id BIGINT NOT NULL REFERENCES news_events(id) ON DELETE CASCADE,
+  job_type      TEXT NOT NULL,
+  published_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  CONSTRAINT pk_published_jobs PRIMARY KEY (news_event_id, job_type)
+);
+
+COMMENT ON TABLE published_jobs IS 'One row per (news event, job type) ever enqueued; kept when the job is archived';
+COMMENT ON COLUMN published_jobs.published_at IS 'Time the job was first enqueued';
+
+-- ------------------------------------------------------
+-- 16) Job outbox (jobs for a non-transactional queue)
+-- ------------------------------------------------------
+-- With the Redis queue, ingestion stages each job here in the same transaction as its news
+-- event, publishes it after the commit and deletes the row. Workers publish rows left behind
+-- by a process that died in between (jobs.outbox.sweep_outbox).
+CREATE TABLE IF NOT EXISTS job_outbox (
+  news_event_id BIGINT NOT NULL REFERENCES news_events(id) ON DELETE CASCADE,
+  job_type      TEXT NOT NULL,
+  trace_id      UUID NOT NULL,
+  priority      INTEGER NOT NULL DEFAULT 0,
+  created_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  CONSTRAINT pk_job_outbox PRIMARY KEY (news_event_id, job_type)
+);
+
+COMMENT ON TABLE job_outbox IS 'Jobs committed with their news events but not yet published to a non-transactional queue';
+COMMENT ON COLUMN job_outbox.created_at IS 'Time the job was staged; the sweep skips recent rows still being published';
+
+CREATE INDEX IF NOT EXISTS idx_job_outbox_created_at ON job_outbox (created_at);
@@ -2,41 +2,16 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Any
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Iterable
 from uuid import uuid4
 
-import psycopg2
 from psycopg2.extras import Json, execute_values
 
+from db import pooled_connection
 from llm.factory import load_llm_client
-from llm.interface import LLMAnalysisError, LLMClient, LLMRunAttempt
-
-
-def connect_db():
-    host = os.getenv("POSTGRES_HOST")
-    port = int(os.getenv("POSTGRES_PORT", "5432"))
-    name = os.getenv("POSTGRES_DB")
-    user = os.getenv("POSTGRES_USER")
-    password = os.getenv("POSTGRES_PASSWORD")
-    missing = [key for key, value in {
-        "POSTGRES_HOST": host,
-        "POSTGRES_DB": name,
-        "POSTGRES_USER": user,
-        "POSTGRES_PASSWORD": password,
-    }.items() if not value]
-    if missing:
-        raise RuntimeError(f"Missing DB environment variables: {', '.join(missing)}")
-    conn = psycopg2.connect(
-        host=host,
-        port=port,
-        dbname=name,
-        user=user,
-        password=password,
-    )
-    with conn.cursor() as cursor:
-        cursor.execute("SET TIME ZONE 'UTC'")
-    conn.commit()
-    return conn
+from llm.interface import AnalysisResult, LLMAnalysisError, LLMClient, LLMRunAttempt
 
 
 def _fetch_news_event(conn, news_event_id: int) -> dict[str, Any] | None:
@@ -68,20 +43,131 @@ def _build_input_text(event: dict[str, Any]) -> str:
     return "\n".join(parts)
 
 
-def _upsert_analysis_pending(
+@dataclass(frozen=True)
+class AnalysisRecord:
+    """A succeeded analysis ready to store; ``job`` is ``(job_id, lease_token)`` to complete with it."""
+
+    news_event_id: int
+    trace_id: str
+    provider: str
+    model: str
+    result: AnalysisResult
+    raw_output: dict[str, Any]
+    request_payload: dict[str, Any] | None = None
+    job: tuple[int, str] | None = None
+
+
+# One statement: upsert the final analysis rows, diff their tickers (delete what is gone,
+# insert what is new) and mark their jobs done. The job guard matches
+# PostgresJobQueue.mark_done, so a job that was recovered and claimed again is left alone.
+_PERSIST_SQL = (
+    "WITH input (news_event_id, trace_id, provider, model, request, sentiment, confidence, "
+    "summary, raw_output, entities, job_id, job_lease) AS (VALUES %s), "
+    "saved AS ("
+    "  INSERT INTO llm_analyses (news_event_id, trace_id, provider, model, request, status, "
+    "  sentiment, confidence, summary, error_message, raw_output, entities, created_at, updated_at) "
+    "  SELECT news_event_id, trace_id, provider, model, request, 'succeeded', "
+    "  sentiment, confidence, summary, NULL, raw_output, entities, NOW(), NOW() FROM input "
+    "  ON CONFLICT (news_event_id, provider, model) DO UPDATE SET "
+    "  trace_id = EXCLUDED.trace_id, request = EXCLUDED.request, status = 'succeeded', "
+    "  sentiment = EXCLUDED.sentiment, confidence = EXCLUDED.confidence, "
+    "  summary = EXCLUDED.summary, error_message = NULL, raw_output = EXCLUDED.raw_output, "
+    "  entities = EXCLUDED.entities, inherited_from = NULL, updated_at = NOW() "
+    "  RETURNING id, news_event_id, provider, model, entities"
+    "), "
+    "wanted AS ("
+    "  SELECT DISTINCT s.id AS analysis_id, t.ticker "
+    "  FROM saved s CROSS JOIN LATERAL jsonb_array_elements_text(s.entities) AS t (ticker)"
+    "), "
+    "removed AS ("
+    "  DELETE FROM analysis_tickers a USING saved s "
+    "  WHERE a.analysis_id = s.id AND NOT EXISTS ("
+    "    SELECT 1 FROM wanted w WHERE w.analysis_id = a.analysis_id AND w.ticker = a.ticker)"
+    "), "
+    "added AS ("
+    "  INSERT INTO analysis_tickers (analysis_id, ticker) SELECT analysis_id, ticker FROM wanted "
+    "  ON CONFLICT (analysis_id, ticker) DO NOTHING"
+    "), "
+    "finished AS ("
+    "  UPDATE analysis_jobs j SET status = 'done', lease_token = NULL, updated_at = NOW(), "
+    "  last_error = NULL "
+    "  FROM input i WHERE j.id = i.job_id AND j.status = 'running' AND j.lease_token = i.job_lease "
+    "  RETURNING j.id"
+    ") "
+    "SELECT 'analysis', id, news_event_id, provider, model FROM saved "
+    "UNION ALL SELECT 'job', id, NULL, NULL, NULL FROM finished"
+)
+_PERSIST_TEMPLATE = (
+    "(%s::bigint, %s::uuid, %s::text, %s::text, %s::jsonb, %s::text, %s::double precision, "
+    "%s::text, %s::jsonb, %s::jsonb, %s::bigint, %s::uuid)"
+)
+
+
+def persist_analyses(conn, records: Iterable[AnalysisRecord]) -> list[tuple[int, bool]]:
+    """Store succeeded analyses, their tickers and their job completions in one round trip.
+
+    Returns ``(analysis_id, job_done)`` per record, in order; the caller commits, so the
+    analysis and its job become visible together. Records for the same news event,
+    provider and model collapse to the last one.
+    """
+    records = list(records)
+    if not records:
+        return []
+    latest = {(r.news_event_id, r.provider, r.model): r for r in records}
+    rows = [
+        (
+            r.news_event_id,
+            r.trace_id,
+            r.provider,
+            r.model,
+            Json(r.request_payload) if r.request_payload is not None else None,
+            r.result.sentiment,
+            r.result.confidence,
+            r.result.reasoning_summary,
+            Json(r.raw_output),
+            Json(r.result.tickers),
+            r.job[0] if r.job else None,
+            r.job[1] if r.job else None,
+        )
+        for r in latest.values()
+    ]
+    with conn.cursor() as cursor:
+        returned = execute_values(
+            cursor,
+            _PERSIST_SQL,
+            rows,
+            template=_PERSIST_TEMPLATE,
+            page_size=len(rows),
+            fetch=True,
+        )
+    analysis_ids = {(row[2], row[3], row[4]): row[1] for row in returned if row[0] == "analysis"}
+    done_jobs = {row[1] for row in returned if row[0] == "job"}
+    return [
+        (
+            analysis_ids[(r.news_event_id, r.provider, r.model)],
+            r.job is not None and r.job[0] in done_jobs,
+        )
+        for r in records
+    ]
+
+
+def _save_analysis_failed(
     conn,
     news_event_id: int,
     trace_id: str,
     provider: str,
     model: str,
+    error_message: str,
+    raw_output: dict[str, Any],
     request_payload: dict[str, Any] | None,
 ) -> int:
     sql = (
-        "INSERT INTO llm_analyses (news_event_id, trace_id, provider, model, request, status, created_at, updated_at) "
-        "VALUES (%s, %s, %s, %s, %s, 'pending', NOW(), NOW()) "
+        "INSERT INTO llm_analyses (news_event_id, trace_id, provider, model, request, status, "
+        "error_message, raw_output, created_at, updated_at) "
+        "VALUES (%s, %s, %s, %s, %s, 'failed', %s, %s, NOW(), NOW()) "
         "ON CONFLICT (news_event_id, provider, model) DO UPDATE SET "
-        "trace_id = EXCLUDED.trace_id, status = 'pending', error_message = NULL, "
-        "request = EXCLUDED.request, updated_at = NOW() "
+        "trace_id = EXCLUDED.trace_id, status = 'failed', error_message = EXCLUDED.error_message, "
+        "raw_output = EXCLUDED.raw_output, request = EXCLUDED.request, updated_at = NOW() "
         "RETURNING id"
     )
     with conn.cursor() as cursor:
@@ -93,65 +179,13 @@ def _upsert_analysis_pending(
                 provider,
                 model,
                 Json(request_payload) if request_payload is not None else None,
-            ),
-        )
-        analysis_id = cursor.fetchone()[0]
-    conn.commit()
-    return analysis_id
-
-
-def _update_analysis_success(
-    conn,
-    analysis_id: int,
-    result,
-    raw_output: dict[str, Any],
-    request_payload: dict[str, Any] | None,
-) -> None:
-    sql = (
-        "UPDATE llm_analyses SET status = 'succeeded', updated_at = NOW(), "
-        "sentiment = %s, confidence = %s, summary = %s, error_message = NULL, "
-        "raw_output = %s, entities = %s, request = %s "
-        "WHERE id = %s"
-    )
-    with conn.cursor() as cursor:
-        cursor.execute(
-            sql,
-            (
-                result.sentiment,
-                result.confidence,
-                result.reasoning_summary,
-                Json(raw_output),
-                Json(result.tickers),
-                Json(request_payload) if request_payload is not None else None,
-                analysis_id,
-            ),
-        )
-    conn.commit()
-
-
-def _update_analysis_failed(
-    conn,
-    analysis_id: int,
-    error_message: str,
-    raw_output: dict[str, Any],
-    request_payload: dict[str, Any] | None,
-) -> None:
-    sql = (
-        "UPDATE llm_analyses SET status = 'failed', updated_at = NOW(), "
-        "error_message = %s, raw_output = %s, request = %s "
-        "WHERE id = %s"
-    )
-    with conn.cursor() as cursor:
-        cursor.execute(
-            sql,
-            (
                 error_message,
                 Json(raw_output),
-                Json(request_payload) if request_payload is not None else None,
-                analysis_id,
             ),
         )
+        analysis_id = cursor.fetchone()[0]
     conn.commit()
+    return analysis_id
 
 
 def _build_raw_output(attempt: LLMRunAttempt | None) -> dict[str, Any]:
@@ -170,123 +204,154 @@ def _build_raw_output(attempt: LLMRunAttempt | None) -> dict[str, Any]:
     }
 
 
-def _replace_analysis_tickers(conn, analysis_id: int, tickers: list[str]) -> None:
-    with conn.cursor() as cursor:
-        cursor.execute("DELETE FROM analysis_tickers WHERE analysis_id = %s", (analysis_id,))
-        if tickers:
-            rows = [(analysis_id, ticker) for ticker in tickers]
-            execute_values(
-                cursor,
-                "INSERT INTO analysis_tickers (analysis_id, ticker) VALUES %s",
-                rows,
-            )
-    conn.commit()
+def analyze_news_event(
+    news_event_id: int,
+    conn=None,
+    *,
+    complete_job: tuple[int, str] | None = None,
+    persist: bool = True,
+    deadline: float | None = None,
+) -> dict[str, Any]:
+    """Analyze one news event and store the result.
+
+    Runs on ``conn`` when given (the caller owns it); otherwise borrows a connection from
+    the process-wide pool for each database step and holds none during the LLM call. The
+    LLM SDK client is reused across calls (see ``load_llm_client``).
+    With ``complete_job=(job_id, lease_token)`` a successful analysis also marks that
+    ``analysis_jobs`` row done in the same transaction; ``job_done`` in the result says
+    whether it did. With ``persist=False`` a success is not stored: the result carries its
+    :class:`AnalysisRecord` as ``record`` for the caller to pass to :func:`persist_analyses`
+    with others. Failures are always stored. ``deadline`` (a ``time.monotonic()`` value)
+    bounds the LLM call's timeouts, retries and budget waits.
+    """
+    if conn is not None:
+        return _analyze_news_event(lambda: nullcontext(conn), news_event_id, complete_job, persist, deadline)
+    return _analyze_news_event(pooled_connection, news_event_id, complete_job, persist, deadline)
 
 
-def analyze_news_event(news_event_id: int) -> dict[str, Any]:
+def _analyze_news_event(
+    connection: Callable[[], ContextManager[Any]],
+    news_event_id: int,
+    complete_job: tuple[int, str] | None,
+    persist: bool = True,
+    deadline: float | None = None,
+) -> dict[str, Any]:
     logger = logging.getLogger(__name__)
     trace_id = str(uuid4())
-
-    with connect_db() as conn:
+    with connection() as conn:
         event = _fetch_news_event(conn, news_event_id)
-        if not event:
-            return {
-                "status": "not_found",
-                "error_message": "news_event_not_found",
-            }
+        # Do not sit idle in a transaction for the length of the LLM call.
+        conn.commit()
+    if not event:
+        return {
+            "status": "not_found",
+            "error_message": "news_event_not_found",
+        }
 
-        try:
-            client: LLMClient = load_llm_client()
-            provider = client.provider_name
-            model = client.model
-        except Exception as exc:  # noqa: BLE001
-            provider = "gemini"
-            model = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
-            analysis_id = _upsert_analysis_pending(
+    try:
+        client: LLMClient = load_llm_client()
+        provider = client.provider_name
+        model = client.model
+    except Exception as exc:  # noqa: BLE001
+        provider = "gemini"
+        model = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
+        with connection() as conn:
+            analysis_id = _save_analysis_failed(
                 conn,
-                news_event_id=news_event_id,
-                trace_id=trace_id,
-                provider=provider,
-                model=model,
-                request_payload=None,
-            )
-            _update_analysis_failed(
-                conn,
-                analysis_id,
+                news_event_id,
+                trace_id,
+                provider,
+                model,
                 f"llm_init_error: {exc}",
                 raw_output=_build_raw_output(None),
                 request_payload=None,
             )
-            return {
-                "analysis_id": analysis_id,
-                "status": "failed",
-                "error_message": str(exc),
-            }
+        return {
+            "analysis_id": analysis_id,
+            "status": "failed",
+            "error_message": str(exc),
+        }
 
-        analysis_id = _upsert_analysis_pending(
-            conn,
+    input_text = _build_input_text(event)
+    try:
+        result = client.analyze_news(input_text, deadline=deadline)
+        raw_output = client.last_raw_output or _build_raw_output(
+            client.last_attempts[-1] if client.last_attempts else None
+        )
+        record = AnalysisRecord(
             news_event_id=news_event_id,
             trace_id=trace_id,
             provider=provider,
             model=model,
-            request_payload=None,
+            result=result,
+            raw_output=raw_output,
+            request_payload=client.last_request,
+            job=complete_job,
         )
-
-        input_text = _build_input_text(event)
-        try:
-            result = client.analyze_news(input_text)
-            raw_output = client.last_raw_output or _build_raw_output(
-                client.last_attempts[-1] if client.last_attempts else None
-            )
-            _update_analysis_success(
-                conn,
-                analysis_id,
-                result,
-                raw_output,
-                request_payload=client.last_request,
-            )
-            _replace_analysis_tickers(conn, analysis_id, result.tickers)
+        if not persist:
             return {
-                "analysis_id": analysis_id,
                 "status": "succeeded",
+                "record": record,
                 "result": result,
                 "tickers": result.tickers,
                 "provider": provider,
                 "model": model,
             }
-        except LLMAnalysisError as exc:
-            last_attempt = exc.attempts[-1] if exc.attempts else None
-            raw_output = _build_raw_output(last_attempt)
-            last_error = exc.attempts[-1].error if exc.attempts else str(exc)
-            error_message = f"{exc}: {last_error}" if last_error else str(exc)
-            logger.error("llm_analysis_failed news_event_id=%s error=%s", news_event_id, error_message)
-            _update_analysis_failed(
+        with connection() as conn:
+            [(analysis_id, job_done)] = persist_analyses(conn, [record])
+            conn.commit()
+        return {
+            "analysis_id": analysis_id,
+            "status": "succeeded",
+            "result": result,
+            "tickers": result.tickers,
+            "provider": provider,
+            "model": model,
+            "job_done": job_done,
+        }
+    except LLMAnalysisError as exc:
+        last_attempt = exc.attempts[-1] if exc.attempts else None
+        raw_output = _build_raw_output(last_attempt)
+        last_error = exc.attempts[-1].error if exc.attempts else str(exc)
+        error_message = f"{exc}: {last_error}" if last_error else str(exc)
+        logger.error("llm_analysis_failed news_event_id=%s error=%s", news_event_id, error_message)
+        with connection() as conn:
+            analysis_id = _save_analysis_failed(
                 conn,
-                analysis_id,
+                news_event_id,
+                trace_id,
+                provider,
+                model,
                 error_message,
                 raw_output,
                 request_payload=client.last_request,
             )
-            return {
-                "analysis_id": analysis_id,
-                "status": "failed",
-                "error_message": error_message,
-                "provider": provider,
-                "model": model,
-            }
-        except Exception as exc:  # noqa: BLE001
-            logger.error("llm_analysis_failed news_event_id=%s error=%s", news_event_id, exc)
-            _update_analysis_failed(
+        return {
+            "analysis_id": analysis_id,
+            "status": "failed",
+            "error_message": error_message,
+            "provider": provider,
+            "model": model,
+        }
+    except Exception as exc:  # noqa: BLE001
+        logger.error("llm_analysis_failed news_event_id=%s error=%s", news_event_id, exc)
+        with connection() as conn:
+            # Nothing from a half-written success may commit with the failure record.
+            conn.rollback()
+            analysis_id = _save_analysis_failed(
                 conn,
-                analysis_id,
+                news_event_id,
+                trace_id,
+                provider,
+                model,
                 f"unexpected_error: {exc}",
                 raw_output=_build_raw_output(None),
                 request_payload=client.last_request,
             )
-            return {
-                "analysis_id": analysis_id,
-                "status": "failed",
-                "error_message": str(exc),
-                "provider": provider,
-                "model": model,
-            }
+        return {
+            "analysis_id": analysis_id,
+            "status": "failed",
+            "error_message": str(exc),
+            "provider": provider,
+            "model": model,
+        }
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
 from analysis.service import analyze_news_event
+from db import close_pool
 from llm.interface import AnalysisResult
 
-app = FastAPI(title="SentinelStream AI Service")
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    yield
+    close_pool()
+
+
+app = FastAPI(title="SentinelStream AI Service", lifespan=_lifespan)
 
 
 class AnalysisResponse(BaseModel):
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+import psycopg2
+
+
+def connect():
+    """Open a new connection from ``POSTGRES_*``; the session time zone is UTC from the start."""
+    host = os.getenv("POSTGRES_HOST")
+    port = int(os.getenv("POSTGRES_PORT", "5432"))
+    name = os.getenv("POSTGRES_DB")
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    missing = [key for key, value in {
+        "POSTGRES_HOST": host,
+        "POSTGRES_DB": name,
+        "POSTGRES_USER": user,
+        "POSTGRES_PASSWORD": password,
+    }.items() if not value]
+    if missing:
+        raise RuntimeError(f"Missing DB environment variables: {', '.join(missing)}")
+    # A startup option instead of a SET TIME ZONE round trip after connecting.
+    return psycopg2.connect(
+        host=host,
+        port=port,
+        dbname=name,
+        user=user,
+        password=password,
+        options="-c timezone=UTC",
+    )
+
+
+class ConnectionPool:
+    """Thread-safe pool of up to ``max_size`` connections, opened on demand and reused.
+
+    :meth:`getconn` blocks while every connection is checked out (up to ``timeout``
+    seconds, then ``RuntimeError``), so a thread pool larger than the connection pool
+    queues instead of failing. Connections that were closed or hit a connection-level
+    error are discarded rather than handed out again.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        max_size: int = 10,
+        timeout: float = 30.0,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle: list[Any] = []
+        self._closed = False
+
+    @property
+    def idle(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RuntimeError(f"no database connection available after {self.timeout:g}s")
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+                while self._idle:
+                    conn = self._idle.pop()
+                    if not conn.closed:
+                        return conn
+            return self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, *, discard: bool = False) -> None:
+        try:
+            with self._lock:
+                if not (discard or conn.closed or self._closed):
+                    self._idle.append(conn)
+                    return
+            _close_quietly(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a connection; like ``with conn:``, commit on success and roll back on error."""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException as exc:
+            discard = isinstance(exc, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close_quietly(conn)
+
+
+def _close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except psycopg2.Error:
+        pass
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def _new_pool(max_size: int) -> ConnectionPool:
+    return ConnectionPool(connect, max_size=max_size, timeout=float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30")))
+
+
+def configure_pool(max_size: int) -> None:
+    """Size the process-wide pool; call before first use (an existing pool is replaced)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = _new_pool(max_size)
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool(int(os.getenv("DB_POOL_MAX_SIZE", "10")))
+        return _pool
+
+
+def pooled_connection():
+    """``with pooled_connection() as conn:`` borrows from the process-wide pool."""
+    return get_pool().connection()
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
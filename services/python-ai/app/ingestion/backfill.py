@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Iterable
+from uuid import UUID
+
+import httpx
+from psycopg2.extras import execute_values
+
+from ingestion.finnhub_client import FinnhubError, async_fetch_company_news
+from ingestion.rate_limiter import RateLimiter
+from ingestion.raw_store import insert_raw_items
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BackfillUnit:
+    ticker: str
+    day: date
+
+
+@dataclass
+class BackfillStats:
+    units_done: int = 0
+    units_failed: int = 0
+    items_fetched: int = 0
+    raw_inserted: int = 0
+    raw_changed: int = 0
+    raw_unchanged: int = 0
+
+
+def plan_units(tickers: Iterable[str], start: date, end: date) -> list[BackfillUnit]:
+    """Split a date range into one unit per ticker and day, newest day first."""
+    if end < start:
+        raise ValueError("backfill end date is before start date")
+    days = [end - timedelta(days=offset) for offset in range((end - start).days + 1)]
+    symbols = list(dict.fromkeys(tickers))
+    return [BackfillUnit(ticker=symbol, day=day) for day in days for symbol in symbols]
+
+
+def seed_units(conn, name: str, units: Iterable[BackfillUnit]) -> int:
+    rows = [(name, unit.ticker, unit.day) for unit in units]
+    if not rows:
+        return 0
+    sql = (
+        "INSERT INTO backfill_units (backfill_name, ticker, day) "
+        "VALUES %s "
+        "ON CONFLICT (backfill_name, ticker, day) DO NOTHING "
+        "RETURNING 1"
+    )
+    with conn.cursor() as cursor:
+        result = execute_values(cursor, sql, rows, fetch=True)
+    conn.commit()
+    return len(result)
+
+
+def load_pending_units(
+    conn,
+    name: str,
+    max_attempts: int,
+    tickers: list[str] | None = None,
+) -> list[BackfillUnit]:
+    """Units still to fetch, restricted to ``tickers`` when given (one shard's share)."""
+    sql = (
+        "SELECT ticker, day FROM backfill_units "
+        "WHERE backfill_name = %s AND status IN ('pending','failed') AND attempts < %s "
+        "AND (%s::text[] IS NULL OR ticker = ANY(%s::text[])) "
+        "ORDER BY day DESC, ticker ASC"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (name, max_attempts, tickers, tickers))
+        rows = cursor.fetchall()
+    conn.commit()
+    return [BackfillUnit(ticker=row[0], day=row[1]) for row in rows]
+
+
+def _mark_units(
+    conn,
+    name: str,
+    done: list[tuple[BackfillUnit, int]],
+    failed: list[tuple[BackfillUnit, str]],
+) -> None:
+    rows = [(name, unit.ticker, unit.day, "done", count, None) for unit, count in done]
+    rows.extend((name, unit.ticker, unit.day, "failed", None, error[:500]) for unit, error in failed)
+    if not rows:
+        return
+    sql = (
+        "UPDATE backfill_units b "
+        "SET status = v.status, attempts = b.attempts + 1, items_count = v.items_count, "
+        "last_error = v.last_error, updated_at = NOW() "
+        "FROM (VALUES %s) AS v (backfill_name, ticker, day, status, items_count, last_error) "
+        "WHERE b.backfill_name = v.backfill_name AND b.ticker = v.ticker AND b.day = v.day"
+    )
+    template = "(%s, %s, %s::date, %s, %s::integer, %s::text)"
+    with conn.cursor() as cursor:
+        execute_values(cursor, sql, rows, template=template)
+    conn.commit()
+
+
+async def run_backfill(
+    conn,
+    client: httpx.AsyncClient,
+    token: str,
+    name: str,
+    units: list[BackfillUnit],
+    *,
+    trace_id: UUID,
+    concurrency: int = 8,
+    batch_size: int = 200,
+    rate_limiter: RateLimiter | None = None,
+    limit_items: Callable[[list[dict[str, Any]]], list[dict[str, Any]]] | None = None,
+) -> BackfillStats:
+    """Fetch and stage pending units in batches, recording each unit's outcome.
+
+    A batch's raw rows are committed before its units are marked done, so an interrupted run
+    at worst refetches one batch; the payload-hash upsert turns those refetches into no-ops.
+    """
+    stats = BackfillStats()
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def _fetch_unit(unit: BackfillUnit) -> tuple[BackfillUnit, list[dict[str, Any]] | None, str | None]:
+        day = unit.day.isoformat()
+        async with semaphore:
+            try:
+                items, _status = await async_fetch_company_news(
+                    client,
+                    token,
+                    unit.ticker,
+                    day,
+                    day,
+                    trace_id=trace_id,
+                    rate_limiter=rate_limiter,
+                )
+            except (FinnhubError, httpx.HTTPError, ValueError) as exc:
+                return unit, None, str(exc)
+        return unit, items, None
+
+    for start in range(0, len(units), max(batch_size, 1)):
+        batch = units[start : start + max(batch_size, 1)]
+        results = await asyncio.gather(*(_fetch_unit(unit) for unit in batch))
+        staged: list[dict[str, Any]] = []
+        done: list[tuple[BackfillUnit, int]] = []
+        failed: list[tuple[BackfillUnit, str]] = []
+        for unit, items, error in results:
+            if items is None:
+                LOGGER.error(
+                    "backfill_unit_failed trace_id=%s backfill=%s ticker=%s day=%s error=%s",
+                    trace_id,
+                    name,
+                    unit.ticker,
+                    unit.day,
+                    error,
+                )
+                failed.append((unit, error or "unknown_error"))
+                continue
+            if limit_items is not None:
+                items = limit_items(items)
+            staged.extend(items)
+            done.append((unit, len(items)))
+
+        inserted, changed, unchanged = insert_raw_items(
+            conn,
+            "finnhub",
+            trace_id,
+            datetime.now(timezone.utc),
+            staged,
+        )
+        _mark_units(conn, name, done, failed)
+        stats.units_done += len(done)
+        stats.units_failed += len(failed)
+        stats.items_fetched += len(staged)
+        stats.raw_inserted += inserted
+        stats.raw_changed += changed
+        stats.raw_unchanged += unchanged
+        LOGGER.info(
+            "backfill_progress trace_id=%s backfill=%s processed=%s total=%s",
+            trace_id,
+            name,
+            start + len(batch),
+            len(units),
+        )
+    return stats
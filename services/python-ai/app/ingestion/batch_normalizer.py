@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Sequence
+from uuid import UUID
+
+from ingestion.news_store import NewsRow
+from ingestion.normalizer import NormalizationError, normalize_finnhub
+from ingestion.url_utils import resolve_url
+
+_MISSING = math.nan
+# datetime's supported range; anything outside fails in normalize_finnhub instead.
+_MIN_EPOCH = -62135596800
+_MAX_EPOCH = 253402300799
+# UTC offsets only change on quarter-hour boundaries, so one lookup per bucket is exact.
+_OFFSET_BUCKET_SECONDS = 900
+
+
+@dataclass
+class NormalizedBatch:
+    """Column-oriented normalization result for a list of Finnhub payloads.
+
+    Row ``i`` of every column describes the input item at ``positions[i]``. Writers take
+    insert tuples from :meth:`row` without building ``NewsEvent`` objects.
+    """
+
+    trace_id: UUID
+    ingested_at: datetime
+    positions: array = field(default_factory=lambda: array("q"))
+    published_ts: array = field(default_factory=lambda: array("d"))
+    news_ids: list[str] = field(default_factory=list)
+    urls: list[str] = field(default_factory=list)
+    sources: list[str] = field(default_factory=list)
+    titles: list[str] = field(default_factory=list)
+    contents: list[str | None] = field(default_factory=list)
+    tickers: list[list[str]] = field(default_factory=list)
+    payloads: list[dict[str, Any]] = field(default_factory=list)
+    # Parsed datetimes for rows whose timestamp was not an epoch number (keeps microseconds).
+    published_at: dict[int, datetime] = field(default_factory=dict)
+    # (input position, error) for items that could not be normalized.
+    failures: list[tuple[int, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.news_ids)
+
+    def _append(
+        self,
+        position: int,
+        timestamp: float,
+        published_at: datetime | None,
+        news_id: str,
+        url: str,
+        source: str,
+        title: str,
+        content: str | None,
+        tickers: list[str],
+        payload: dict[str, Any],
+    ) -> None:
+        if published_at is not None:
+            self.published_at[len(self.news_ids)] = published_at
+        self.positions.append(position)
+        self.published_ts.append(timestamp)
+        self.news_ids.append(news_id)
+        self.urls.append(url)
+        self.sources.append(source)
+        self.titles.append(title)
+        self.contents.append(content)
+        self.tickers.append(tickers)
+        self.payloads.append(payload)
+
+    def _published_datetime(self, index: int) -> datetime:
+        published_at = self.published_at.get(index)
+        if published_at is None:
+            published_at = datetime.fromtimestamp(self.published_ts[index], tz=timezone.utc)
+        return published_at
+
+    def row(self, index: int) -> NewsRow:
+        """The ``news_events`` insert tuple for one row, without building a NewsEvent."""
+        return (
+            self.news_ids[index],
+            self.trace_id,
+            self.sources[index],
+            self._published_datetime(index),
+            self.ingested_at,
+            self.titles[index],
+            self.urls[index],
+            self.contents[index],
+            self.tickers[index],
+            self.payloads[index],
+        )
+
+
+
+def _epoch_and_datetime(value: Any) -> tuple[float, datetime | None] | None:
+    # Same accepted inputs as normalizer._parse_timestamp.
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        try:
+            epoch = int(value)
+        except (OverflowError, ValueError):
+            return None
+        if not _MIN_EPOCH <= epoch <= _MAX_EPOCH:
+            return None
+        return float(epoch), None
+    if isinstance(value, str):
+        iso = value.strip()
+        if iso.endswith("Z"):
+            iso = iso[:-1] + "+00:00"
+        try:
+            parsed = datetime.fromisoformat(iso)
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp(), parsed
+    return None
+
+
+def _split_related(related: str) -> list[str]:
+    symbols = (part.strip().upper() for part in related.split(","))
+    return list(dict.fromkeys(symbol for symbol in symbols if symbol))
+
+
+def normalize_batch(
+    items: Sequence[dict[str, Any]],
+    trace_id: UUID,
+    ingested_at: datetime,
+) -> NormalizedBatch:
+    """Normalize many payloads into columns, with the same results as ``normalize_finnhub``.
+
+    Items outside the common shape go through ``normalize_finnhub`` itself so their errors
+    are reported exactly as before.
+    """
+    batch = NormalizedBatch(trace_id, ingested_at)
+    for position, item in enumerate(items):
+        url = item.get("url")
+        headline = item.get("headline") or item.get("title")
+        related = item.get("related")
+        source = item.get("source") or "finnhub"
+        parsed = _epoch_and_datetime(item.get("datetime") or item.get("published_at"))
+        if (
+            parsed is not None
+            and isinstance(url, str)
+            and url.strip()
+            and isinstance(headline, str)
+            and headline
+            and isinstance(source, str)
+            and (not related or isinstance(related, str))
+        ):
+            try:
+                canonical = resolve_url(source, url)
+            except ValueError:
+                canonical = None
+        else:
+            canonical = None
+        if canonical is not None:
+            content = item.get("summary") or item.get("content")
+            content = (content.strip() or None) if isinstance(content, str) else None
+            batch._append(
+                position,
+                parsed[0],
+                parsed[1],
+                canonical.news_id,
+                canonical.url,
+                source,
+                headline,
+                content,
+                _split_related(related) if related else [],
+                item,
+            )
+            continue
+        try:
+            event = normalize_finnhub(item, trace_id, ingested_at)
+        except NormalizationError as exc:
+            batch.failures.append((position, str(exc)))
+            continue
+        except Exception as exc:  # noqa: BLE001
+            batch.failures.append((position, f"unexpected_error: {exc}"))
+            continue
+        batch._append(
+            position,
+            event.published_at.timestamp(),
+            event.published_at,
+            event.news_id,
+            event.url,
+            event.source,
+            event.title,
+            event.content,
+            event.tickers,
+            item,
+        )
+    return batch
+
+
+def local_day_numbers(timestamps: Sequence[float], tz) -> array:
+    """Local calendar day (days since the epoch in ``tz``) per timestamp; -1 for missing."""
+    offsets: dict[int, float] = {}
+    days = array("q")
+    for timestamp in timestamps:
+        if math.isnan(timestamp):
+            days.append(-1)
+            continue
+        bucket = int(timestamp // _OFFSET_BUCKET_SECONDS)
+        offset = offsets.get(bucket)
+        if offset is None:
+            instant = datetime.fromtimestamp(bucket * _OFFSET_BUCKET_SECONDS, tz=timezone.utc)
+            offset = instant.astimezone(tz).utcoffset().total_seconds()
+            offsets[bucket] = offset
+        days.append(int((timestamp + offset) // 86400))
+    return days
+
+
+def top_k_per_day(timestamps: Sequence[float], limit: int, tz) -> list[int]:
+    """Indexes of the newest ``limit`` rows per local day, newest first.
+
+    Rows without a timestamp (NaN) sort last and share one bucket, matching the per-item
+    limiter in ``ingestion.run``. Ties keep their input order.
+    """
+    count = len(timestamps)
+    if limit <= 0:
+        return list(range(count))
+    keys = [-math.inf if math.isnan(timestamp) else timestamp for timestamp in timestamps]
+    order = sorted(range(count), key=keys.__getitem__, reverse=True)
+    days = local_day_numbers(timestamps, tz)
+    counts: dict[int, int] = {}
+    kept: list[int] = []
+    for index in order:
+        day = days[index]
+        seen = counts.get(day, 0)
+        if seen >= limit:
+            continue
+        counts[day] = seen + 1
+        kept.append(index)
+    return kept
+
+
+def timestamps_of(items: Sequence[dict[str, Any]]) -> array:
+    """Epoch timestamps of raw payloads (NaN where missing or unparseable)."""
+    column = array("d")
+    for item in items:
+        parsed = _epoch_and_datetime(item.get("datetime") or item.get("published_at"))
+        column.append(_MISSING if parsed is None else parsed[0])
+    return column
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from psycopg2.extras import execute_values
+
+NUM_PERM = 64
+# 16 bands of 4 rows: stories with Jaccard similarity 0.8 share a band with ~99.9% probability.
+BANDS = 16
+_ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class NearDedupConfig:
+    # Estimated Jaccard similarity of word-bigram sets needed to join a cluster.
+    threshold: float = 0.8
+    window_hours: int = 72
+    # Very short texts (bare headlines like "Market update") collide too easily to cluster.
+    min_tokens: int = 8
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# Fixed (a, b) pairs for the universal hashes (a * x + b) mod p; they must never change, or
+# stored signatures stop being comparable.
+_PERMUTATIONS = [
+    (_hash64(f"minhash:{index}:a") % (_PRIME - 1) + 1, _hash64(f"minhash:{index}:b") % _PRIME)
+    for index in range(NUM_PERM)
+]
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def shingles(tokens: list[str], size: int = 2) -> set[str]:
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[index : index + size]) for index in range(len(tokens) - size + 1)}
+
+
+def minhash_signature(features: set[str]) -> list[int]:
+    """MinHash signature of a feature set; equal positions estimate Jaccard similarity."""
+    hashes = [_hash64(feature) % _PRIME for feature in features]
+    if not hashes:
+        return [_PRIME] * NUM_PERM
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimated_similarity(left: list[int], right: list[int]) -> float:
+    return sum(1 for x, y in zip(left, right) if x == y) / NUM_PERM
+
+
+def band_values(signature: list[int]) -> list[tuple[int, int]]:
+    """(band, value) LSH keys; value is a signed 64-bit hash of the band's rows."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * _ROWS : (band + 1) * _ROWS]
+        value = _hash64(",".join(str(row) for row in rows))
+        keys.append((band, value - (1 << 64) if value >= 1 << 63 else value))
+    return keys
+
+
+@dataclass(frozen=True)
+class ClusterCandidate:
+    event_id: int
+    title: str
+    content: str | None
+    published_at: datetime
+
+
+def _load_band_neighbours(
+    conn,
+    bands: set[tuple[int, int]],
+    since: datetime,
+    exclude: list[int],
+) -> list[tuple[int, int, int, list[int], int]]:
+    sql = (
+        "SELECT b.band, b.band_value, e.id, e.minhash, COALESCE(e.cluster_id, e.id) "
+        "FROM UNNEST(%s::smallint[], %s::bigint[]) AS v (band, band_value) "
+        "JOIN news_event_minhash_bands b ON b.band = v.band AND b.band_value = v.band_value "
+        "JOIN news_events e ON e.id = b.news_event_id "
+        "WHERE b.published_at >= %s AND NOT (e.id = ANY(%s)) AND e.minhash IS NOT NULL"
+    )
+    ordered = sorted(bands)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            sql,
+            ([band for band, _value in ordered], [value for _band, value in ordered], since, exclude),
+        )
+        return cursor.fetchall()
+
+
+def assign_clusters(
+    conn,
+    candidates: Iterable[ClusterCandidate],
+    config: NearDedupConfig,
+) -> dict[int, int]:
+    """Sign newly inserted events and assign each a ``cluster_id``; the caller commits.
+
+    An event joins the cluster of the most similar earlier event (stored or in this batch)
+    whose estimated similarity reaches ``threshold`` within ``window_hours``. Otherwise it
+    starts its own cluster and is the representative (``cluster_id = id``). Returns
+    ``{event_id: cluster_id}``.
+    """
+    pending = sorted(candidates, key=lambda candidate: (candidate.published_at, candidate.event_id))
+    if not pending:
+        return {}
+    signatures: dict[int, list[int] | None] = {}
+    for candidate in pending:
+        tokens = tokenize(f"{candidate.title} {candidate.content or ''}")
+        signatures[candidate.event_id] = (
+            minhash_signature(shingles(tokens)) if len(tokens) >= config.min_tokens else None
+        )
+    keys = {
+        event_id: band_values(signature)
+        for event_id, signature in signatures.items()
+        if signature is not None
+    }
+
+    index: dict[tuple[int, int], list[tuple[list[int], int]]] = {}
+    wanted = {key for event_keys in keys.values() for key in event_keys}
+    if wanted:
+        since = pending[0].published_at - timedelta(hours=config.window_hours)
+        for band, value, _event_id, stored, cluster_id in _load_band_neighbours(
+            conn, wanted, since, list(signatures)
+        ):
+            index.setdefault((band, value), []).append((stored, cluster_id))
+
+    clusters: dict[int, int] = {}
+    for candidate in pending:
+        signature = signatures[candidate.event_id]
+        cluster_id = candidate.event_id
+        if signature is not None:
+            best: tuple[float, int] | None = None
+            for key in keys[candidate.event_id]:
+                for other, other_cluster in index.get(key, ()):
+                    similarity = estimated_similarity(signature, other)
+                    # Highest similarity wins; ties go to the oldest cluster.
+                    if similarity >= config.threshold and (
+                        best is None or (-similarity, other_cluster) < (-best[0], best[1])
+                    ):
+                        best = (similarity, other_cluster)
+            if best is not None:
+                cluster_id = best[1]
+            for key in keys[candidate.event_id]:
+                index.setdefault(key, []).append((signature, cluster_id))
+        clusters[candidate.event_id] = cluster_id
+
+    update_rows = [
+        (candidate.event_id, signatures[candidate.event_id], clusters[candidate.event_id])
+        for candidate in pending
+    ]
+    band_rows = [
+        (band, value, candidate.event_id, candidate.published_at)
+        for candidate in pending
+        for band, value in keys.get(candidate.event_id, ())
+    ]
+    with conn.cursor() as cursor:
+        execute_values(
+            cursor,
+            "UPDATE news_events e SET minhash = v.minhash, cluster_id = v.cluster_id "
+            "FROM (VALUES %s) AS v (id, minhash, cluster_id) WHERE e.id = v.id",
+            update_rows,
+            template="(%s::bigint, %s::bigint[], %s::bigint)",
+        )
+        if band_rows:
+            execute_values(
+                cursor,
+                "INSERT INTO news_event_minhash_bands (band, band_value, news_event_id, published_at) "
+                "VALUES %s ON CONFLICT DO NOTHING",
+                band_rows,
+            )
+    return clusters
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Iterable
 from uuid import UUID
 
 import httpx
 
+from ingestion.rate_limiter import RateLimiter, acquire, acquire_async
+
 BASE_URL = "https://finnhub.io/api/v1"
 LOGGER = logging.getLogger(__name__)
 
@@ -15,6 +19,21 @@ class FinnhubError(RuntimeError):
     pass
 
 
+@dataclass(frozen=True)
+class TickerFetchResult:
+    symbol: str
+    items: list[dict[str, Any]]
+    status_code: int | None
+    error: Exception | None = None
+
+
+def _retry_delay_seconds(response: httpx.Response, attempt: int) -> int:
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return max(int(retry_after), 1)
+    return 2 ** (attempt - 1)
+
+
 def _request_with_retries(
     client: httpx.Client,
     url: str,
@@ -23,10 +42,13 @@ def _request_with_retries(
     max_attempts: int = 3,
     trace_id: UUID | None = None,
     ticker: str | None = None,
+    rate_limiter: RateLimiter | None = None,
 ) -> httpx.Response:
     last_exception: Exception | None = None
     for attempt in range(1, max_attempts + 1):
         try:
+            # Every attempt is a billable call, so retries take a token too.
+            acquire(rate_limiter)
             response = client.get(url, params=params)
             LOGGER.info(
                 "finnhub_http_response trace_id=%s ticker=%s status=%s attempt=%s",
@@ -48,12 +70,7 @@ def _request_with_retries(
         if response.status_code == 429 or 500 <= response.status_code <= 599:
             if attempt == max_attempts:
                 break
-            retry_after = response.headers.get("Retry-After")
-            if retry_after and retry_after.isdigit():
-                sleep_seconds = max(int(retry_after), 1)
-            else:
-                sleep_seconds = 2 ** (attempt - 1)
-            time.sleep(sleep_seconds)
+            time.sleep(_retry_delay_seconds(response, attempt))
             continue
 
         response.raise_for_status()
@@ -66,27 +83,69 @@ def _request_with_retries(
     )
 
 
-def fetch_company_news(
-    client: httpx.Client,
-    token: str,
-    symbol: str,
-    date_from: str,
-    date_to: str,
+async def _async_request_with_retries(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict[str, Any],
     *,
+    max_attempts: int = 3,
     trace_id: UUID | None = None,
-) -> tuple[list[dict[str, Any]], int]:
-    # We use /company-news because it scopes to specific U.S. equity tickers and supports
-    # date-range filtering, matching our CLI and keeping payloads small.
-    # Finnhub's Python client uses `_from` for the "from" query param; the REST API expects "from".
-    url = f"{BASE_URL}/company-news"
-    params = {
+    ticker: str | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> httpx.Response:
+    # Mirrors _request_with_retries, but yields to the event loop while backing off.
+    last_exception: Exception | None = None
+    for attempt in range(1, max_attempts + 1):
+        try:
+            await acquire_async(rate_limiter)
+            response = await client.get(url, params=params)
+            LOGGER.info(
+                "finnhub_http_response trace_id=%s ticker=%s status=%s attempt=%s",
+                trace_id,
+                ticker,
+                response.status_code,
+                attempt,
+            )
+        except httpx.RequestError as exc:
+            last_exception = exc
+            if attempt == max_attempts:
+                break
+            await asyncio.sleep(2 ** (attempt - 1))
+            continue
+
+        if response.status_code < 400:
+            return response
+
+        if response.status_code == 429 or 500 <= response.status_code <= 599:
+            if attempt == max_attempts:
+                break
+            await asyncio.sleep(_retry_delay_seconds(response, attempt))
+            continue
+
+        response.raise_for_status()
+
+    if last_exception is not None:
+        raise FinnhubError("Finnhub request failed") from last_exception
+
+    raise FinnhubError(
+        f"Finnhub request failed with status {response.status_code}: {response.text}"
+    )
+
+
+def _company_news_params(token: str, symbol: str, date_from: str, date_to: str) -> dict[str, Any]:
+    return {
         "symbol": symbol,
         "from": date_from,
         "to": date_to,
         "token": token,
     }
-    response = _request_with_retries(client, url, params, trace_id=trace_id, ticker=symbol)
-    status_code = response.status_code
+
+
+def _parse_news_payload(
+    response: httpx.Response,
+    symbol: str,
+    trace_id: UUID | None,
+) -> list[dict[str, Any]]:
     payload = response.json()
     if not isinstance(payload, list):
         raise FinnhubError(f"Unexpected Finnhub payload: {payload}")
@@ -94,7 +153,125 @@ def fetch_company_news(
         "finnhub_items trace_id=%s ticker=%s status=%s items=%s",
         trace_id,
         symbol,
-        status_code,
+        response.status_code,
         len(payload),
     )
-    return payload, status_code
+    return payload
+
+
+def fetch_company_news(
+    client: httpx.Client,
+    token: str,
+    symbol: str,
+    date_from: str,
+    date_to: str,
+    *,
+    trace_id: UUID | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> tuple[list[dict[str, Any]], int]:
+    # We use /company-news because it scopes to specific U.S. equity tickers and supports
+    # date-range filtering, matching our CLI and keeping payloads small.
+    # Finnhub's Python client uses `_from` for the "from" query param; the REST API expects "from".
+    url = f"{BASE_URL}/company-news"
+    params = _company_news_params(token, symbol, date_from, date_to)
+    response = _request_with_retries(
+        client, url, params, trace_id=trace_id, ticker=symbol, rate_limiter=rate_limiter
+    )
+    return _parse_news_payload(response, symbol, trace_id), response.status_code
+
+
+async def async_fetch_company_news(
+    client: httpx.AsyncClient,
+    token: str,
+    symbol: str,
+    date_from: str,
+    date_to: str,
+    *,
+    trace_id: UUID | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> tuple[list[dict[str, Any]], int]:
+    url = f"{BASE_URL}/company-news"
+    params = _company_news_params(token, symbol, date_from, date_to)
+    response = await _async_request_with_retries(
+        client, url, params, trace_id=trace_id, ticker=symbol, rate_limiter=rate_limiter
+    )
+    return _parse_news_payload(response, symbol, trace_id), response.status_code
+
+
+async def fetch_market_news(
+    client: httpx.AsyncClient,
+    token: str,
+    category: str = "general",
+    *,
+    trace_id: UUID | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> tuple[list[dict[str, Any]], int]:
+    # /news returns the latest market-wide items for a category in one call; callers route
+    # them to tickers through each item's `related` field.
+    url = f"{BASE_URL}/news"
+    params = {"category": category, "token": token}
+    label = f"market:{category}"
+    response = await _async_request_with_retries(
+        client, url, params, trace_id=trace_id, ticker=label, rate_limiter=rate_limiter
+    )
+    return _parse_news_payload(response, label, trace_id), response.status_code
+
+
+async def fetch_market_news_many(
+    client: httpx.AsyncClient,
+    token: str,
+    categories: Iterable[str],
+    *,
+    trace_id: UUID | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> list[TickerFetchResult]:
+    """Fetch several market news categories; results use ``market:<category>`` as the symbol."""
+
+    async def _fetch_one(category: str) -> TickerFetchResult:
+        symbol = f"market:{category}"
+        try:
+            items, status_code = await fetch_market_news(
+                client, token, category, trace_id=trace_id, rate_limiter=rate_limiter
+            )
+        except (FinnhubError, httpx.HTTPError, ValueError) as exc:
+            return TickerFetchResult(symbol=symbol, items=[], status_code=None, error=exc)
+        return TickerFetchResult(symbol=symbol, items=items, status_code=status_code)
+
+    return list(await asyncio.gather(*(_fetch_one(category) for category in categories)))
+
+
+async def fetch_company_news_many(
+    client: httpx.AsyncClient,
+    token: str,
+    symbols: Iterable[str],
+    date_from: str,
+    date_to: str,
+    *,
+    concurrency: int = 8,
+    trace_id: UUID | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> list[TickerFetchResult]:
+    """Fetch company news for many tickers with at most ``concurrency`` requests in flight.
+
+    Failures are isolated per ticker: a ticker that exhausts its retries is returned with
+    ``error`` set instead of cancelling the other fetches. Results keep the input order.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def _fetch_one(symbol: str) -> TickerFetchResult:
+        async with semaphore:
+            try:
+                items, status_code = await async_fetch_company_news(
+                    client,
+                    token,
+                    symbol,
+                    date_from,
+                    date_to,
+                    trace_id=trace_id,
+                    rate_limiter=rate_limiter,
+                )
+            except (FinnhubError, httpx.HTTPError, ValueError) as exc:
+                return TickerFetchResult(symbol=symbol, items=[], status_code=None, error=exc)
+        return TickerFetchResult(symbol=symbol, items=items, status_code=status_code)
+
+    return list(await asyncio.gather(*(_fetch_one(symbol) for symbol in symbols)))
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from psycopg2.extras import Json
+from datetime import datetime
+from typing import Any, Iterable
+from uuid import UUID
+
+from psycopg2.extras import Json, execute_values
 
 from ingestion.models import NewsEvent
 
@@ -36,3 +40,52 @@ def upsert_news_event(conn, event: NewsEvent) -> tuple[int, bool]:
         inserted = bool(row[1])
     conn.commit()
     return event_id, inserted
+
+
+# Column order of news_events inserts; NormalizedBatch.row builds these without a NewsEvent.
+NewsRow = tuple[str, UUID, str, datetime, datetime, str, str, str | None, list[str], dict[str, Any]]
+
+
+def upsert_news_rows(conn, rows: Iterable[NewsRow]) -> dict[str, tuple[int, bool]]:
+    """Bulk upsert keyed by news_id; the caller owns the transaction."""
+    # ON CONFLICT cannot touch the same row twice in one statement, so collapse by news_id first.
+    unique = {row[0]: row for row in rows}
+    if not unique:
+        return {}
+    sql = (
+        "INSERT INTO news_events (news_id, trace_id, source, published_at, ingested_at, "
+        "title, url, content, tickers, raw_payload) "
+        "VALUES %s "
+        "ON CONFLICT (news_id) DO UPDATE SET news_id = EXCLUDED.news_id "
+        "RETURNING news_id, id, (xmax = 0) AS inserted"
+    )
+    values = [
+        (
+            news_id,
+            str(trace_id),
+            source,
+            published_at,
+            ingested_at,
+            title,
+            url,
+            content,
+            tickers,
+            Json(raw_payload),
+        )
+        for (
+            news_id,
+            trace_id,
+            source,
+            published_at,
+            ingested_at,
+            title,
+            url,
+            content,
+            tickers,
+            raw_payload,
+        ) in unique.values()
+    ]
+    template = "(%s, %s, %s, %s, %s, %s, %s, %s, %s::text[], %s)"
+    with conn.cursor() as cursor:
+        result = execute_values(cursor, sql, values, template=template, fetch=True)
+    return {row[0]: (row[1], bool(row[2])) for row in result}
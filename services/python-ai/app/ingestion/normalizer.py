@@ -5,7 +5,7 @@ from typing import Any
 from uuid import UUID
 
 from ingestion.models import NewsEvent
-from ingestion.url_utils import canonicalize_url, generate_news_id
+from ingestion.url_utils import resolve_url
 
 
 class NormalizationError(ValueError):
@@ -57,8 +57,6 @@ def normalize_finnhub(
     if not url or not headline or not published_at:
         raise NormalizationError("Missing required fields: url/headline/datetime")
 
-    canonical_url = canonicalize_url(url)
-
     content = item.get("summary") or item.get("content")
     if isinstance(content, str):
         content = content.strip() or None
@@ -69,16 +67,17 @@ def normalize_finnhub(
     tickers = _dedupe_preserve(related)
 
     source = item.get("source") or "finnhub"
-    news_id = generate_news_id(source, canonical_url)
+    # One cached parse and hash per URL; raw_store already canonicalized it when staging.
+    canonical = resolve_url(source, url)
 
     return NewsEvent(
-        news_id=news_id,
+        news_id=canonical.news_id,
         trace_id=trace_id,
         source=source,
         published_at=published_at,
         ingested_at=ingested_at,
         title=headline,
-        url=canonical_url,
+        url=canonical.url,
         content=content,
         tickers=tickers,
         raw_payload=item,
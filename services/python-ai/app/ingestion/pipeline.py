@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator
+from uuid import UUID
+
+import psycopg2
+
+from ingestion.batch_normalizer import normalize_batch
+from ingestion.dedup import ClusterCandidate, NearDedupConfig, assign_clusters
+from ingestion.news_store import NewsRow, upsert_news_rows
+from ingestion.raw_store import (
+    RawNewsRow,
+    claim_raw_items,
+    delete_checkpoint,
+    iter_raw_items,
+    load_checkpoint,
+    mark_raw_results,
+    save_checkpoint,
+)
+from jobs.clusters import inherit_cluster_analyses, load_clusters
+from jobs.outbox import publish_staged, stage_jobs
+from jobs.priority import job_priorities
+from jobs.publisher import publish_jobs
+from jobs.queue import JobQueue
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class NormalizeStats:
+    normalized_ok: int = 0
+    normalized_failed: int = 0
+    news_inserted: int = 0
+    jobs_enqueued: int = 0
+    jobs_skipped: int = 0
+    near_duplicates: int = 0
+    # {news_event_id: priority} waiting to be published to a non-transactional job queue
+    # once the events are committed (see publish_deferred_jobs).
+    deferred_jobs: dict[int, int] = field(default_factory=dict)
+
+    def add(self, other: NormalizeStats) -> None:
+        self.normalized_ok += other.normalized_ok
+        self.normalized_failed += other.normalized_failed
+        self.news_inserted += other.news_inserted
+        self.jobs_enqueued += other.jobs_enqueued
+        self.jobs_skipped += other.jobs_skipped
+        self.near_duplicates += other.near_duplicates
+        self.deferred_jobs.update(other.deferred_jobs)
+
+
+def publish_deferred_jobs(conn, job_queue: JobQueue | None, stats: NormalizeStats, trace_id: UUID) -> None:
+    """Publish jobs held back for a non-transactional queue; call only after committing.
+
+    The jobs were staged in the outbox with the events, so a crash before this call leaves
+    them for the workers' outbox sweep instead of losing them.
+    """
+    if job_queue is None or not stats.deferred_jobs:
+        return
+    enqueued = publish_staged(conn, job_queue, stats.deferred_jobs, trace_id)
+    stats.jobs_enqueued += enqueued
+    stats.jobs_skipped += len(stats.deferred_jobs) - enqueued
+    stats.deferred_jobs = {}
+
+
+def _chunks(rows: Iterable[RawNewsRow], size: int) -> Iterator[list[RawNewsRow]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, max(size, 1)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _normalize_in_memory(
+    rows: list[RawNewsRow],
+    trace_id: UUID,
+    ingested_at: datetime,
+) -> tuple[dict[int, NewsRow], list[tuple[int, str]]]:
+    batch = normalize_batch([row.raw_payload for row in rows], trace_id, ingested_at)
+    events = {rows[batch.positions[index]].id: batch.row(index) for index in range(len(batch))}
+    failures = [(rows[position].id, error) for position, error in batch.failures]
+    return events, failures
+
+
+def _cluster_events(
+    conn,
+    events: dict[int, NewsRow],
+    upserted: dict[str, tuple[int, bool]],
+    near_dedup: NearDedupConfig,
+) -> tuple[list[int], list[int]]:
+    """Split upserted events into cluster representatives and near-duplicate members."""
+    rows_by_news_id = {row[0]: row for row in events.values()}
+    candidates = [
+        ClusterCandidate(
+            event_id=event_id,
+            title=rows_by_news_id[news_id][5],
+            content=rows_by_news_id[news_id][7],
+            published_at=rows_by_news_id[news_id][3],
+        )
+        for news_id, (event_id, inserted) in upserted.items()
+        if inserted
+    ]
+    clusters = assign_clusters(conn, candidates, near_dedup)
+    existing = [event_id for event_id, _inserted in upserted.values() if event_id not in clusters]
+    clusters.update(load_clusters(conn, existing))
+    representatives = [event_id for event_id, cluster_id in clusters.items() if cluster_id == event_id]
+    members = [event_id for event_id, cluster_id in clusters.items() if cluster_id != event_id]
+    return representatives, members
+
+
+def _write_events(
+    conn,
+    events: dict[int, NewsRow],
+    trace_id: UUID,
+    stats: NormalizeStats,
+    near_dedup: NearDedupConfig | None = None,
+    job_queue: JobQueue | None = None,
+) -> None:
+    upserted = upsert_news_rows(conn, events.values())
+    events_by_news_id = {row[0]: row for row in events.values()}
+    stats.news_inserted += sum(1 for _event_id, inserted in upserted.values() if inserted)
+    event_ids = [event_id for event_id, _inserted in upserted.values()]
+    if near_dedup is not None:
+        # Only representatives are analyzed; members copy whatever the representative has.
+        event_ids, members = _cluster_events(conn, events, upserted, near_dedup)
+        stats.near_duplicates += len(members)
+        inherit_cluster_analyses(conn, members)
+    rows_by_event_id = {
+        event_id: events_by_news_id[news_id] for news_id, (event_id, _inserted) in upserted.items()
+    }
+    priorities = job_priorities(
+        conn,
+        [(event_id, rows_by_event_id[event_id][3], rows_by_event_id[event_id][8]) for event_id in event_ids],
+    )
+    if job_queue is not None and not job_queue.transactional:
+        # Publishing now would let a worker see the job before the event is committed.
+        deferred = {event_id: priorities.get(event_id, 0) for event_id in event_ids}
+        stage_jobs(conn, deferred, trace_id)
+        stats.deferred_jobs.update(deferred)
+        return
+    if job_queue is None:
+        enqueued = publish_jobs(conn, event_ids, trace_id, priorities=priorities)
+    else:
+        enqueued = job_queue.publish_many(conn, event_ids, trace_id, priorities=priorities)
+    stats.jobs_enqueued += enqueued
+    stats.jobs_skipped += len(event_ids) - enqueued
+
+
+def _write_row_by_row(
+    conn,
+    events: dict[int, NewsRow],
+    trace_id: UUID,
+    stats: NormalizeStats,
+    near_dedup: NearDedupConfig | None = None,
+    job_queue: JobQueue | None = None,
+) -> tuple[list[int], list[tuple[int, str]]]:
+    written: list[int] = []
+    failures: list[tuple[int, str]] = []
+    for raw_id, event in events.items():
+        with conn.cursor() as cursor:
+            cursor.execute("SAVEPOINT normalize_row")
+        try:
+            _write_events(conn, {raw_id: event}, trace_id, stats, near_dedup, job_queue)
+        except psycopg2.Error as exc:
+            with conn.cursor() as cursor:
+                cursor.execute("ROLLBACK TO SAVEPOINT normalize_row")
+            failures.append((raw_id, f"unexpected_error: {exc}"))
+            continue
+        with conn.cursor() as cursor:
+            cursor.execute("RELEASE SAVEPOINT normalize_row")
+        written.append(raw_id)
+    return written, failures
+
+
+def normalize_chunk(
+    conn,
+    rows: list[RawNewsRow],
+    trace_id: UUID,
+    ingested_at: datetime,
+    *,
+    commit: bool = True,
+    near_dedup: NearDedupConfig | None = None,
+    job_queue: JobQueue | None = None,
+) -> NormalizeStats:
+    """Normalize and persist one chunk of raw rows in a single transaction.
+
+    Events, jobs and raw statuses are written with one bulk statement each. If the bulk write
+    fails, the chunk is retried row by row under savepoints so a single bad row is recorded in
+    ``last_error`` without losing the rest of the chunk. With ``commit=False`` the caller can
+    add its own writes (e.g. a checkpoint) to the same transaction; it must then call
+    :func:`publish_deferred_jobs` after committing.
+    """
+    stats = NormalizeStats()
+    events, failures = _normalize_in_memory(rows, trace_id, ingested_at)
+    written = list(events)
+
+    with conn.cursor() as cursor:
+        cursor.execute("SAVEPOINT normalize_chunk")
+    try:
+        _write_events(conn, events, trace_id, stats, near_dedup, job_queue)
+    except psycopg2.Error as exc:
+        LOGGER.warning(
+            "normalize_chunk_fallback trace_id=%s rows=%s error=%s",
+            trace_id,
+            len(rows),
+            exc,
+        )
+        with conn.cursor() as cursor:
+            cursor.execute("ROLLBACK TO SAVEPOINT normalize_chunk")
+        stats = NormalizeStats()
+        written, row_failures = _write_row_by_row(conn, events, trace_id, stats, near_dedup, job_queue)
+        failures.extend(row_failures)
+    else:
+        with conn.cursor() as cursor:
+            cursor.execute("RELEASE SAVEPOINT normalize_chunk")
+
+    mark_raw_results(conn, written, failures)
+    if commit:
+        conn.commit()
+        publish_deferred_jobs(conn, job_queue, stats, trace_id)
+    stats.normalized_ok += len(written)
+    stats.normalized_failed += len(failures)
+    return stats
+
+
+def normalize_raw_rows(
+    conn,
+    rows: Iterable[RawNewsRow],
+    trace_id: UUID,
+    ingested_at: datetime,
+    *,
+    chunk_size: int = 500,
+    near_dedup: NearDedupConfig | None = None,
+    job_queue: JobQueue | None = None,
+) -> NormalizeStats:
+    stats = NormalizeStats()
+    for chunk in _chunks(rows, chunk_size):
+        stats.add(
+            normalize_chunk(conn, chunk, trace_id, ingested_at, near_dedup=near_dedup, job_queue=job_queue)
+        )
+    return stats
+
+
+def drain_raw_items(
+    conn,
+    source: str,
+    trace_id: UUID,
+    ingested_at: datetime,
+    *,
+    chunk_size: int = 500,
+    near_dedup: NearDedupConfig | None = None,
+    job_queue: JobQueue | None = None,
+) -> NormalizeStats:
+    """Claim and normalize chunks with ``FOR UPDATE SKIP LOCKED`` until nothing is left.
+
+    Safe to run from many processes at once: each chunk is claimed and written in the same
+    transaction, so concurrent workers always see disjoint rows.
+    """
+    stats = NormalizeStats()
+    while True:
+        rows = claim_raw_items(conn, source, chunk_size)
+        if not rows:
+            conn.commit()
+            return stats
+        stats.add(
+            normalize_chunk(conn, rows, trace_id, ingested_at, near_dedup=near_dedup, job_queue=job_queue)
+        )
+
+
+def stream_normalize(
+    read_conn,
+    write_conn,
+    source: str,
+    trace_id: UUID,
+    ingested_at: datetime,
+    *,
+    checkpoint_name: str,
+    chunk_size: int = 500,
+    near_dedup: NearDedupConfig | None = None,
+    job_queue: JobQueue | None = None,
+) -> NormalizeStats:
+    """Replay an unbounded backlog with constant memory, resuming from ``checkpoint_name``.
+
+    Each chunk's writes and the checkpoint advance commit together, so a crash resumes after
+    the last committed chunk instead of starting over. Once the stream is drained the
+    checkpoint is deleted: rows that went back to ``failed`` (or committed late with an older
+    ``fetched_at``) sit behind it and must be seen again by the next run.
+    """
+    stats = NormalizeStats()
+    after = load_checkpoint(write_conn, checkpoint_name)
+    if after:
+        LOGGER.info(
+            "replay_stream_resume trace_id=%s checkpoint=%s fetched_at=%s id=%s",
+            trace_id,
+            checkpoint_name,
+            after[0].isoformat(),
+            after[1],
+        )
+    rows = iter_raw_items(read_conn, source, after=after, itersize=chunk_size)
+    for chunk in _chunks(rows, chunk_size):
+        chunk_stats = normalize_chunk(
+            write_conn,
+            chunk,
+            trace_id,
+            ingested_at,
+            commit=False,
+            near_dedup=near_dedup,
+            job_queue=job_queue,
+        )
+        last = chunk[-1]
+        save_checkpoint(write_conn, checkpoint_name, last.fetched_at, last.id)
+        write_conn.commit()
+        publish_deferred_jobs(write_conn, job_queue, chunk_stats, trace_id)
+        stats.add(chunk_stats)
+    delete_checkpoint(write_conn, checkpoint_name)
+    return stats
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+from typing import Callable, Protocol
+
+
+class RateLimiter(Protocol):
+    def reserve(self, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens and return how many seconds the caller must wait before using them."""
+        ...
+
+
+def _default_capacity(calls_per_minute: float) -> float:
+    # Small bursts only: a full minute of burst would let several processes spike together.
+    return max(1.0, calls_per_minute / 10.0)
+
+
+def _refill(tokens: float, elapsed_seconds: float, capacity: float, rate_per_second: float) -> float:
+    return min(capacity, tokens + max(elapsed_seconds, 0.0) * rate_per_second)
+
+
+def _wait_seconds(tokens: float, rate_per_second: float) -> float:
+    # Reservations may drive the bucket negative; the debt is paid back by waiting.
+    if tokens >= 0:
+        return 0.0
+    return -tokens / rate_per_second
+
+
+class FileTokenBucket:
+    """Token bucket shared by processes on one host through an flock-guarded state file."""
+
+    def __init__(
+        self,
+        path: str,
+        calls_per_minute: float,
+        *,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if calls_per_minute <= 0:
+            raise ValueError("calls_per_minute must be positive")
+        self.path = path
+        self.rate_per_second = calls_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else _default_capacity(calls_per_minute)
+        self._clock = clock
+
+    def reserve(self, cost: float = 1.0) -> float:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+", encoding="utf-8") as handle:
+            # The lock is released when the file is closed.
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            raw = handle.read()
+            now = self._clock()
+            try:
+                state = json.loads(raw) if raw else {}
+            except ValueError:
+                state = {}
+            if "tokens" in state and "updated_at" in state:
+                tokens = _refill(
+                    float(state["tokens"]),
+                    now - float(state["updated_at"]),
+                    self.capacity,
+                    self.rate_per_second,
+                )
+            else:
+                tokens = self.capacity
+            tokens = min(self.capacity, tokens - cost)
+            handle.seek(0)
+            handle.truncate()
+            handle.write(json.dumps({"tokens": tokens, "updated_at": now}))
+            handle.flush()
+        return _wait_seconds(tokens, self.rate_per_second)
+
+
+class PostgresTokenBucket:
+    """Token bucket stored in ``rate_limit_buckets`` so every process sharing the DB shares the quota.
+
+    Each reservation is a single upsert; the row lock taken by ``ON CONFLICT DO UPDATE``
+    serializes concurrent callers. A negative ``cost`` hands tokens back (up to capacity),
+    e.g. when a reservation based on an estimate turned out too large.
+    """
+
+    def __init__(
+        self,
+        conn,
+        name: str,
+        calls_per_minute: float,
+        *,
+        capacity: float | None = None,
+    ) -> None:
+        if calls_per_minute <= 0:
+            raise ValueError("calls_per_minute must be positive")
+        self._conn = conn
+        self.name = name
+        self.rate_per_second = calls_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else _default_capacity(calls_per_minute)
+
+    def reserve(self, cost: float = 1.0) -> float:
+        sql = (
+            "INSERT INTO rate_limit_buckets (name, tokens, updated_at) "
+            "VALUES (%s, %s, clock_timestamp()) "
+            "ON CONFLICT (name) DO UPDATE SET "
+            "tokens = LEAST(%s, LEAST(%s, rate_limit_buckets.tokens + "
+            "EXTRACT(EPOCH FROM clock_timestamp() - rate_limit_buckets.updated_at) * %s) - %s), "
+            "updated_at = clock_timestamp() "
+            "RETURNING tokens"
+        )
+        with self._conn.cursor() as cursor:
+            cursor.execute(
+                sql,
+                (
+                    self.name,
+                    min(self.capacity, self.capacity - cost),
+                    self.capacity,
+                    self.capacity,
+                    self.rate_per_second,
+                    cost,
+                ),
+            )
+            tokens = float(cursor.fetchone()[0])
+        self._conn.commit()
+        return _wait_seconds(tokens, self.rate_per_second)
+
+
+def acquire(limiter: RateLimiter | None) -> None:
+    if limiter is None:
+        return
+    wait_seconds = limiter.reserve()
+    if wait_seconds > 0:
+        time.sleep(wait_seconds)
+
+
+async def acquire_async(limiter: RateLimiter | None) -> None:
+    if limiter is None:
+        return
+    # reserve() may block on a file lock or a DB round trip; keep it off the event loop.
+    wait_seconds = await asyncio.to_thread(limiter.reserve)
+    if wait_seconds > 0:
+        await asyncio.sleep(wait_seconds)
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import hashlib
+import json
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 from uuid import UUID
 
-from psycopg2.extras import Json, execute_values
+from psycopg2.extras import execute_values
 
 from ingestion.url_utils import canonicalize_url
 
@@ -15,6 +16,7 @@ from ingestion.url_utils import canonicalize_url
 class RawNewsRow:
     id: int
     raw_payload: dict[str, Any]
+    fetched_at: datetime | None = None
 
 
 def _sha256(text: str) -> str:
@@ -42,6 +44,11 @@ def _parse_timestamp(value: Any) -> datetime | None:
     return None
 
 
+def _payload_text(item: dict[str, Any]) -> str:
+    # Sorted keys make the hash independent of the provider's key order.
+    return json.dumps(item, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
 def _dedup_key(source: str, url: str | None, title: str | None, published_at: datetime | None) -> str:
     if url:
         return _sha256(f"{source}|{url}")
@@ -49,13 +56,30 @@ def _dedup_key(source: str, url: str | None, title: str | None, published_at: da
     return _sha256(f"{source}|{title or ''}|{published_str}")
 
 
-def insert_raw_items(
-    conn,
+_RAW_COLUMNS = (
+    "source, trace_id, fetched_at, published_at, url, title, dedup_key, payload_hash, raw_payload"
+)
+
+# Only rewrite a duplicate when its payload actually changed.
+_RAW_CONFLICT_CLAUSE = (
+    "ON CONFLICT (source, dedup_key) DO UPDATE "
+    "SET fetched_at = EXCLUDED.fetched_at, "
+    "trace_id = EXCLUDED.trace_id, "
+    "payload_hash = EXCLUDED.payload_hash, "
+    "raw_payload = EXCLUDED.raw_payload "
+    "WHERE raw_news_items.payload_hash IS DISTINCT FROM EXCLUDED.payload_hash "
+)
+
+# Above this many rows, insert_raw_items streams through COPY instead of execute_values.
+COPY_THRESHOLD = 5000
+
+
+def _build_raw_rows(
     source: str,
     trace_id: UUID,
     fetched_at: datetime,
     items: Iterable[dict[str, Any]],
-) -> tuple[int, int]:
+) -> list[tuple]:
     rows_by_key: dict[tuple[str, str], tuple] = {}
     for item in items:
         url = item.get("url")
@@ -68,6 +92,7 @@ def insert_raw_items(
         title = item.get("headline") or item.get("title")
         published_at = _parse_timestamp(item.get("datetime") or item.get("published_at"))
         dedup_key = _dedup_key(source, canonical_url or url, title, published_at)
+        payload_text = _payload_text(item)
         rows_by_key[(source, dedup_key)] = (
             (
                 source,
@@ -77,31 +102,113 @@ def insert_raw_items(
                 canonical_url or url,
                 title,
                 dedup_key,
-                Json(item),
+                _sha256(payload_text),
+                payload_text,
             )
         )
+    return list(rows_by_key.values())
 
-    rows = list(rows_by_key.values())
-    if not rows:
-        return 0, 0
 
+def _upsert_raw_rows(conn, rows: list[tuple]) -> tuple[int, int, int]:
     sql = (
-        "INSERT INTO raw_news_items "
-        "(source, trace_id, fetched_at, published_at, url, title, dedup_key, raw_payload) "
+        f"INSERT INTO raw_news_items ({_RAW_COLUMNS}) "
         "VALUES %s "
-        "ON CONFLICT (source, dedup_key) DO UPDATE "
-        "SET fetched_at = EXCLUDED.fetched_at, "
-        "trace_id = EXCLUDED.trace_id, "
-        "raw_payload = EXCLUDED.raw_payload "
+        f"{_RAW_CONFLICT_CLAUSE}"
         "RETURNING (xmax = 0) AS inserted"
     )
+    template = "(%s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)"
 
     with conn.cursor() as cursor:
-        result = execute_values(cursor, sql, rows, fetch=True)
+        # Rows skipped by the WHERE clause are not returned, so they are the unchanged ones.
+        result = execute_values(cursor, sql, rows, template=template, fetch=True)
         inserted = sum(1 for row in result if row[0])
-        updated = len(result) - inserted
+        changed = len(result) - inserted
     conn.commit()
-    return inserted, updated
+    return inserted, changed, len(rows) - len(result)
+
+
+def _copy_field(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    text = value.isoformat() if isinstance(value, datetime) else str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class _CopyStream:
+    """File-like reader that renders COPY text lines lazily so large batches are never joined."""
+
+    def __init__(self, rows: Iterable[tuple]) -> None:
+        self._lines = ("\t".join(_copy_field(value) for value in row) + "\n" for row in rows)
+        self._buffer = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            chunk, self._buffer = self._buffer, ""
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def _copy_raw_rows(conn, rows: list[tuple]) -> tuple[int, int, int]:
+    create_sql = (
+        "CREATE TEMP TABLE raw_news_items_stage ("
+        "source TEXT, trace_id UUID, fetched_at TIMESTAMPTZ, published_at TIMESTAMPTZ, "
+        "url TEXT, title TEXT, dedup_key TEXT, payload_hash CHAR(64), raw_payload JSONB"
+        ") ON COMMIT DROP"
+    )
+    merge_sql = (
+        "WITH merged AS ("
+        f"  INSERT INTO raw_news_items ({_RAW_COLUMNS}) "
+        f"  SELECT {_RAW_COLUMNS} FROM raw_news_items_stage "
+        f"  {_RAW_CONFLICT_CLAUSE}"
+        "  RETURNING (xmax = 0) AS inserted"
+        ") "
+        "SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FROM merged"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(create_sql)
+        cursor.copy_expert(
+            f"COPY raw_news_items_stage ({_RAW_COLUMNS}) FROM STDIN",
+            _CopyStream(rows),
+        )
+        cursor.execute(merge_sql)
+        inserted, written = cursor.fetchone()
+    conn.commit()
+    return inserted, written - inserted, len(rows) - written
+
+
+def insert_raw_items(
+    conn,
+    source: str,
+    trace_id: UUID,
+    fetched_at: datetime,
+    items: Iterable[dict[str, Any]],
+    *,
+    bulk_threshold: int = COPY_THRESHOLD,
+) -> tuple[int, int, int]:
+    """Upsert raw payloads and return (inserted, changed, unchanged) counts.
+
+    Duplicates whose payload hash matches the stored row are left untouched, so byte-identical
+    refetches do not rewrite the JSONB row or its GIN index entry. Batches of at least
+    ``bulk_threshold`` rows are loaded with COPY into a temp staging table and merged with
+    the same conflict rules.
+    """
+    rows = _build_raw_rows(source, trace_id, fetched_at, items)
+    if not rows:
+        return 0, 0, 0
+    if len(rows) >= bulk_threshold:
+        return _copy_raw_rows(conn, rows)
+    return _upsert_raw_rows(conn, rows)
 
 
 def select_raw_items(conn, source: str, limit: int) -> list[RawNewsRow]:
@@ -120,23 +227,113 @@ def select_raw_items(conn, source: str, limit: int) -> list[RawNewsRow]:
     return [RawNewsRow(id=row[0], raw_payload=row[1]) for row in rows]
 
 
-def mark_raw_normalized(conn, raw_id: int) -> None:
+def iter_raw_items(
+    conn,
+    source: str,
+    *,
+    after: tuple[datetime, int] | None = None,
+    page_size: int = 5000,
+    itersize: int = 500,
+) -> Iterator[RawNewsRow]:
+    """Yield pending raw rows oldest first, holding at most ``itersize`` payloads in memory.
+
+    Rows are read through a named (server-side) cursor in keyset pages on ``(fetched_at, id)``.
+    The read transaction is closed after every page so no snapshot is held for the whole
+    replay; ``conn`` should therefore be a dedicated read connection. ``after`` resumes
+    strictly after a previously checkpointed key.
+    """
     sql = (
-        "UPDATE raw_news_items "
-        "SET status = 'normalized', attempts = attempts + 1, last_error = NULL "
-        "WHERE id = %s"
+        "SELECT id, raw_payload, fetched_at "
+        "FROM raw_news_items "
+        "WHERE source = %s "
+        "AND status IN ('fetched','failed') "
+        "AND attempts < 3 "
+        "AND (fetched_at, id) > (%s, %s) "
+        "ORDER BY fetched_at ASC, id ASC "
+        "LIMIT %s"
     )
+    last_key = after or (datetime.min.replace(tzinfo=timezone.utc), 0)
+    while True:
+        seen = 0
+        with conn.cursor(name="raw_news_items_stream") as cursor:
+            cursor.itersize = itersize
+            cursor.execute(sql, (source, last_key[0], last_key[1], page_size))
+            for row in cursor:
+                seen += 1
+                last_key = (row[2], row[0])
+                yield RawNewsRow(id=row[0], raw_payload=row[1], fetched_at=row[2])
+        conn.commit()
+        if seen < page_size:
+            return
+
+
+def load_checkpoint(conn, name: str) -> tuple[datetime, int] | None:
+    sql = "SELECT last_fetched_at, last_id FROM ingestion_checkpoints WHERE name = %s"
     with conn.cursor() as cursor:
-        cursor.execute(sql, (raw_id,))
+        cursor.execute(sql, (name,))
+        row = cursor.fetchone()
     conn.commit()
+    if not row:
+        return None
+    return row[0], row[1]
 
 
-def mark_raw_failed(conn, raw_id: int, error: str) -> None:
+def save_checkpoint(conn, name: str, fetched_at: datetime, raw_id: int) -> None:
+    """Upsert a replay checkpoint; the caller commits it together with the chunk it covers."""
     sql = (
-        "UPDATE raw_news_items "
-        "SET status = 'failed', attempts = attempts + 1, last_error = %s "
-        "WHERE id = %s"
+        "INSERT INTO ingestion_checkpoints (name, last_fetched_at, last_id) "
+        "VALUES (%s, %s, %s) "
+        "ON CONFLICT (name) DO UPDATE SET "
+        "last_fetched_at = EXCLUDED.last_fetched_at, last_id = EXCLUDED.last_id, updated_at = NOW()"
     )
     with conn.cursor() as cursor:
-        cursor.execute(sql, (error, raw_id))
+        cursor.execute(sql, (name, fetched_at, raw_id))
+
+
+def delete_checkpoint(conn, name: str) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM ingestion_checkpoints WHERE name = %s", (name,))
     conn.commit()
+
+
+def claim_raw_items(conn, source: str, limit: int) -> list[RawNewsRow]:
+    """Lock up to ``limit`` pending raw rows for this transaction, skipping rows other workers hold.
+
+    The row locks last until the caller commits or rolls back, so the claim and the writes for
+    the chunk must share one transaction.
+    """
+    sql = (
+        "SELECT id, raw_payload "
+        "FROM raw_news_items "
+        "WHERE source = %s "
+        "AND status IN ('fetched','failed') "
+        "AND attempts < 3 "
+        "ORDER BY fetched_at DESC "
+        "LIMIT %s "
+        "FOR UPDATE SKIP LOCKED"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (source, limit))
+        rows = cursor.fetchall()
+    return [RawNewsRow(id=row[0], raw_payload=row[1]) for row in rows]
+
+
+def mark_raw_results(
+    conn,
+    normalized_ids: Iterable[int],
+    failures: Iterable[tuple[int, str]],
+) -> int:
+    """Record normalization outcomes for many rows in one statement; the caller commits."""
+    rows = [(raw_id, "normalized", None) for raw_id in normalized_ids]
+    rows.extend((raw_id, "failed", error) for raw_id, error in failures)
+    if not rows:
+        return 0
+    sql = (
+        "UPDATE raw_news_items r "
+        "SET status = v.status, attempts = r.attempts + 1, last_error = v.last_error "
+        "FROM (VALUES %s) AS v (id, status, last_error) "
+        "WHERE r.id = v.id"
+    )
+    with conn.cursor() as cursor:
+        execute_values(cursor, sql, rows, template="(%s::bigint, %s::text, %s::text)")
+    return len(rows)
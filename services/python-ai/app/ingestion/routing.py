@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+
+class TickerIndex:
+    """In-memory set of the symbols we track, used to route market-wide news locally."""
+
+    def __init__(self, symbols: Iterable[str]) -> None:
+        self._symbols = frozenset(symbol.strip().upper() for symbol in symbols if symbol and symbol.strip())
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._symbols
+
+    def match(self, related: Any) -> list[str]:
+        """Tracked symbols named in a Finnhub ``related`` field (comma-separated string or list)."""
+        if not related:
+            return []
+        if isinstance(related, str):
+            candidates = related.split(",")
+        elif isinstance(related, (list, tuple)):
+            candidates = [value for value in related if isinstance(value, str)]
+        else:
+            return []
+        matched = [value.strip().upper() for value in candidates]
+        return list(dict.fromkeys(symbol for symbol in matched if symbol in self._symbols))
+
+
+@dataclass
+class RoutedNews:
+    items: list[dict[str, Any]] = field(default_factory=list)
+    by_ticker: dict[str, int] = field(default_factory=dict)
+    unrouted: int = 0
+    duplicates: int = 0
+
+
+def _item_key(item: dict[str, Any]) -> Any:
+    return item.get("id") or item.get("url")
+
+
+def route_items(
+    items: Iterable[dict[str, Any]],
+    index: TickerIndex,
+    *,
+    since: datetime | None = None,
+    published_at: Callable[[dict[str, Any]], datetime | None] | None = None,
+) -> RoutedNews:
+    """Keep items related to at least one tracked ticker and count coverage per ticker.
+
+    Items repeated across categories are kept once. ``by_ticker`` only counts items published
+    at or after ``since`` (when given), so it reflects coverage inside the ingestion window.
+    """
+    routed = RoutedNews()
+    seen: set[Any] = set()
+    for item in items:
+        key = _item_key(item)
+        if key is not None:
+            if key in seen:
+                routed.duplicates += 1
+                continue
+            seen.add(key)
+        symbols = index.match(item.get("related"))
+        if not symbols:
+            routed.unrouted += 1
+            continue
+        routed.items.append(item)
+        if since is not None and published_at is not None:
+            item_published_at = published_at(item)
+            if item_published_at is None or item_published_at < since:
+                continue
+        for symbol in symbols:
+            routed.by_ticker[symbol] = routed.by_ticker.get(symbol, 0) + 1
+    return routed
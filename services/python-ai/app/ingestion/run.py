@@ -1,21 +1,37 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import logging
+import multiprocessing
 import os
-from datetime import datetime, timedelta, timezone
-from uuid import uuid4
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator
+from uuid import UUID, uuid4
 from zoneinfo import ZoneInfo
 
 import httpx
 import psycopg2
 from dotenv import load_dotenv
 
-from ingestion.finnhub_client import FinnhubError, fetch_company_news
-from ingestion.news_store import upsert_news_event
-from ingestion.normalizer import NormalizationError, normalize_finnhub
-from ingestion.raw_store import insert_raw_items, mark_raw_failed, mark_raw_normalized, select_raw_items
-from jobs.publisher import publish_job
+from db import connect, pooled_connection
+from ingestion.backfill import load_pending_units, plan_units, run_backfill, seed_units
+from ingestion.batch_normalizer import timestamps_of, top_k_per_day
+from ingestion.dedup import NearDedupConfig
+from ingestion.finnhub_client import TickerFetchResult, fetch_company_news_many, fetch_market_news_many
+from ingestion.pipeline import NormalizeStats, drain_raw_items, normalize_raw_rows, stream_normalize
+from ingestion.rate_limiter import FileTokenBucket, PostgresTokenBucket, RateLimiter
+from ingestion.raw_store import delete_checkpoint, insert_raw_items, select_raw_items
+from ingestion.routing import TickerIndex, route_items
+from ingestion.scheduler import AdaptivePollScheduler
+from ingestion.sharding import shard_tickers
+from ingestion.watermark_store import TickerWatermark, load_watermarks, save_watermarks
+from jobs.queue import BACKENDS, JobQueue, create_queue
 
 
 def _parse_args() -> argparse.Namespace:
@@ -38,12 +54,192 @@ def _parse_args() -> argparse.Namespace:
         default=200,
         help="Max raw items to process per run",
     )
+    parser.add_argument(
+        "--normalize-batch-size",
+        type=int,
+        default=500,
+        help="Raw rows normalized and written per transaction",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Normalize with N processes that claim raw rows until the backlog is drained",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Normalize every pending raw row through a server-side cursor (ignores --process-limit)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default="finnhub_replay",
+        help="Checkpoint name used by --stream to resume after a crash",
+    )
+    parser.add_argument(
+        "--reset-checkpoint",
+        action="store_true",
+        help="Start --stream from the oldest pending row instead of the saved checkpoint",
+    )
+    parser.add_argument(
+        "--fetch-concurrency",
+        type=int,
+        default=int(os.getenv("FINNHUB_FETCH_CONCURRENCY", "8")),
+        help="Max concurrent Finnhub requests while fetching tickers",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=int(os.getenv("INGESTION_SHARD_INDEX", "0")),
+        help="This instance's shard (0-based); tickers are split by consistent hashing",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=int(os.getenv("INGESTION_SHARD_COUNT", "1")),
+        help="Total number of ingestion shards",
+    )
+    parser.add_argument(
+        "--rate-limit-per-minute",
+        type=float,
+        default=float(os.getenv("FINNHUB_CALLS_PER_MINUTE", "60")),
+        help="Finnhub calls per minute shared by all ingestion processes (0 disables)",
+    )
+    parser.add_argument(
+        "--rate-limit-backend",
+        choices=["postgres", "file"],
+        default=os.getenv("FINNHUB_RATE_LIMIT_BACKEND", "postgres"),
+        help="Where the shared token bucket lives",
+    )
+    parser.add_argument(
+        "--rate-limit-file",
+        default=os.getenv("FINNHUB_RATE_LIMIT_FILE", "/tmp/finnhub_rate_limit.json"),
+        help="State file for --rate-limit-backend file",
+    )
+    parser.add_argument(
+        "--min-fetch-interval-seconds",
+        type=int,
+        default=int(os.getenv("FINNHUB_MIN_FETCH_INTERVAL_SECONDS", "60")),
+        help="Skip tickers whose last successful fetch is more recent than this",
+    )
+    parser.add_argument(
+        "--ignore-watermarks",
+        action="store_true",
+        help="Fetch every ticker and stage every item, ignoring per-ticker watermarks",
+    )
+    parser.add_argument(
+        "--backfill-from",
+        type=date.fromisoformat,
+        default=None,
+        help="Backfill mode: first NYC date (YYYY-MM-DD) to fetch instead of --minutes-back",
+    )
+    parser.add_argument(
+        "--backfill-to",
+        type=date.fromisoformat,
+        default=None,
+        help="Backfill mode: last NYC date to fetch (defaults to today)",
+    )
+    parser.add_argument(
+        "--backfill-name",
+        default=None,
+        help="Checkpoint name for the backfill; rerun with the same name to resume",
+    )
+    parser.add_argument(
+        "--market-news",
+        action="store_true",
+        help="Pull market-wide /news and route items to tickers locally; per-ticker calls only for uncovered names",
+    )
+    parser.add_argument(
+        "--market-news-categories",
+        nargs="+",
+        default=["general"],
+        help="Finnhub /news categories to pull in --market-news mode",
+    )
+    parser.add_argument(
+        "--market-fallback-minutes",
+        type=int,
+        default=360,
+        help="--market-news mode: minimum minutes between per-ticker fetches for uncovered tickers",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run continuously, polling each ticker on an adaptive schedule",
+    )
+    parser.add_argument(
+        "--poll-min-seconds",
+        type=float,
+        default=60,
+        help="Daemon mode: shortest per-ticker poll interval",
+    )
+    parser.add_argument(
+        "--poll-max-seconds",
+        type=float,
+        default=1800,
+        help="Daemon mode: longest per-ticker poll interval",
+    )
+    parser.add_argument(
+        "--poll-target-items",
+        type=float,
+        default=1.0,
+        help="Daemon mode: expected new items per poll used to size each ticker's interval",
+    )
+    parser.add_argument(
+        "--ticker-refresh-seconds",
+        type=float,
+        default=300,
+        help="Daemon mode: how often to reload the tickers table",
+    )
+    parser.add_argument(
+        "--near-dedup",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("NEWS_NEAR_DEDUP", "1") not in {"0", "false", "no"},
+        help="Cluster near-duplicate stories (MinHash + LSH) and only enqueue LLM jobs for cluster representatives",
+    )
+    parser.add_argument(
+        "--near-dedup-threshold",
+        type=float,
+        default=0.8,
+        help="Estimated Jaccard similarity of title + content needed for two stories to share a cluster",
+    )
+    parser.add_argument(
+        "--near-dedup-window-hours",
+        type=int,
+        default=72,
+        help="Only cluster with stories published within this many hours",
+    )
+    parser.add_argument(
+        "--queue-backend",
+        choices=BACKENDS,
+        default=os.getenv("JOB_QUEUE_BACKEND", "postgres"),
+        help="Where LLM jobs are published: analysis_jobs rows (postgres) or Redis Streams (redis)",
+    )
+    parser.add_argument(
+        "--redis-url",
+        default=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+        help="Redis URL for --queue-backend redis",
+    )
     parser.add_argument(
         "--replay-only",
         action="store_true",
         help="Skip fetching and only process existing raw_news_items",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.stream and args.workers > 1:
+        parser.error("--stream and --workers are mutually exclusive")
+    if args.backfill_to and not args.backfill_from:
+        parser.error("--backfill-to requires --backfill-from")
+    if args.backfill_from and args.replay_only:
+        parser.error("--backfill-from cannot be combined with --replay-only")
+    if not 0 < args.near_dedup_threshold <= 1:
+        parser.error("--near-dedup-threshold must be in (0, 1]")
+    if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be in [0, --shard-count)")
+    if args.market_news and (args.daemon or args.backfill_from or args.replay_only):
+        parser.error("--market-news cannot be combined with --daemon, --backfill-from or --replay-only")
+    if args.daemon and (args.replay_only or args.backfill_from or args.stream or args.workers > 1):
+        parser.error("--daemon cannot be combined with --replay-only, --backfill-from, --stream or --workers")
+    return args
 
 
 def _configure_logging() -> None:
@@ -54,31 +250,18 @@ def _configure_logging() -> None:
     )
 
 
-def _connect_db():
-    host = os.getenv("POSTGRES_HOST")
-    port = int(os.getenv("POSTGRES_PORT", "5432"))
-    name = os.getenv("POSTGRES_DB")
-    user = os.getenv("POSTGRES_USER")
-    password = os.getenv("POSTGRES_PASSWORD")
-    missing = [key for key, value in {
-        "POSTGRES_HOST": host,
-        "POSTGRES_DB": name,
-        "POSTGRES_USER": user,
-        "POSTGRES_PASSWORD": password,
-    }.items() if not value]
-    if missing:
-        raise SystemExit(f"Missing DB environment variables: {', '.join(missing)}")
-    conn = psycopg2.connect(
-        host=host,
-        port=port,
-        dbname=name,
-        user=user,
-        password=password,
+def _shard(args: argparse.Namespace, tickers: list[str]) -> list[str]:
+    if args.shard_count <= 1:
+        return tickers
+    owned = shard_tickers(tickers, args.shard_index, args.shard_count)
+    logging.getLogger(__name__).info(
+        "ingestion_shard shard_index=%s shard_count=%s tickers=%s owned=%s",
+        args.shard_index,
+        args.shard_count,
+        len(tickers),
+        len(owned),
     )
-    with conn.cursor() as cursor:
-        cursor.execute("SET TIME ZONE 'UTC'")
-    conn.commit()
-    return conn
+    return owned
 
 
 def _fetch_ticker_symbols(conn, symbols: list[str] | None) -> list[str]:
@@ -118,6 +301,23 @@ def _parse_finnhub_timestamp(value) -> datetime | None:
     return None
 
 
+def _filter_new_items(
+    items: list[dict],
+    last_published_at: datetime | None,
+) -> tuple[list[dict], int, datetime | None]:
+    newest: datetime | None = None
+    kept: list[dict] = []
+    for item in items:
+        published_at = _parse_finnhub_timestamp(item.get("datetime") or item.get("published_at"))
+        if published_at is not None and (newest is None or published_at > newest):
+            newest = published_at
+        # Items without a usable timestamp are kept; normalization records why they fail.
+        if last_published_at is not None and published_at is not None and published_at <= last_published_at:
+            continue
+        kept.append(item)
+    return kept, len(items) - len(kept), newest
+
+
 def _limit_items_per_day(
     items: list[dict],
     limit: int,
@@ -125,36 +325,562 @@ def _limit_items_per_day(
 ) -> tuple[list[dict], int]:
     if limit <= 0:
         return items, 0
-    ranked: list[tuple[datetime | None, dict]] = []
-    for item in items:
-        ts = item.get("datetime") or item.get("published_at")
-        ranked.append((_parse_finnhub_timestamp(ts), item))
-    ranked.sort(
-        key=lambda pair: pair[0] or datetime.min.replace(tzinfo=timezone.utc),
-        reverse=True,
-    )
-    counts: dict[str, int] = {}
-    kept: list[dict] = []
-    for published_at, item in ranked:
-        if published_at:
-            date_key = published_at.astimezone(local_tz).date().isoformat()
-        else:
-            date_key = "unknown"
-        if counts.get(date_key, 0) >= limit:
-            continue
-        counts[date_key] = counts.get(date_key, 0) + 1
-        kept.append(item)
+    kept = [items[index] for index in top_k_per_day(timestamps_of(items), limit, local_tz)]
     dropped = len(items) - len(kept)
     return kept, dropped
 
 
+@dataclass
+class FetchSummary:
+    fetched: int = 0
+    raw_inserted: int = 0
+    raw_changed: int = 0
+    raw_unchanged: int = 0
+    watermark_dropped: int = 0
+    tickers_skipped: int = 0
+    tickers_covered: int = 0
+
+
+@contextmanager
+def _rate_limiter(args: argparse.Namespace) -> Iterator[RateLimiter | None]:
+    if args.rate_limit_per_minute <= 0:
+        yield None
+        return
+    if args.rate_limit_backend == "file":
+        yield FileTokenBucket(args.rate_limit_file, args.rate_limit_per_minute)
+        return
+    # The limiter gets its own connection so token reservations commit independently.
+    limiter_conn = connect()
+    try:
+        yield PostgresTokenBucket(limiter_conn, "finnhub", args.rate_limit_per_minute)
+    finally:
+        limiter_conn.close()
+
+
+def _async_client(concurrency: int) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(10.0, connect=5.0)
+    limits = httpx.Limits(
+        max_connections=max(concurrency, 1),
+        max_keepalive_connections=max(concurrency, 1),
+    )
+    return httpx.AsyncClient(timeout=timeout, limits=limits)
+
+
+async def _fetch_tickers(
+    token: str,
+    tickers: list[str],
+    date_from: str,
+    date_to: str,
+    concurrency: int,
+    trace_id: UUID,
+    rate_limiter: RateLimiter | None,
+) -> list[TickerFetchResult]:
+    async with _async_client(concurrency) as client:
+        return await fetch_company_news_many(
+            client,
+            token,
+            tickers,
+            date_from,
+            date_to,
+            concurrency=concurrency,
+            trace_id=trace_id,
+            rate_limiter=rate_limiter,
+        )
+
+
+async def _fetch_market(
+    token: str,
+    categories: list[str],
+    trace_id: UUID,
+    rate_limiter: RateLimiter | None,
+) -> list[TickerFetchResult]:
+    async with _async_client(len(categories)) as client:
+        return await fetch_market_news_many(
+            client,
+            token,
+            categories,
+            trace_id=trace_id,
+            rate_limiter=rate_limiter,
+        )
+
+
+def _route_market_results(
+    results: list[TickerFetchResult],
+    index: TickerIndex,
+    since: datetime,
+    trace_id: UUID,
+) -> tuple[list[TickerFetchResult], set[str]]:
+    """Keep only items related to tracked tickers; returns the routed results and covered tickers."""
+    logger = logging.getLogger(__name__)
+    routed_results: list[TickerFetchResult] = []
+    covered: set[str] = set()
+    for result in results:
+        if result.error is not None:
+            routed_results.append(result)
+            continue
+        routed = route_items(
+            result.items,
+            index,
+            since=since,
+            published_at=lambda item: _parse_finnhub_timestamp(item.get("datetime")),
+        )
+        covered.update(routed.by_ticker)
+        logger.info(
+            "finnhub_market_routed trace_id=%s category=%s items=%s routed=%s unrouted=%s tickers=%s",
+            trace_id,
+            result.symbol,
+            len(result.items),
+            len(routed.items),
+            routed.unrouted,
+            len(routed.by_ticker),
+        )
+        routed_results.append(
+            TickerFetchResult(symbol=result.symbol, items=routed.items, status_code=result.status_code)
+        )
+    return routed_results, covered
+
+
+def _fetch_stage(
+    args: argparse.Namespace,
+    conn,
+    token: str,
+    tickers: list[str],
+    trace_id: UUID,
+    now_utc: datetime,
+    date_from: str,
+    date_to: str,
+    nyc_tz: ZoneInfo,
+    max_per_ticker_day: int,
+    *,
+    all_tickers: list[str] | None = None,
+) -> FetchSummary:
+    logger = logging.getLogger(__name__)
+    summary = FetchSummary()
+    # The /news categories are the same for every shard, so only shard 0 pulls them and routes
+    # items to every tracked ticker (``all_tickers``), not just the ones it owns.
+    fetch_market = args.market_news and args.shard_index == 0
+    market_keys = [f"market:{category}" for category in args.market_news_categories] if fetch_market else []
+    watermarks: dict[str, TickerWatermark] = {}
+    if not args.ignore_watermarks:
+        watermarks = load_watermarks(conn, "finnhub", tickers + market_keys)
+
+    with _rate_limiter(args) as rate_limiter:
+        min_interval_seconds = args.min_fetch_interval_seconds
+        if fetch_market:
+            market_results, covered = _route_market_results(
+                asyncio.run(_fetch_market(token, args.market_news_categories, trace_id, rate_limiter)),
+                TickerIndex(all_tickers or tickers),
+                now_utc - timedelta(minutes=args.minutes_back),
+                trace_id,
+            )
+            # Market items are routed and deduped already; the per-day cap is for per-ticker feeds.
+            _stage_results(conn, market_results, watermarks, trace_id, now_utc, nyc_tz, 0, summary)
+            summary.tickers_covered = len(covered)
+            tickers = [symbol for symbol in tickers if symbol not in covered]
+        if args.market_news:
+            # Covered names get their news from shard 0's market feed and uncovered ones are
+            # quiet by definition; poll them per ticker far less often.
+            min_interval_seconds = max(min_interval_seconds, args.market_fallback_minutes * 60)
+
+        if not args.ignore_watermarks:
+            fresh_after = now_utc - timedelta(seconds=min_interval_seconds)
+            due = [
+                symbol
+                for symbol in tickers
+                if symbol not in watermarks
+                or watermarks[symbol].last_fetched_at is None
+                or watermarks[symbol].last_fetched_at <= fresh_after
+            ]
+            summary.tickers_skipped = len(tickers) - len(due)
+            if summary.tickers_skipped:
+                logger.info(
+                    "finnhub_tickers_skipped_recent trace_id=%s count=%s min_interval_seconds=%s",
+                    trace_id,
+                    summary.tickers_skipped,
+                    min_interval_seconds,
+                )
+            tickers = due
+
+        results = asyncio.run(
+            _fetch_tickers(
+                token,
+                tickers,
+                date_from,
+                date_to,
+                args.fetch_concurrency,
+                trace_id,
+                rate_limiter,
+            )
+        )
+    _stage_results(conn, results, watermarks, trace_id, now_utc, nyc_tz, max_per_ticker_day, summary)
+    return summary
+
+
+def _stage_results(
+    conn,
+    results: list[TickerFetchResult],
+    watermarks: dict[str, TickerWatermark],
+    trace_id: UUID,
+    now_utc: datetime,
+    nyc_tz: ZoneInfo,
+    max_per_ticker_day: int,
+    summary: FetchSummary,
+) -> dict[str, int]:
+    """Limit, watermark-filter and stage fetched items; returns new items per fetched ticker."""
+    logger = logging.getLogger(__name__)
+    raw_items: list[dict] = []
+    new_watermarks: list[TickerWatermark] = []
+    new_counts: dict[str, int] = {}
+    for result in results:
+        if result.error is not None:
+            logger.error(
+                "finnhub_fetch_failed trace_id=%s ticker=%s error=%s",
+                trace_id,
+                result.symbol,
+                result.error,
+            )
+            continue
+        limited_items, dropped = _limit_items_per_day(result.items, max_per_ticker_day, nyc_tz)
+        if dropped:
+            logger.info(
+                "finnhub_limit_applied trace_id=%s ticker=%s limit=%s dropped=%s",
+                trace_id,
+                result.symbol,
+                max_per_ticker_day,
+                dropped,
+            )
+        summary.fetched += len(limited_items)
+        previous = watermarks.get(result.symbol)
+        new_items, stale, newest = _filter_new_items(
+            limited_items,
+            previous.last_published_at if previous else None,
+        )
+        summary.watermark_dropped += stale
+        new_counts[result.symbol] = len(new_items)
+        new_watermarks.append(
+            TickerWatermark(
+                ticker=result.symbol,
+                last_published_at=newest,
+                last_fetched_at=now_utc,
+            )
+        )
+        raw_items.extend(new_items)
+
+    inserted, changed, unchanged = insert_raw_items(
+        conn,
+        "finnhub",
+        trace_id,
+        now_utc,
+        raw_items,
+    )
+    summary.raw_inserted += inserted
+    summary.raw_changed += changed
+    summary.raw_unchanged += unchanged
+    # Advance the marks only after the items they cover are committed.
+    save_watermarks(conn, "finnhub", new_watermarks)
+    for mark in new_watermarks:
+        previous = watermarks.get(mark.ticker)
+        if previous and previous.last_published_at and (
+            mark.last_published_at is None or previous.last_published_at > mark.last_published_at
+        ):
+            mark = TickerWatermark(mark.ticker, previous.last_published_at, mark.last_fetched_at)
+        watermarks[mark.ticker] = mark
+    return new_counts
+
+
+def _backfill_stage(
+    args: argparse.Namespace,
+    conn,
+    token: str,
+    tickers: list[str],
+    trace_id: UUID,
+    nyc_tz: ZoneInfo,
+    max_per_ticker_day: int,
+) -> FetchSummary:
+    logger = logging.getLogger(__name__)
+    start = args.backfill_from
+    end = args.backfill_to or datetime.now(nyc_tz).date()
+    name = args.backfill_name or f"finnhub:{start.isoformat()}:{end.isoformat()}"
+    seeded = seed_units(conn, name, plan_units(tickers, start, end))
+    # Other shards seed their own tickers under the same name; leave their units to them.
+    units = load_pending_units(conn, name, max_attempts=3, tickers=tickers)
+    logger.info(
+        "backfill_start trace_id=%s backfill=%s start=%s end=%s seeded=%s pending=%s",
+        trace_id,
+        name,
+        start,
+        end,
+        seeded,
+        len(units),
+    )
+
+    def _limit(items: list[dict]) -> list[dict]:
+        return _limit_items_per_day(items, max_per_ticker_day, nyc_tz)[0]
+
+    async def _run(rate_limiter: RateLimiter | None):
+        async with _async_client(args.fetch_concurrency) as client:
+            return await run_backfill(
+                conn,
+                client,
+                token,
+                name,
+                units,
+                trace_id=trace_id,
+                concurrency=args.fetch_concurrency,
+                rate_limiter=rate_limiter,
+                limit_items=_limit,
+            )
+
+    with _rate_limiter(args) as rate_limiter:
+        stats = asyncio.run(_run(rate_limiter))
+    logger.info(
+        "backfill_done trace_id=%s backfill=%s units_done=%s units_failed=%s",
+        trace_id,
+        name,
+        stats.units_done,
+        stats.units_failed,
+    )
+    return FetchSummary(
+        fetched=stats.items_fetched,
+        raw_inserted=stats.raw_inserted,
+        raw_changed=stats.raw_changed,
+        raw_unchanged=stats.raw_unchanged,
+    )
+
+
+def _load_ticker_velocities(conn, hours: int = 24) -> dict[str, float]:
+    """Recent items per second for each ticker, used to seed the daemon's poll schedule."""
+    sql = (
+        "SELECT ticker, COUNT(*) "
+        "FROM news_events, UNNEST(tickers) AS ticker "
+        "WHERE published_at > NOW() - (%s || ' hours')::interval "
+        "GROUP BY ticker"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (hours,))
+        rows = cursor.fetchall()
+    conn.commit()
+    return {row[0]: row[1] / (hours * 3600.0) for row in rows}
+
+
+async def _daemon_cycle(
+    args: argparse.Namespace,
+    conn,
+    client: httpx.AsyncClient,
+    token: str,
+    due: list[str],
+    scheduler: AdaptivePollScheduler,
+    watermarks: dict[str, TickerWatermark],
+    rate_limiter: RateLimiter | None,
+    job_queue: JobQueue | None,
+) -> None:
+    logger = logging.getLogger(__name__)
+    trace_id = uuid4()
+    nyc_tz = ZoneInfo("America/New_York")
+    now_utc = datetime.now(timezone.utc)
+    now_nyc = now_utc.astimezone(nyc_tz)
+    date_from = (now_nyc - timedelta(minutes=args.minutes_back)).date().isoformat()
+    date_to = now_nyc.date().isoformat()
+
+    results = await fetch_company_news_many(
+        client,
+        token,
+        due,
+        date_from,
+        date_to,
+        concurrency=args.fetch_concurrency,
+        trace_id=trace_id,
+        rate_limiter=rate_limiter,
+    )
+    summary = FetchSummary()
+    new_counts = _stage_results(conn, results, watermarks, trace_id, now_utc, nyc_tz, 50, summary)
+    for result in results:
+        if result.symbol in new_counts:
+            scheduler.record(result.symbol, new_counts[result.symbol])
+        else:
+            scheduler.record_failure(result.symbol)
+
+    raw_rows = select_raw_items(conn, "finnhub", args.process_limit)
+    stats = normalize_raw_rows(
+        conn,
+        raw_rows,
+        trace_id,
+        datetime.now(timezone.utc),
+        chunk_size=args.normalize_batch_size,
+        near_dedup=_near_dedup(args),
+        job_queue=job_queue,
+    )
+    logger.info(
+        "daemon_cycle trace_id=%s polled=%s fetched_count=%s raw_inserted_count=%s "
+        "raw_changed_count=%s normalized_ok_count=%s normalized_failed_count=%s "
+        "jobs_enqueued_count=%s next_poll_seconds=%.1f",
+        trace_id,
+        len(due),
+        summary.fetched,
+        summary.raw_inserted,
+        summary.raw_changed,
+        stats.normalized_ok,
+        stats.normalized_failed,
+        stats.jobs_enqueued,
+        scheduler.seconds_until_next(),
+    )
+
+
+async def _daemon_loop(args: argparse.Namespace, token: str, requested: list[str] | None) -> None:
+    logger = logging.getLogger(__name__)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    scheduler = AdaptivePollScheduler(
+        min_interval=args.poll_min_seconds,
+        max_interval=args.poll_max_seconds,
+        target_items=args.poll_target_items,
+    )
+    watermarks: dict[str, TickerWatermark] = {}
+    next_refresh = 0.0
+    # Connections and the HTTP client stay open for the daemon's lifetime.
+    conn = connect()
+    job_queue = _job_queue(args.queue_backend, args.redis_url)
+    try:
+        with _rate_limiter(args) as rate_limiter:
+            async with _async_client(args.fetch_concurrency) as client:
+                while not stop.is_set():
+                    if time.monotonic() >= next_refresh:
+                        tickers = _shard(args, _fetch_ticker_symbols(conn, requested))
+                        conn.commit()
+                        scheduler.sync(tickers, _load_ticker_velocities(conn))
+                        watermarks = load_watermarks(conn, "finnhub", tickers)
+                        conn.commit()
+                        next_refresh = time.monotonic() + args.ticker_refresh_seconds
+                        logger.info("daemon_tickers_refreshed count=%s", len(scheduler))
+
+                    due = scheduler.pop_due()
+                    if due:
+                        try:
+                            await _daemon_cycle(
+                                args, conn, client, token, due, scheduler, watermarks, rate_limiter, job_queue
+                            )
+                        except psycopg2.Error as exc:
+                            conn.rollback()
+                            logger.error("daemon_cycle_failed error=%s", exc)
+                            for symbol in due:
+                                scheduler.record_failure(symbol)
+
+                    wait_seconds = min(
+                        scheduler.seconds_until_next(),
+                        max(next_refresh - time.monotonic(), 0.0),
+                    )
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=max(wait_seconds, 0.1))
+                    except asyncio.TimeoutError:
+                        pass
+    finally:
+        if job_queue is not None:
+            job_queue.close()
+        conn.close()
+    logger.info("daemon_shutdown")
+
+
+def _near_dedup(args: argparse.Namespace) -> NearDedupConfig | None:
+    if not args.near_dedup:
+        return None
+    return NearDedupConfig(threshold=args.near_dedup_threshold, window_hours=args.near_dedup_window_hours)
+
+
+def _job_queue(backend: str, redis_url: str) -> JobQueue | None:
+    """Queue that LLM jobs are published to; None publishes ``analysis_jobs`` rows in the
+    normalization transaction, as before."""
+    if backend == "postgres":
+        return None
+    return create_queue(
+        backend,
+        connect=connect,
+        max_attempts=int(os.getenv("WORKER_MAX_ATTEMPTS", "3")),
+        redis_url=redis_url,
+    )
+
+
+def _replay_worker(
+    trace_id: UUID,
+    chunk_size: int,
+    near_dedup: NearDedupConfig | None,
+    queue_backend: str,
+    redis_url: str,
+) -> NormalizeStats:
+    _configure_logging()
+    conn = connect()
+    job_queue = _job_queue(queue_backend, redis_url)
+    try:
+        return drain_raw_items(
+            conn,
+            "finnhub",
+            trace_id,
+            datetime.now(timezone.utc),
+            chunk_size=chunk_size,
+            near_dedup=near_dedup,
+            job_queue=job_queue,
+        )
+    finally:
+        if job_queue is not None:
+            job_queue.close()
+        conn.close()
+
+
+def _replay_parallel(
+    workers: int,
+    trace_id: UUID,
+    chunk_size: int,
+    near_dedup: NearDedupConfig | None,
+    queue_backend: str,
+    redis_url: str,
+) -> NormalizeStats:
+    # spawn, not fork: children must not inherit the parent's open DB sockets. Each child
+    # opens its own job queue client, so only the backend name and URL are passed.
+    context = multiprocessing.get_context("spawn")
+    stats = NormalizeStats()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [
+            executor.submit(_replay_worker, trace_id, chunk_size, near_dedup, queue_backend, redis_url)
+            for _ in range(workers)
+        ]
+        for future in futures:
+            stats.add(future.result())
+    return stats
+
+
+def _replay_stream(args: argparse.Namespace, trace_id: UUID) -> NormalizeStats:
+    read_conn = connect()
+    write_conn = connect()
+    job_queue = _job_queue(args.queue_backend, args.redis_url)
+    try:
+        if args.reset_checkpoint:
+            delete_checkpoint(write_conn, args.checkpoint)
+        return stream_normalize(
+            read_conn,
+            write_conn,
+            "finnhub",
+            trace_id,
+            datetime.now(timezone.utc),
+            checkpoint_name=args.checkpoint,
+            chunk_size=args.normalize_batch_size,
+            near_dedup=_near_dedup(args),
+            job_queue=job_queue,
+        )
+    finally:
+        if job_queue is not None:
+            job_queue.close()
+        read_conn.close()
+        write_conn.close()
+
+
 def main() -> int:
     _configure_logging()
+    load_dotenv()
     args = _parse_args()
     logger = logging.getLogger(__name__)
 
-    load_dotenv()
-
     trace_id = uuid4()
 
     token = os.getenv("FINNHUB_TOKEN")
@@ -192,109 +918,106 @@ def main() -> int:
     if args.tickers:
         requested = [ticker.strip().upper() for ticker in args.tickers if ticker.strip()]
 
-    fetched_count = 0
-    raw_inserted_count = 0
-    raw_updated_count = 0
+    if args.daemon:
+        asyncio.run(_daemon_loop(args, token, requested))
+        return 0
+
+    fetch_summary = FetchSummary()
     max_per_ticker_day = 50
 
-    with _connect_db() as conn:
+    with pooled_connection() as conn:
         if not args.replay_only:
             tickers = _fetch_ticker_symbols(conn, requested)
             if requested:
                 missing = sorted(set(requested) - set(tickers))
                 for symbol in missing:
                     logger.warning("ticker_not_in_db trace_id=%s symbol=%s", trace_id, symbol)
+            all_tickers = tickers
+            tickers = _shard(args, tickers)
             if not tickers:
                 logger.info("no_tickers_found trace_id=%s", trace_id)
                 return 0
 
-            timeout = httpx.Timeout(10.0, connect=5.0)
-            with httpx.Client(timeout=timeout) as client:
-                raw_items: list[dict] = []
-                for symbol in tickers:
-                    try:
-                        items, _status = fetch_company_news(
-                            client,
-                            token,
-                            symbol,
-                            date_from,
-                            date_to,
-                            trace_id=trace_id,
-                        )
-                    except FinnhubError as exc:
-                        logger.error(
-                            "finnhub_fetch_failed trace_id=%s ticker=%s error=%s",
-                            trace_id,
-                            symbol,
-                            exc,
-                        )
-                        continue
-                    limited_items, dropped = _limit_items_per_day(items, max_per_ticker_day, nyc_tz)
-                    if dropped:
-                        logger.info(
-                            "finnhub_limit_applied trace_id=%s ticker=%s limit=%s dropped=%s",
-                            trace_id,
-                            symbol,
-                            max_per_ticker_day,
-                            dropped,
-                        )
-                    raw_items.extend(limited_items)
-
-                fetched_count = len(raw_items)
-                raw_inserted_count, raw_updated_count = insert_raw_items(
+            if args.backfill_from:
+                fetch_summary = _backfill_stage(args, conn, token, tickers, trace_id, nyc_tz, max_per_ticker_day)
+            else:
+                fetch_summary = _fetch_stage(
+                    args,
                     conn,
-                    "finnhub",
+                    token,
+                    tickers,
                     trace_id,
                     now_utc,
-                    raw_items,
+                    date_from,
+                    date_to,
+                    nyc_tz,
+                    max_per_ticker_day,
+                    all_tickers=all_tickers,
                 )
 
-        raw_rows = select_raw_items(conn, "finnhub", args.process_limit)
-
-    to_process_count = len(raw_rows)
-    normalized_ok_count = 0
-    normalized_failed_count = 0
-    news_inserted_count = 0
-    jobs_enqueued_count = 0
-    jobs_skipped_count = 0
-
-    ingested_at = datetime.now(timezone.utc)
-    with _connect_db() as conn:
-        for raw_row in raw_rows:
-            try:
-                event = normalize_finnhub(raw_row.raw_payload, trace_id, ingested_at)
-                event_id, inserted = upsert_news_event(conn, event)
-                if inserted:
-                    news_inserted_count += 1
-                job_inserted = publish_job(conn, event_id, trace_id)
-                if job_inserted:
-                    jobs_enqueued_count += 1
-                else:
-                    jobs_skipped_count += 1
-                mark_raw_normalized(conn, raw_row.id)
-                normalized_ok_count += 1
-            except NormalizationError as exc:
-                mark_raw_failed(conn, raw_row.id, str(exc))
-                normalized_failed_count += 1
-            except Exception as exc:  # noqa: BLE001
-                mark_raw_failed(conn, raw_row.id, f"unexpected_error: {exc}")
-                normalized_failed_count += 1
+        raw_rows = []
+        if args.workers <= 1 and not args.stream:
+            raw_rows = select_raw_items(conn, "finnhub", args.process_limit)
+
+    if args.stream:
+        stats = _replay_stream(args, trace_id)
+        to_process_count = stats.normalized_ok + stats.normalized_failed
+    elif args.workers > 1:
+        logger.info(
+            "replay_parallel_start trace_id=%s workers=%s chunk_size=%s",
+            trace_id,
+            args.workers,
+            args.normalize_batch_size,
+        )
+        stats = _replay_parallel(
+            args.workers,
+            trace_id,
+            args.normalize_batch_size,
+            _near_dedup(args),
+            args.queue_backend,
+            args.redis_url,
+        )
+        to_process_count = stats.normalized_ok + stats.normalized_failed
+    else:
+        to_process_count = len(raw_rows)
+        ingested_at = datetime.now(timezone.utc)
+        job_queue = _job_queue(args.queue_backend, args.redis_url)
+        try:
+            with pooled_connection() as conn:
+                stats = normalize_raw_rows(
+                    conn,
+                    raw_rows,
+                    trace_id,
+                    ingested_at,
+                    chunk_size=args.normalize_batch_size,
+                    near_dedup=_near_dedup(args),
+                    job_queue=job_queue,
+                )
+        finally:
+            if job_queue is not None:
+                job_queue.close()
 
     logger.info(
         "finnhub_run_summary trace_id=%s fetched_count=%s raw_inserted_count=%s "
-        "raw_updated_count=%s to_process_count=%s normalized_ok_count=%s "
+        "raw_changed_count=%s raw_unchanged_count=%s watermark_dropped_count=%s tickers_skipped_count=%s "
+        "tickers_covered_count=%s to_process_count=%s normalized_ok_count=%s "
         "normalized_failed_count=%s news_inserted_count=%s jobs_enqueued_count=%s "
-        "jobs_skipped_count=%s",
+        "jobs_skipped_count=%s near_duplicate_count=%s",
         trace_id,
-        fetched_count,
-        raw_inserted_count,
-        raw_updated_count,
+        fetch_summary.fetched,
+        fetch_summary.raw_inserted,
+        fetch_summary.raw_changed,
+        fetch_summary.raw_unchanged,
+        fetch_summary.watermark_dropped,
+        fetch_summary.tickers_skipped,
+        fetch_summary.tickers_covered,
         to_process_count,
-        normalized_ok_count,
-        normalized_failed_count,
-        news_inserted_count,
-        jobs_enqueued_count,
-        jobs_skipped_count,
+        stats.normalized_ok,
+        stats.normalized_failed,
+        stats.news_inserted,
+        stats.jobs_enqueued,
+        stats.jobs_skipped,
+        stats.near_duplicates,
     )
     return 0
 
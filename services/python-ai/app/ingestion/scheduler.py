@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+
+@dataclass
+class _TickerState:
+    velocity: float | None
+    interval: float
+    due_at: float
+    last_polled_at: float | None = None
+
+
+class AdaptivePollScheduler:
+    """Schedules per-ticker polls from each ticker's observed news velocity.
+
+    Velocity (new items per second) is an exponentially weighted average of what each poll
+    found. The next poll is planned for when ``target_items`` new items are expected, clamped
+    to ``[min_interval, max_interval]``: busy tickers are polled often, quiet ones rarely.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_interval: float,
+        max_interval: float,
+        target_items: float = 1.0,
+        smoothing: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("intervals must satisfy 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_items = target_items
+        self.smoothing = smoothing
+        self._clock = clock
+        self._states: dict[str, _TickerState] = {}
+        self._heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @property
+    def symbols(self) -> set[str]:
+        return set(self._states)
+
+    def _interval_for(self, velocity: float | None) -> float:
+        if not velocity:
+            return self.max_interval if velocity == 0 else self.min_interval
+        return min(self.max_interval, max(self.min_interval, self.target_items / velocity))
+
+    def _schedule(self, symbol: str, due_at: float) -> None:
+        self._states[symbol].due_at = due_at
+        heapq.heappush(self._heap, (due_at, symbol))
+
+    def add(self, symbol: str, *, velocity: float | None = None) -> None:
+        """Register a ticker; it is due immediately. ``velocity`` seeds the estimate (items/s)."""
+        if symbol in self._states:
+            return
+        self._states[symbol] = _TickerState(velocity=velocity, interval=self._interval_for(velocity), due_at=0.0)
+        self._schedule(symbol, self._clock())
+
+    def remove(self, symbol: str) -> None:
+        # Heap entries for removed tickers are discarded lazily in pop_due.
+        self._states.pop(symbol, None)
+
+    def sync(self, symbols: Iterable[str], velocities: dict[str, float] | None = None) -> None:
+        wanted = set(symbols)
+        for symbol in self.symbols - wanted:
+            self.remove(symbol)
+        for symbol in wanted - self.symbols:
+            self.add(symbol, velocity=(velocities or {}).get(symbol))
+
+    def pop_due(self, limit: int | None = None) -> list[str]:
+        now = self._clock()
+        due: list[str] = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(due) < limit):
+            due_at, symbol = heapq.heappop(self._heap)
+            state = self._states.get(symbol)
+            if state is None or state.due_at != due_at:
+                continue
+            due.append(symbol)
+        return due
+
+    def seconds_until_next(self) -> float:
+        while self._heap:
+            due_at, symbol = self._heap[0]
+            state = self._states.get(symbol)
+            if state is None or state.due_at != due_at:
+                heapq.heappop(self._heap)
+                continue
+            return max(due_at - self._clock(), 0.0)
+        return self.max_interval
+
+    def record(self, symbol: str, new_items: int) -> float:
+        """Fold a successful poll into the velocity estimate and schedule the next one."""
+        state = self._states.get(symbol)
+        if state is None:
+            return 0.0
+        now = self._clock()
+        elapsed = now - state.last_polled_at if state.last_polled_at is not None else state.interval
+        observed = new_items / max(elapsed, 1e-6)
+        if state.velocity is None:
+            state.velocity = observed
+        else:
+            state.velocity = self.smoothing * observed + (1 - self.smoothing) * state.velocity
+        state.last_polled_at = now
+        state.interval = self._interval_for(state.velocity)
+        self._schedule(symbol, now + state.interval)
+        return state.interval
+
+    def record_failure(self, symbol: str) -> float:
+        """Retry a failed poll after the ticker's current interval without touching its velocity."""
+        state = self._states.get(symbol)
+        if state is None:
+            return 0.0
+        self._schedule(symbol, self._clock() + state.interval)
+        return state.interval
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+from typing import Iterable
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Adding or removing a node only moves the keys in the ring segments that node owns,
+    roughly ``1 / len(nodes)`` of them, instead of reshuffling every key.
+    """
+
+    def __init__(self, nodes: Iterable[str], *, replicas: int = 64) -> None:
+        if replicas <= 0:
+            raise ValueError("replicas must be positive")
+        self.replicas = replicas
+        self._nodes: set[str] = set()
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> set[str]:
+        return set(self._nodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise ValueError("hash ring has no nodes")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+def shard_name(shard_index: int) -> str:
+    return f"shard-{shard_index}"
+
+
+def shard_tickers(tickers: Iterable[str], shard_index: int, shard_count: int) -> list[str]:
+    """Tickers owned by ``shard_index`` out of ``shard_count`` shards, in input order."""
+    if shard_count <= 0 or not 0 <= shard_index < shard_count:
+        raise ValueError("shard_index must be in [0, shard_count)")
+    symbols = list(tickers)
+    if shard_count == 1:
+        return symbols
+    ring = HashRing(shard_name(index) for index in range(shard_count))
+    owner = shard_name(shard_index)
+    return [symbol for symbol in symbols if ring.node_for(symbol) == owner]
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 
@@ -14,10 +16,34 @@ TRACKING_PARAMS = {
     "cmpid",
 }
 
+# Bounded so a long-running process does not grow without limit; a few hours of news fit.
+URL_CACHE_SIZE = 65536
 
-def canonicalize_url(url: str) -> str:
-    if url is None:
-        raise ValueError("url is required")
+# Characters that make urlsplit/urlunsplit rewrite a URL, or that need the full parse.
+_SLOW_PATH_CHARS = frozenset("?#@[] \t\r\n")
+
+
+@dataclass(frozen=True)
+class CanonicalUrl:
+    source: str
+    url: str
+    news_id: str
+
+
+def _is_canonical(url: str) -> bool:
+    """Cheap check for URLs that canonicalization would return unchanged."""
+    scheme, sep, rest = url.partition("://")
+    if not sep or not scheme.isalpha() or not scheme.islower():
+        return False
+    if url[-1].isspace() or any(char in _SLOW_PATH_CHARS for char in url):
+        return False
+    host, slash, path = rest.partition("/")
+    if not host or ":" in host or host != host.lower() or not slash:
+        return False
+    return path == "" or not path.endswith("/")
+
+
+def _canonicalize(url: str) -> str:
     raw = url.strip()
     if not raw:
         raise ValueError("url is required")
@@ -55,7 +81,36 @@ def canonicalize_url(url: str) -> str:
     return urlunsplit((scheme, netloc, path, query, ""))
 
 
-def generate_news_id(source: str, url: str) -> str:
-    canonical_url = canonicalize_url(url)
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _canonicalize_cached(url: str) -> str:
+    if _is_canonical(url):
+        return url
+    return _canonicalize(url)
+
+
+def canonicalize_url(url: str) -> str:
+    if url is None:
+        raise ValueError("url is required")
+    return _canonicalize_cached(url)
+
+
+def _news_id(source: str, canonical_url: str) -> str:
     raw = f"{source}|{canonical_url}"
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def resolve_url(source: str, url: str) -> CanonicalUrl:
+    """Canonical URL and ``news_id`` for one item, parsed and hashed once per (source, url)."""
+    canonical_url = canonicalize_url(url)
+    # news_id has always been generate_news_id(source, canonical_url). Canonicalizing again is
+    # a fast-path no-op for real URLs and keeps ids stable for the odd malformed one.
+    return CanonicalUrl(
+        source=source,
+        url=canonical_url,
+        news_id=_news_id(source, canonicalize_url(canonical_url)),
+    )
+
+
+def generate_news_id(source: str, url: str) -> str:
+    return _news_id(source, canonicalize_url(url))
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable
+
+from psycopg2.extras import execute_values
+
+
+@dataclass(frozen=True)
+class TickerWatermark:
+    ticker: str
+    last_published_at: datetime | None
+    last_fetched_at: datetime | None
+
+
+def load_watermarks(conn, source: str, tickers: list[str]) -> dict[str, TickerWatermark]:
+    if not tickers:
+        return {}
+    sql = (
+        "SELECT ticker, last_published_at, last_fetched_at "
+        "FROM ingestion_watermarks "
+        "WHERE source = %s AND ticker = ANY(%s)"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (source, tickers))
+        rows = cursor.fetchall()
+    return {
+        row[0]: TickerWatermark(ticker=row[0], last_published_at=row[1], last_fetched_at=row[2])
+        for row in rows
+    }
+
+
+def save_watermarks(conn, source: str, watermarks: Iterable[TickerWatermark]) -> int:
+    rows = [
+        (source, mark.ticker, mark.last_published_at, mark.last_fetched_at)
+        for mark in watermarks
+    ]
+    if not rows:
+        return 0
+    # GREATEST ignores NULLs, so a fetch that returned nothing never moves the mark backwards.
+    sql = (
+        "INSERT INTO ingestion_watermarks (source, ticker, last_published_at, last_fetched_at) "
+        "VALUES %s "
+        "ON CONFLICT (source, ticker) DO UPDATE SET "
+        "last_published_at = GREATEST(ingestion_watermarks.last_published_at, EXCLUDED.last_published_at), "
+        "last_fetched_at = GREATEST(ingestion_watermarks.last_fetched_at, EXCLUDED.last_fetched_at), "
+        "updated_at = NOW()"
+    )
+    with conn.cursor() as cursor:
+        execute_values(cursor, sql, rows)
+    conn.commit()
+    return len(rows)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import time
+from datetime import date, datetime, timezone
+
+from db import connect
+
+HISTORY_TABLE = "analysis_jobs_history"
+_PARTITION_PREFIX = f"{HISTORY_TABLE}_"
+_JOB_COLUMNS = (
+    "id, job_uuid, news_event_id, trace_id, job_type, status, attempts, priority, "
+    "published_at, run_after, locked_at, locked_by, last_error, created_at, updated_at"
+)
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def months_before(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 - count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{_PARTITION_PREFIX}{month:%Y%m}"
+
+
+def parse_partition_month(name: str) -> date | None:
+    suffix = name[len(_PARTITION_PREFIX):] if name.startswith(_PARTITION_PREFIX) else ""
+    if len(suffix) != 6 or not suffix.isdigit():
+        return None
+    year, month = int(suffix[:4]), int(suffix[4:])
+    if not 1 <= month <= 12:
+        return None
+    return date(year, month, 1)
+
+
+def months_between(first: date | datetime, last: date | datetime) -> list[date]:
+    """Month starts from ``first``'s month through ``last``'s month, inclusive."""
+    months = []
+    month, final = month_start(first), month_start(last)
+    while month <= final:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def _month_bound(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def ensure_partitions(conn, months: list[date]) -> None:
+    """Create the monthly history partitions for ``months`` if missing; the caller commits."""
+    with conn.cursor() as cursor:
+        for month in months:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {HISTORY_TABLE} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                (_month_bound(month), _month_bound(next_month(month))),
+            )
+
+
+def archive_finished_jobs(conn, older_than_seconds: int, batch_size: int) -> int:
+    """Move up to ``batch_size`` done/failed jobs into ``analysis_jobs_history``; commits.
+
+    Only jobs finished more than ``older_than_seconds`` ago move, so recent results stay
+    queryable in ``analysis_jobs``. The delete and the insert are a single statement, so a
+    job is never in both tables or in neither.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT MIN(updated_at), MAX(updated_at) FROM analysis_jobs "
+            "WHERE status IN ('done', 'failed') "
+            "AND updated_at < NOW() - (%s || ' seconds')::interval",
+            (older_than_seconds,),
+        )
+        first, last = cursor.fetchone()
+    if first is None:
+        conn.commit()
+        return 0
+    ensure_partitions(conn, months_between(first, last))
+    sql = (
+        "WITH moved AS ("
+        "  DELETE FROM analysis_jobs WHERE id IN ("
+        "    SELECT id FROM analysis_jobs "
+        "    WHERE status IN ('done', 'failed') "
+        "      AND updated_at < NOW() - (%s || ' seconds')::interval "
+        "    ORDER BY updated_at "
+        "    LIMIT %s "
+        "    FOR UPDATE SKIP LOCKED"
+        f"  ) RETURNING {_JOB_COLUMNS}"
+        ") "
+        f"INSERT INTO {HISTORY_TABLE} ({_JOB_COLUMNS}, finished_at) "
+        f"SELECT {_JOB_COLUMNS}, updated_at FROM moved"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (older_than_seconds, batch_size))
+        moved = cursor.rowcount
+    conn.commit()
+    return moved
+
+
+def drop_expired_partitions(conn, retention_months: int, today: date | None = None) -> list[str]:
+    """Drop history partitions that ended more than ``retention_months`` ago; commits."""
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = months_before(month_start(today), retention_months)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            (HISTORY_TABLE,),
+        )
+        names = [row[0] for row in cursor.fetchall()]
+        dropped = []
+        for name in sorted(names):
+            month = parse_partition_month(name)
+            if month is not None and next_month(month) <= cutoff:
+                cursor.execute(f"DROP TABLE IF EXISTS {name}")
+                dropped.append(name)
+    conn.commit()
+    return dropped
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Archive finished analysis jobs")
+    parser.add_argument(
+        "--older-than-hours",
+        type=float,
+        default=float(os.getenv("JOB_ARCHIVE_AFTER_HOURS", "24")),
+        help="Archive done/failed jobs finished at least this long ago",
+    )
+    parser.add_argument("--batch-size", type=int, default=5000, help="Jobs moved per transaction")
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=int(os.getenv("JOB_HISTORY_RETENTION_MONTHS", "12")),
+        help="Drop history partitions older than this many months (0 keeps everything)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.0,
+        help="Repeat every N seconds instead of running once",
+    )
+    return parser.parse_args()
+
+
+def _archive_once(conn, args: argparse.Namespace, logger: logging.Logger) -> None:
+    older_than_seconds = int(args.older_than_hours * 3600)
+    total = 0
+    while True:
+        moved = archive_finished_jobs(conn, older_than_seconds, args.batch_size)
+        total += moved
+        if moved < args.batch_size:
+            break
+    dropped = drop_expired_partitions(conn, args.retention_months) if args.retention_months > 0 else []
+    logger.info("job_archive_done archived=%s dropped_partitions=%s", total, ",".join(dropped) or "-")
+
+
+def main() -> int:
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    args = _parse_args()
+    logger = logging.getLogger(__name__)
+
+    running = {"value": True}
+
+    def _handle_shutdown(signum, _frame):  # noqa: ANN001
+        logger.info("job_archive_shutdown signal=%s", signum)
+        running["value"] = False
+
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    signal.signal(signal.SIGINT, _handle_shutdown)
+
+    conn = connect()
+    try:
+        while running["value"]:
+            _archive_once(conn, args, logger)
+            if args.interval <= 0:
+                break
+            deadline = time.monotonic() + args.interval
+            while running["value"] and time.monotonic() < deadline:
+                time.sleep(min(1.0, deadline - time.monotonic()))
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable
+
+from psycopg2.extras import execute_values
+
+# Near-duplicate clusters (``news_events.cluster_id``, assigned by ingestion.dedup) share one
+# analysis: only the representative (``cluster_id = id``) gets a job, and members copy its
+# result. Ingestion and the worker both use these, so they live with the job code rather
+# than in either side.
+
+
+def load_clusters(conn, event_ids: Iterable[int]) -> dict[int, int]:
+    """Stored ``{event_id: cluster_id}``; events never clustered are their own cluster."""
+    ids = list(dict.fromkeys(event_ids))
+    if not ids:
+        return {}
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT id, COALESCE(cluster_id, id) FROM news_events WHERE id = ANY(%s)",
+            (ids,),
+        )
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def cluster_members(conn, representative_id: int) -> list[int]:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT id FROM news_events WHERE cluster_id = %s AND id <> %s ORDER BY id",
+            (representative_id, representative_id),
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def inherit_cluster_analyses(conn, member_ids: Iterable[int]) -> int:
+    """Copy each member's representative's succeeded analyses onto the member; the caller commits.
+
+    Copies point back at their source through ``llm_analyses.inherited_from``. A member's own
+    succeeded analysis is never overwritten. Returns the number of analysis rows written.
+    """
+    ids = list(dict.fromkeys(member_ids))
+    if not ids:
+        return 0
+    sql = (
+        "INSERT INTO llm_analyses (news_event_id, trace_id, provider, model, request, status, "
+        "sentiment, confidence, impact_score, entities, summary, rationale, raw_output, "
+        "inherited_from, created_at, updated_at) "
+        "SELECT m.id, a.trace_id, a.provider, a.model, a.request, a.status, "
+        "a.sentiment, a.confidence, a.impact_score, a.entities, a.summary, a.rationale, a.raw_output, "
+        "a.id, NOW(), NOW() "
+        "FROM news_events m "
+        "JOIN llm_analyses a ON a.news_event_id = m.cluster_id AND a.status = 'succeeded' "
+        "WHERE m.id = ANY(%s) AND m.cluster_id <> m.id "
+        "ON CONFLICT (news_event_id, provider, model) DO UPDATE SET "
+        "trace_id = EXCLUDED.trace_id, request = EXCLUDED.request, status = EXCLUDED.status, "
+        "sentiment = EXCLUDED.sentiment, confidence = EXCLUDED.confidence, "
+        "impact_score = EXCLUDED.impact_score, entities = EXCLUDED.entities, "
+        "summary = EXCLUDED.summary, rationale = EXCLUDED.rationale, "
+        "raw_output = EXCLUDED.raw_output, error_message = NULL, "
+        "inherited_from = EXCLUDED.inherited_from, updated_at = NOW() "
+        "WHERE llm_analyses.inherited_from IS NOT NULL OR llm_analyses.status <> 'succeeded' "
+        "RETURNING id, inherited_from"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (ids,))
+        copied = cursor.fetchall()
+        if not copied:
+            return 0
+        copy_ids = [row[0] for row in copied]
+        cursor.execute("DELETE FROM analysis_tickers WHERE analysis_id = ANY(%s)", (copy_ids,))
+        execute_values(
+            cursor,
+            "INSERT INTO analysis_tickers (analysis_id, ticker) "
+            "SELECT v.id, t.ticker FROM (VALUES %s) AS v (id, source_id) "
+            "JOIN analysis_tickers t ON t.analysis_id = v.source_id",
+            copied,
+            template="(%s::bigint, %s::bigint)",
+        )
+    return len(copied)
+
+
+def promote_cluster_member(
+    conn,
+    representative_id: int,
+    job_type: str = "llm_analysis",
+) -> tuple[int, datetime, list[str]] | None:
+    """Make the oldest unanalysed member the representative of a failed representative's cluster.
+
+    Call when the representative's job has failed for good; the caller publishes a job for
+    the returned ``(news_event_id, published_at, tickers)`` and commits. The old
+    representative joins the new cluster, so it inherits the new representative's result
+    too. Members that already have their own analysis or job are skipped. Returns None when
+    no member is left to try.
+    """
+    sql = (
+        "WITH next AS ("
+        "  SELECT e.id, e.published_at, e.tickers FROM news_events e "
+        "  WHERE e.cluster_id = %s AND e.id <> %s "
+        "  AND NOT EXISTS ("
+        "    SELECT 1 FROM llm_analyses a WHERE a.news_event_id = e.id AND a.inherited_from IS NULL) "
+        "  AND NOT EXISTS ("
+        "    SELECT 1 FROM published_jobs p WHERE p.news_event_id = e.id AND p.job_type = %s) "
+        "  ORDER BY e.published_at, e.id "
+        "  LIMIT 1"
+        "), "
+        "moved AS ("
+        "  UPDATE news_events e SET cluster_id = next.id FROM next WHERE e.cluster_id = %s "
+        "  RETURNING e.id"
+        ") "
+        "SELECT id, published_at, tickers FROM next"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (representative_id, representative_id, job_type, representative_id))
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return row[0], row[1], list(row[2] or [])
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass
+class _InFlight:
+    job: Any
+    future: Future
+    deadline: float | None
+    expired: bool = False
+
+
+class JobPool:
+    """Runs claimed jobs on a bounded thread pool.
+
+    At most ``concurrency`` jobs are in flight. A job that overruns ``job_timeout`` is
+    reported once by :meth:`expire`. Python threads cannot be interrupted, so the overrunning
+    call keeps its slot (and its job) until it actually returns; handing the job to another
+    worker before then would run it twice.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        *,
+        job_timeout: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if concurrency <= 0:
+            raise ValueError("concurrency must be positive")
+        self.concurrency = concurrency
+        self.job_timeout = job_timeout if job_timeout and job_timeout > 0 else None
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+        self._in_flight: list[_InFlight] = []
+
+    def _reap(self) -> None:
+        self._in_flight = [entry for entry in self._in_flight if not entry.future.done()]
+
+    @property
+    def in_flight(self) -> int:
+        self._reap()
+        return len(self._in_flight)
+
+    def free_slots(self) -> int:
+        return self.concurrency - self.in_flight
+
+    def submit(self, job: Any, func: Callable[[Any], Any]) -> Future:
+        if self.free_slots() <= 0:
+            raise RuntimeError("job pool is full")
+        deadline = self._clock() + self.job_timeout if self.job_timeout else None
+        future = self._executor.submit(func, job)
+        self._in_flight.append(_InFlight(job, future, deadline))
+        return future
+
+    def seconds_until_deadline(self) -> float | None:
+        """Time until the next running job overruns; None when no deadline is pending."""
+        deadlines = [
+            entry.deadline
+            for entry in self._in_flight
+            if entry.deadline is not None and not entry.expired and not entry.future.done()
+        ]
+        if not deadlines:
+            return None
+        return max(min(deadlines) - self._clock(), 0.0)
+
+    def wait(self, timeout: float | None) -> None:
+        """Block until a job finishes, a deadline passes or ``timeout`` elapses."""
+        pending = [entry.future for entry in self._in_flight if not entry.future.done()]
+        if not pending:
+            return
+        until_deadline = self.seconds_until_deadline()
+        if until_deadline is not None:
+            timeout = until_deadline if timeout is None else min(timeout, until_deadline)
+        wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        self._reap()
+
+    def expire(self) -> list[Any]:
+        """Jobs that just passed their deadline and are still running (each reported once)."""
+        now = self._clock()
+        expired = []
+        for entry in self._in_flight:
+            if entry.expired or entry.deadline is None or entry.future.done():
+                continue
+            if now >= entry.deadline:
+                entry.expired = True
+                expired.append(entry.job)
+        return expired
+
+    def drain(self, on_expired: Callable[[Any], None] | None = None) -> None:
+        """Wait for every in-flight job; overruns are reported to ``on_expired`` along the way."""
+        while self.in_flight:
+            self.wait(None)
+            for job in self.expire():
+                if on_expired is not None:
+                    on_expired(job)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from jobs.queue import JobQueue
+
+
+class LeaseHeartbeat:
+    """Background thread that keeps the leases of running jobs alive.
+
+    Every ``interval`` seconds it calls ``queue.extend_leases`` for the jobs registered with
+    :meth:`add` (the Postgres queue bumps ``locked_at`` on a connection of its own). Stuck-job
+    recovery can therefore use a short visibility timeout without re-claiming slow jobs that
+    are still being worked on. A job whose lease could not be extended (recovered by someone
+    else) is dropped and logged.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: str,
+        *,
+        interval: float,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self._queue = queue
+        self.worker_id = worker_id
+        self.interval = interval
+        self._logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._job_ids: set[int] = set()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, job_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._job_ids.update(job_ids)
+
+    def discard(self, job_id: int) -> None:
+        with self._lock:
+            self._job_ids.discard(job_id)
+
+    def held(self) -> set[int]:
+        with self._lock:
+            return set(self._job_ids)
+
+    def beat(self) -> None:
+        """Extend every registered lease once."""
+        job_ids = self.held()
+        if not job_ids:
+            return
+        try:
+            extended = self._queue.extend_leases(job_ids, self.worker_id)
+        except Exception as exc:  # noqa: BLE001
+            # Keep the jobs registered; the next beat retries (the queue reconnects).
+            self._logger.warning("job_lease_heartbeat_failed jobs=%s error=%s", len(job_ids), exc)
+            return
+        # Jobs finished while the heartbeat ran are not "lost".
+        lost = (job_ids - extended) & self.held()
+        if lost:
+            with self._lock:
+                self._job_ids -= lost
+            self._logger.warning("job_lease_lost job_ids=%s", sorted(lost))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.beat()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import logging
+import select
+import time
+from typing import Callable
+
+import psycopg2
+
+CHANNEL = "analysis_jobs"
+
+
+class JobNotifier:
+    """Wakes a worker when ``analysis_jobs`` gets a runnable job.
+
+    Holds a dedicated autocommit connection that ``LISTEN``s on :data:`CHANNEL` (the
+    schema's triggers ``NOTIFY`` it). ``wait`` returns as soon as a notification arrives,
+    or after ``timeout`` seconds so callers still poll as a fallback. A lost connection is
+    reopened on the next ``wait``; until then the worker simply polls.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], object],
+        *,
+        channel: str = CHANNEL,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self._connect = connect
+        self.channel = channel
+        self._logger = logger or logging.getLogger(__name__)
+        self._conn = None
+
+    @property
+    def listening(self) -> bool:
+        return self._conn is not None
+
+    def start(self) -> bool:
+        """Open the connection and LISTEN; returns False (and logs) if that fails."""
+        if self._conn is not None:
+            return True
+        try:
+            conn = self._connect()
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+        except psycopg2.Error as exc:
+            self._logger.warning("worker_listen_failed channel=%s error=%s", self.channel, exc)
+            return False
+        self._conn = conn
+        self._logger.info("worker_listening channel=%s", self.channel)
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to ``timeout`` seconds; True if a notification arrived."""
+        if self._conn is None and not self.start():
+            time.sleep(max(timeout, 0))
+            return False
+        conn = self._conn
+        try:
+            if not conn.notifies:
+                ready, _, _ = select.select([conn], [], [], max(timeout, 0))
+                if not ready:
+                    return False
+                conn.poll()
+            notified = bool(conn.notifies)
+            conn.notifies.clear()
+            return notified
+        except (psycopg2.Error, OSError, ValueError) as exc:
+            self._logger.warning("worker_listen_lost channel=%s error=%s", self.channel, exc)
+            self.close()
+            return False
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
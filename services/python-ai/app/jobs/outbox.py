@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Iterable, Mapping
+from uuid import UUID
+
+from psycopg2.extras import execute_values
+
+from jobs.queue import JobQueue
+
+# A non-transactional queue (Redis) is published to only after the news events commit, so a
+# crash in between would lose the jobs. Ingestion therefore stages each job in job_outbox in
+# the events' transaction, publishes it after the commit and then deletes the row. Workers
+# sweep rows a crashed process left behind; the queue's publish dedup makes a repeated
+# publish a no-op.
+
+# Rows younger than this are probably still being published by the process that staged them.
+SWEEP_AFTER_SECONDS = 60
+
+
+def stage_jobs(
+    conn,
+    priorities: Mapping[int, int],
+    trace_id: UUID,
+    job_type: str = "llm_analysis",
+) -> None:
+    """Record jobs for ``{news_event_id: priority}`` in the caller's transaction."""
+    if not priorities:
+        return
+    rows = [(news_event_id, job_type, str(trace_id), priority) for news_event_id, priority in priorities.items()]
+    sql = (
+        "INSERT INTO job_outbox (news_event_id, job_type, trace_id, priority) VALUES %s "
+        "ON CONFLICT (news_event_id, job_type) DO NOTHING"
+    )
+    with conn.cursor() as cursor:
+        execute_values(cursor, sql, rows)
+
+
+def _delete_staged(conn, news_event_ids: Iterable[int], job_type: str) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM job_outbox WHERE news_event_id = ANY(%s) AND job_type = %s",
+            (list(news_event_ids), job_type),
+        )
+
+
+def publish_staged(
+    conn,
+    job_queue: JobQueue,
+    priorities: Mapping[int, int],
+    trace_id: UUID,
+    job_type: str = "llm_analysis",
+) -> int:
+    """Publish jobs staged by a committed transaction and drop their outbox rows; commits.
+
+    Returns how many jobs were newly enqueued.
+    """
+    if not priorities:
+        return 0
+    enqueued = job_queue.publish_many(None, list(priorities), trace_id, job_type, priorities=priorities)
+    _delete_staged(conn, priorities, job_type)
+    conn.commit()
+    return enqueued
+
+
+def sweep_outbox(
+    conn,
+    job_queue: JobQueue,
+    *,
+    older_than_seconds: int = SWEEP_AFTER_SECONDS,
+    limit: int = 500,
+) -> int:
+    """Publish up to ``limit`` rows left behind by a process that died after committing; commits.
+
+    Returns how many jobs were newly enqueued.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT news_event_id, job_type, trace_id::text, priority FROM job_outbox "
+            "WHERE created_at < NOW() - (%s || ' seconds')::interval "
+            "ORDER BY created_at "
+            "LIMIT %s "
+            "FOR UPDATE SKIP LOCKED",
+            (older_than_seconds, limit),
+        )
+        rows = cursor.fetchall()
+    batches: dict[tuple[str, str], dict[int, int]] = {}
+    for news_event_id, job_type, trace_id, priority in rows:
+        batches.setdefault((job_type, trace_id), {})[news_event_id] = priority
+    enqueued = 0
+    for (job_type, trace_id), priorities in batches.items():
+        enqueued += job_queue.publish_many(None, list(priorities), UUID(trace_id), job_type, priorities=priorities)
+        _delete_staged(conn, priorities, job_type)
+    conn.commit()
+    return enqueued
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+# Newer news first. Anything older than the last bucket (typically a backfill) gets STALE_PRIORITY.
+RECENCY_BUCKETS = (
+    (timedelta(minutes=15), 600),
+    (timedelta(hours=1), 500),
+    (timedelta(hours=6), 400),
+    (timedelta(hours=24), 300),
+    (timedelta(hours=72), 200),
+)
+STALE_PRIORITY = 100
+# tickers.tier: 1 = most important. Only the best tier among a story's tickers counts.
+TIER_BONUS = {1: 300, 2: 200, 3: 100}
+JOB_TYPE_BONUS = {"llm_analysis": 0}
+DEFAULT_TIER = 3
+TIER_CACHE_SECONDS = 300.0
+
+_tier_cache: dict[str, int] = {}
+_tier_cache_loaded_at: float | None = None
+
+
+def compute_job_priority(
+    published_at: datetime | None,
+    tiers: Iterable[int] = (),
+    job_type: str = "llm_analysis",
+    *,
+    now: datetime | None = None,
+) -> int:
+    """Claim priority for a job; higher runs first."""
+    now = now or datetime.now(timezone.utc)
+    priority = STALE_PRIORITY
+    if published_at is not None:
+        age = now - published_at
+        for max_age, bucket_priority in RECENCY_BUCKETS:
+            if age <= max_age:
+                priority = bucket_priority
+                break
+    best_tier = min(tiers, default=None)
+    if best_tier is not None:
+        priority += TIER_BONUS.get(best_tier, 0)
+    return priority + JOB_TYPE_BONUS.get(job_type, 0)
+
+
+def load_ticker_tiers(conn, *, max_age_seconds: float = TIER_CACHE_SECONDS) -> dict[str, int]:
+    """``{symbol: tier}`` from ``tickers``, cached per process for ``max_age_seconds``."""
+    global _tier_cache, _tier_cache_loaded_at
+    now = time.monotonic()
+    if _tier_cache_loaded_at is not None and now - _tier_cache_loaded_at < max_age_seconds:
+        return _tier_cache
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT UPPER(TRIM(symbol)), tier FROM tickers")
+        _tier_cache = {row[0]: row[1] for row in cursor.fetchall() if row[0]}
+    _tier_cache_loaded_at = now
+    return _tier_cache
+
+
+def job_priorities(
+    conn,
+    events: Iterable[tuple[int, datetime | None, list[str]]],
+    job_type: str = "llm_analysis",
+    *,
+    now: datetime | None = None,
+) -> dict[int, int]:
+    """``{news_event_id: priority}`` for ``(news_event_id, published_at, tickers)`` rows."""
+    rows = list(events)
+    if not rows:
+        return {}
+    tiers = load_ticker_tiers(conn)
+    now = now or datetime.now(timezone.utc)
+    return {
+        event_id: compute_job_priority(
+            published_at,
+            [tiers.get(symbol, DEFAULT_TIER) for symbol in symbols],
+            job_type,
+            now=now,
+        )
+        for event_id, published_at, symbols in rows
+    }
+
+
+class FifoSchedule:
+    """Picks which claims serve the oldest runnable jobs instead of the highest priority.
+
+    Every ``every``-th claim is oldest-first, so a backlog keeps at least ``1/every`` of a
+    worker's throughput while fresh news jumps the queue; 0 disables it.
+    """
+
+    def __init__(self, every: int) -> None:
+        self.every = every
+        self._claims = 0
+
+    def oldest_first(self) -> bool:
+        """Call once per claim."""
+        self._claims += 1
+        return self.every > 0 and self._claims % self.every == 0
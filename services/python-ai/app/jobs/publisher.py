@@ -1,17 +1,76 @@
 from __future__ import annotations
 
+from typing import Iterable, Mapping
 from uuid import UUID, uuid4
 
+from psycopg2.extras import execute_values
 
-def publish_job(conn, news_event_id: int, trace_id: UUID, job_type: str = "llm_analysis") -> bool:
+# A job is enqueued only when its (news_event_id, job_type) key is new in published_jobs. The
+# key's unique index serializes concurrent publishers, and the archiver never deletes keys, so
+# an archived job (even one whose history partition was dropped) is not enqueued again.
+# published_at is copied onto the job so claims can rank fresh news first within a priority; a
+# LEFT JOIN keeps the foreign key error for an unknown event.
+_INSERT_NEW_KEYS = (
+    "keys AS ("
+    "  INSERT INTO published_jobs (news_event_id, job_type) "
+    "  SELECT news_event_id, job_type FROM v "
+    "  ON CONFLICT (news_event_id, job_type) DO NOTHING "
+    "  RETURNING news_event_id, job_type"
+    ") "
+    "INSERT INTO analysis_jobs "
+    "(job_uuid, news_event_id, trace_id, job_type, status, priority, published_at) "
+    "SELECT v.job_uuid, v.news_event_id, v.trace_id, v.job_type, 'pending', v.priority, e.published_at "
+    "FROM v JOIN keys USING (news_event_id, job_type) "
+    "LEFT JOIN news_events e ON e.id = v.news_event_id "
+    "ON CONFLICT (news_event_id, job_type) DO NOTHING "
+    "RETURNING 1"
+)
+
+
+def publish_job(
+    conn,
+    news_event_id: int,
+    trace_id: UUID,
+    job_type: str = "llm_analysis",
+    priority: int = 0,
+) -> bool:
     job_uuid = uuid4()
     sql = (
-        "INSERT INTO analysis_jobs (job_uuid, news_event_id, trace_id, job_type, status) "
-        "VALUES (%s, %s, %s, %s, 'pending') "
-        "ON CONFLICT (news_event_id, job_type) DO NOTHING "
-        "RETURNING 1"
+        "WITH v (job_uuid, news_event_id, trace_id, job_type, priority) AS ("
+        "  VALUES (%s::uuid, %s::bigint, %s::uuid, %s::text, %s::integer)"
+        "), "
+        f"{_INSERT_NEW_KEYS}"
     )
     with conn.cursor() as cursor:
-        cursor.execute(sql, (str(job_uuid), news_event_id, str(trace_id), job_type))
+        cursor.execute(sql, (str(job_uuid), news_event_id, str(trace_id), job_type, priority))
         inserted = cursor.fetchone() is not None
     return inserted
+
+
+def publish_jobs(
+    conn,
+    news_event_ids: Iterable[int],
+    trace_id: UUID,
+    job_type: str = "llm_analysis",
+    *,
+    priorities: Mapping[int, int] | None = None,
+) -> int:
+    """Bulk variant of publish_job; returns how many jobs were newly enqueued.
+
+    ``priorities`` maps news_event_id to claim priority (see ``jobs.priority``); missing ids get 0.
+    """
+    priorities = priorities or {}
+    rows = [
+        (str(uuid4()), news_event_id, str(trace_id), job_type, priorities.get(news_event_id, 0))
+        for news_event_id in dict.fromkeys(news_event_ids)
+    ]
+    if not rows:
+        return 0
+    sql = (
+        "WITH v (job_uuid, news_event_id, trace_id, job_type, priority) AS (VALUES %s), "
+        f"{_INSERT_NEW_KEYS}"
+    )
+    template = "(%s::uuid, %s::bigint, %s::uuid, %s::text, %s::integer)"
+    with conn.cursor() as cursor:
+        result = execute_values(cursor, sql, rows, template=template, fetch=True)
+    return len(result)
@@ -0,0 +1,618 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping, Protocol
+from uuid import UUID, uuid4
+
+import psycopg2
+
+from jobs.notify import JobNotifier
+from jobs.publisher import publish_job, publish_jobs
+
+BACKENDS = ("postgres", "redis")
+
+
+@dataclass(frozen=True)
+class JobRow:
+    id: int
+    job_uuid: str
+    news_event_id: int
+    job_type: str
+    trace_id: str
+    attempts: int
+    # Proof of this claim: the Redis stream entry id, or analysis_jobs.lease_token for Postgres.
+    # Finishing calls match on it, so a claim that was recovered and re-claimed is left alone.
+    receipt: str | None = None
+
+
+def retry_backoff_seconds(attempts: int) -> int:
+    return 2 ** attempts
+
+
+class JobQueue(Protocol):
+    """What the worker and the ingestion pipeline need from a job queue backend.
+
+    ``claim`` leases jobs to ``worker_id``. A leased job ends with ``mark_done`` or
+    ``mark_failed``, and ``extend_leases`` keeps its lease alive while it runs. Jobs whose
+    lease lapses for ``visibility_timeout_seconds`` are handed back by ``recover_stuck``.
+    The finishing calls are no-ops for a job that was already released, so a late result
+    cannot clobber a retry. ``mark_failed`` returns True only when it failed the job for
+    good (not retryable, or out of attempts). ``release`` hands a job back without counting
+    an attempt, for work that never reached the provider (an open circuit breaker).
+    """
+
+    name: str
+    # True when publish_many writes through the caller's DB transaction. Otherwise callers
+    # stage jobs in the outbox and publish only after committing the news events
+    # (jobs.outbox, ingestion.pipeline.publish_deferred_jobs).
+    transactional: bool
+
+    def publish_many(
+        self,
+        conn,
+        news_event_ids: Iterable[int],
+        trace_id: UUID,
+        job_type: str = "llm_analysis",
+        *,
+        priorities: Mapping[int, int] | None = None,
+    ) -> int: ...
+
+    def claim(self, batch_size: int, worker_id: str, *, oldest_first: bool = False) -> list[JobRow]: ...
+
+    def mark_done(self, job: JobRow) -> None: ...
+
+    def mark_failed(self, job: JobRow, error: str, retryable: bool) -> bool: ...
+
+    def release(self, job: JobRow, delay_seconds: float) -> None: ...
+
+    def recover_stuck(self, visibility_timeout_seconds: int, worker_id: str) -> int: ...
+
+    def extend_leases(self, job_ids: Iterable[int], worker_id: str) -> set[int]: ...
+
+    def wait(self, timeout: float) -> None: ...
+
+    def close(self) -> None: ...
+
+
+# Finishing updates only touch the claim they were handed: once recover_stuck releases a job
+# and another worker claims it, the old lease_token no longer matches.
+_LEASE_GUARD = "id = %s AND status = 'running' AND lease_token = %s::uuid"
+
+
+class PostgresJobQueue:
+    """``analysis_jobs`` as the queue: row locks with ``FOR UPDATE SKIP LOCKED``.
+
+    Every thread gets its own connection from ``connect``, so the worker's main loop, its
+    job threads and the lease heartbeat never share one. ``publish_many`` writes through the
+    caller's connection so jobs commit together with their news events.
+    """
+
+    name = "postgres"
+    transactional = True
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        max_attempts: int,
+        listen: bool = True,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self._connect = connect
+        self.max_attempts = max_attempts
+        self._logger = logger or logging.getLogger(__name__)
+        self._local = threading.local()
+        self._run_after_column: str | None = None
+        self._notifier = JobNotifier(connect, logger=self._logger) if listen else None
+        if self._notifier is not None:
+            # LISTEN before the first claim so no job inserted in between is missed.
+            self._notifier.start()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, sql: str, params: tuple, *, fetch: bool = False) -> tuple[list[tuple], int]:
+        conn = self._conn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall() if fetch else []
+                count = cursor.rowcount
+            conn.commit()
+        except psycopg2.Error:
+            # Drop a broken connection; the next call on this thread reconnects.
+            self._local.conn = None
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
+            raise
+        return rows, count
+
+    @property
+    def run_after_column(self) -> str:
+        if self._run_after_column is None:
+            rows, _count = self._execute(
+                "SELECT column_name "
+                "FROM information_schema.columns "
+                "WHERE table_name = 'analysis_jobs' AND column_name IN ('run_after','next_run_at')",
+                (),
+                fetch=True,
+            )
+            columns = {row[0] for row in rows}
+            if "run_after" in columns:
+                self._run_after_column = "run_after"
+            elif "next_run_at" in columns:
+                self._run_after_column = "next_run_at"
+            else:
+                raise RuntimeError("analysis_jobs missing run_after/next_run_at column")
+        return self._run_after_column
+
+    def publish(
+        self,
+        conn,
+        news_event_id: int,
+        trace_id: UUID,
+        job_type: str = "llm_analysis",
+        priority: int = 0,
+    ) -> bool:
+        return publish_job(conn, news_event_id, trace_id, job_type, priority)
+
+    def publish_many(
+        self,
+        conn,
+        news_event_ids: Iterable[int],
+        trace_id: UUID,
+        job_type: str = "llm_analysis",
+        *,
+        priorities: Mapping[int, int] | None = None,
+    ) -> int:
+        return publish_jobs(conn, news_event_ids, trace_id, job_type, priorities=priorities)
+
+    def claim(self, batch_size: int, worker_id: str, *, oldest_first: bool = False) -> list[JobRow]:
+        run_after_column = self.run_after_column
+        # Highest priority first, fresher news first within a priority, so breaking news does
+        # not queue behind hours-old jobs from the same recency bucket
+        # (idx_analysis_jobs_pending_priority). oldest_first is the anti-starvation pass that
+        # serves the longest-waiting jobs regardless of priority.
+        if oldest_first:
+            order_by = f"{run_after_column} ASC, created_at ASC"
+        else:
+            order_by = f"priority DESC, published_at DESC NULLS LAST, {run_after_column} ASC"
+        sql = (
+            "WITH cte AS ("
+            "  SELECT id, job_uuid, news_event_id, job_type, trace_id, attempts "
+            "  FROM analysis_jobs "
+            "  WHERE status = 'pending' "
+            f"    AND {run_after_column} <= NOW() "
+            "    AND attempts < %s "
+            f"  ORDER BY {order_by} "
+            "  FOR UPDATE SKIP LOCKED "
+            "  LIMIT %s"
+            ") "
+            "UPDATE analysis_jobs j "
+            "SET status = 'running', locked_at = NOW(), locked_by = %s, "
+            "lease_token = gen_random_uuid(), updated_at = NOW() "
+            "FROM cte "
+            "WHERE j.id = cte.id "
+            "RETURNING j.id, j.job_uuid::text, j.news_event_id, j.job_type, j.trace_id::text, "
+            "cte.attempts, j.lease_token::text"
+        )
+        rows, _count = self._execute(sql, (self.max_attempts, batch_size, worker_id), fetch=True)
+        return [JobRow(*row) for row in rows]
+
+    def mark_done(self, job: JobRow) -> None:
+        sql = (
+            "UPDATE analysis_jobs "
+            "SET status = 'done', updated_at = NOW(), last_error = NULL, lease_token = NULL "
+            f"WHERE {_LEASE_GUARD}"
+        )
+        self._execute(sql, (job.id, job.receipt))
+
+    def mark_failed(self, job: JobRow, error: str, retryable: bool) -> bool:
+        next_attempts = job.attempts + 1
+        final = not (retryable and next_attempts < self.max_attempts)
+        if not final:
+            sql = (
+                "UPDATE analysis_jobs "
+                "SET status = 'pending', attempts = attempts + 1, last_error = %s, "
+                f"{self.run_after_column} = NOW() + (%s || ' seconds')::interval, updated_at = NOW(), "
+                "locked_at = NULL, locked_by = NULL, lease_token = NULL "
+                f"WHERE {_LEASE_GUARD}"
+            )
+            params = (error[:500], retry_backoff_seconds(next_attempts), job.id, job.receipt)
+        else:
+            sql = (
+                "UPDATE analysis_jobs "
+                "SET status = 'failed', attempts = attempts + 1, last_error = %s, updated_at = NOW(), "
+                "locked_at = NULL, locked_by = NULL, lease_token = NULL "
+                f"WHERE {_LEASE_GUARD}"
+            )
+            params = (error[:500], job.id, job.receipt)
+        _rows, count = self._execute(sql, params)
+        return final and count == 1
+
+    def release(self, job: JobRow, delay_seconds: float) -> None:
+        sql = (
+            "UPDATE analysis_jobs "
+            f"SET status = 'pending', {self.run_after_column} = NOW() + (%s || ' seconds')::interval, "
+            "updated_at = NOW(), locked_at = NULL, locked_by = NULL, lease_token = NULL "
+            f"WHERE {_LEASE_GUARD}"
+        )
+        self._execute(sql, (max(delay_seconds, 0.0), job.id, job.receipt))
+
+    def recover_stuck(self, visibility_timeout_seconds: int, worker_id: str) -> int:
+        sql = (
+            "UPDATE analysis_jobs "
+            "SET status = 'pending', locked_at = NULL, locked_by = NULL, lease_token = NULL, "
+            "updated_at = NOW() "
+            "WHERE status = 'running' AND locked_at IS NOT NULL "
+            "AND locked_at < NOW() - (%s || ' seconds')::interval"
+        )
+        _rows, count = self._execute(sql, (visibility_timeout_seconds,))
+        return count
+
+    def extend_leases(self, job_ids: Iterable[int], worker_id: str) -> set[int]:
+        ids = list(job_ids)
+        if not ids:
+            return set()
+        sql = (
+            "UPDATE analysis_jobs SET locked_at = NOW() "
+            "WHERE id = ANY(%s) AND status = 'running' AND locked_by = %s "
+            "RETURNING id"
+        )
+        rows, _count = self._execute(sql, (ids, worker_id), fetch=True)
+        return {row[0] for row in rows}
+
+    def wait(self, timeout: float) -> None:
+        if self._notifier is not None:
+            self._notifier.wait(timeout)
+        else:
+            time.sleep(timeout)
+
+    def close(self) -> None:
+        if self._notifier is not None:
+            self._notifier.close()
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+
+# KEYS: dedup key, job hash, stream. ARGV: job id, then the job hash's field/value pairs.
+# The dedup claim, the job hash and the stream entry are written together or not at all.
+PUBLISH_SCRIPT = """
+if not redis.call('SET', KEYS[1], ARGV[1], 'NX') then
+  return 0
+end
+redis.call('HSET', KEYS[2], unpack(ARGV, 2))
+redis.call('XADD', KEYS[3], '*', 'job_id', ARGV[1])
+return 1
+"""
+
+# KEYS: stream, job hash. ARGV: group, stuck entry id, job id. Only the caller whose XACK
+# succeeds re-adds the job, and the ack and the re-add cannot be separated by a crash.
+REQUEUE_SCRIPT = """
+if redis.call('XACK', KEYS[1], ARGV[1], ARGV[2]) == 0 then
+  return 0
+end
+redis.call('XDEL', KEYS[1], ARGV[2])
+redis.call('HSET', KEYS[2], 'status', 'pending')
+redis.call('XADD', KEYS[1], '*', 'job_id', ARGV[3])
+return 1
+"""
+
+# KEYS: stream, job hash, delayed set. ARGV: group, entry id, job id, due time, then the job
+# hash's field/value pairs. Retries and releases park the job on the delayed set in the same
+# step that acks it, so a crash cannot drop an acked job that is in neither place.
+DEFER_SCRIPT = """
+if redis.call('XACK', KEYS[1], ARGV[1], ARGV[2]) == 0 then
+  return 0
+end
+redis.call('XDEL', KEYS[1], ARGV[2])
+redis.call('HSET', KEYS[2], unpack(ARGV, 5))
+redis.call('ZADD', KEYS[3], ARGV[4], ARGV[3])
+return 1
+"""
+
+# KEYS: delayed set, stream. ARGV: job id. ZREM decides which worker moves a due job, and the
+# job reaches the stream in the same step.
+PROMOTE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+  return 0
+end
+redis.call('XADD', KEYS[2], '*', 'job_id', ARGV[1])
+return 1
+"""
+
+
+class RedisJobQueue:
+    """Redis Streams queue: one stream, one consumer group, one consumer per worker id.
+
+    Keys (all under ``prefix``):
+
+    - ``<prefix>:stream``: runnable jobs (entry field ``job_id``), consumed by group ``group``.
+    - ``<prefix>:job:<id>``: job hash (news_event_id, job_type, trace_id, attempts, status, ...).
+    - ``<prefix>:dedup:<news_event_id>:<job_type>``: makes publishing idempotent.
+    - ``<prefix>:delayed``: sorted set of retrying job ids scored by due time; due entries
+      are moved back onto the stream before each claim.
+
+    Delivery is FIFO; ``priority`` is stored on the job hash but does not reorder the stream.
+    Entries are acknowledged and deleted when a job finishes, is retried or is recovered,
+    and that acknowledgement is the guard that keeps a late result from touching a job
+    that was already handed on. Finished job hashes expire after ``finished_ttl_seconds``.
+    Publishing, stuck-job recovery, retries, releases and promoting due retries run as Lua
+    scripts (``PUBLISH_SCRIPT``, ``REQUEUE_SCRIPT``, ``DEFER_SCRIPT``, ``PROMOTE_SCRIPT``),
+    so a crash cannot leave a dedup key without its job or a job that is on neither the
+    stream nor the delayed set.
+    """
+
+    name = "redis"
+    transactional = False
+
+    def __init__(
+        self,
+        client,
+        *,
+        max_attempts: int,
+        prefix: str = "jobs",
+        group: str = "workers",
+        finished_ttl_seconds: int = 7 * 24 * 3600,
+        clock: Callable[[], float] = time.time,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self.client = client
+        self.max_attempts = max_attempts
+        self.prefix = prefix
+        self.group = group
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self._clock = clock
+        self._logger = logger or logging.getLogger(__name__)
+        self.stream = f"{prefix}:stream"
+        self._delayed = f"{prefix}:delayed"
+        self._seq = f"{prefix}:seq"
+        self._lock = threading.Lock()
+        self._receipts: dict[int, str] = {}
+        self._publish_script = client.register_script(PUBLISH_SCRIPT)
+        self._requeue_script = client.register_script(REQUEUE_SCRIPT)
+        self._defer_script = client.register_script(DEFER_SCRIPT)
+        self._promote_script = client.register_script(PROMOTE_SCRIPT)
+        self._ensure_group()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> RedisJobQueue:
+        import redis
+
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _ensure_group(self) -> None:
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as exc:  # noqa: BLE001
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def _job_key(self, job_id: int | str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def publish(
+        self,
+        conn,
+        news_event_id: int,
+        trace_id: UUID,
+        job_type: str = "llm_analysis",
+        priority: int = 0,
+    ) -> bool:
+        dedup_key = f"{self.prefix}:dedup:{news_event_id}:{job_type}"
+        # A duplicate wastes this id; ids only need to be unique.
+        job_id = self.client.incr(self._seq)
+        fields = {
+            "job_uuid": str(uuid4()),
+            "news_event_id": news_event_id,
+            "job_type": job_type,
+            "trace_id": str(trace_id),
+            "attempts": 0,
+            "priority": priority,
+            "status": "pending",
+            "created_at": self._clock(),
+        }
+        published = self._publish_script(
+            keys=[dedup_key, self._job_key(job_id), self.stream],
+            args=[job_id, *(item for pair in fields.items() for item in pair)],
+        )
+        return bool(published)
+
+    def publish_many(
+        self,
+        conn,
+        news_event_ids: Iterable[int],
+        trace_id: UUID,
+        job_type: str = "llm_analysis",
+        *,
+        priorities: Mapping[int, int] | None = None,
+    ) -> int:
+        priorities = priorities or {}
+        return sum(
+            1
+            for news_event_id in dict.fromkeys(news_event_ids)
+            if self.publish(conn, news_event_id, trace_id, job_type, priorities.get(news_event_id, 0))
+        )
+
+    def _promote_due(self) -> None:
+        due = self.client.zrangebyscore(self._delayed, "-inf", self._clock(), start=0, num=100)
+        for job_id in due:
+            self._promote_script(keys=[self._delayed, self.stream], args=[job_id])
+
+    def _load(self, entry_id: str, job_id: str) -> JobRow | None:
+        fields = self.client.hgetall(self._job_key(job_id))
+        if not fields:
+            return None
+        return JobRow(
+            id=int(job_id),
+            job_uuid=fields["job_uuid"],
+            news_event_id=int(fields["news_event_id"]),
+            job_type=fields["job_type"],
+            trace_id=fields["trace_id"],
+            attempts=int(fields["attempts"]),
+            receipt=entry_id,
+        )
+
+    def claim(self, batch_size: int, worker_id: str, *, oldest_first: bool = False) -> list[JobRow]:
+        self._promote_due()
+        response = self.client.xreadgroup(
+            self.group, worker_id, {self.stream: ">"}, count=batch_size
+        )
+        jobs: list[JobRow] = []
+        for _stream, entries in response or []:
+            for entry_id, fields in entries:
+                job = self._load(entry_id, fields.get("job_id", ""))
+                if job is None:
+                    # The job hash expired or was removed; drop the orphaned entry.
+                    self._ack(entry_id)
+                    continue
+                if job.attempts >= self.max_attempts:
+                    self._ack(entry_id)
+                    self.client.hset(self._job_key(job.id), mapping={"status": "failed"})
+                    continue
+                self.client.hset(
+                    self._job_key(job.id),
+                    mapping={"status": "running", "locked_by": worker_id, "locked_at": self._clock()},
+                )
+                jobs.append(job)
+        with self._lock:
+            self._receipts.update((job.id, job.receipt) for job in jobs)
+        return jobs
+
+    def _ack(self, entry_id: str) -> bool:
+        acked = self.client.xack(self.stream, self.group, entry_id)
+        self.client.xdel(self.stream, entry_id)
+        return bool(acked)
+
+    def _forget(self, job: JobRow) -> None:
+        with self._lock:
+            self._receipts.pop(job.id, None)
+
+    def _release(self, job: JobRow) -> bool:
+        self._forget(job)
+        return job.receipt is not None and self._ack(job.receipt)
+
+    def _defer(self, job: JobRow, due: float, fields: Mapping[str, Any]) -> bool:
+        """Ack the job's entry and park it on the delayed set until ``due``; False if already acked."""
+        self._forget(job)
+        if job.receipt is None:
+            return False
+        deferred = self._defer_script(
+            keys=[self.stream, self._job_key(job.id), self._delayed],
+            args=[self.group, job.receipt, job.id, due, *(item for pair in fields.items() for item in pair)],
+        )
+        return bool(deferred)
+
+    def mark_done(self, job: JobRow) -> None:
+        if not self._release(job):
+            return
+        key = self._job_key(job.id)
+        self.client.hset(key, mapping={"status": "done", "last_error": "", "finished_at": self._clock()})
+        self.client.expire(key, self.finished_ttl_seconds)
+
+    def mark_failed(self, job: JobRow, error: str, retryable: bool) -> bool:
+        next_attempts = job.attempts + 1
+        if retryable and next_attempts < self.max_attempts:
+            self._defer(
+                job,
+                self._clock() + retry_backoff_seconds(next_attempts),
+                {"status": "pending", "attempts": next_attempts, "last_error": error[:500]},
+            )
+            return False
+        if not self._release(job):
+            return False
+        key = self._job_key(job.id)
+        self.client.hset(
+            key,
+            mapping={
+                "status": "failed",
+                "attempts": next_attempts,
+                "last_error": error[:500],
+                "finished_at": self._clock(),
+            },
+        )
+        self.client.expire(key, self.finished_ttl_seconds)
+        return True
+
+    def release(self, job: JobRow, delay_seconds: float) -> None:
+        self._defer(job, self._clock() + max(delay_seconds, 0.0), {"status": "pending"})
+
+    def recover_stuck(self, visibility_timeout_seconds: int, worker_id: str) -> int:
+        """Re-queue entries no consumer has touched for ``visibility_timeout_seconds``."""
+        recovered = 0
+        start = "0-0"
+        while True:
+            response = self.client.xautoclaim(
+                self.stream,
+                self.group,
+                worker_id,
+                int(visibility_timeout_seconds * 1000),
+                start_id=start,
+                count=100,
+            )
+            start, entries = response[0], response[1]
+            for entry_id, fields in entries:
+                if not fields:
+                    continue
+                job_id = fields.get("job_id")
+                if self._requeue_script(
+                    keys=[self.stream, self._job_key(job_id)], args=[self.group, entry_id, job_id]
+                ):
+                    recovered += 1
+            if start in ("0-0", b"0-0"):
+                return recovered
+
+    def extend_leases(self, job_ids: Iterable[int], worker_id: str) -> set[int]:
+        with self._lock:
+            receipts = {job_id: self._receipts[job_id] for job_id in job_ids if job_id in self._receipts}
+        if not receipts:
+            return set()
+        # XCLAIM to ourselves resets the entry's idle time; entries already recovered are gone.
+        claimed = set(
+            self.client.xclaim(self.stream, self.group, worker_id, 0, list(receipts.values()), justid=True)
+        )
+        return {job_id for job_id, entry_id in receipts.items() if entry_id in claimed}
+
+    def wait(self, timeout: float) -> None:
+        # XREAD (no group) blocks until a new entry arrives without consuming it. Retries whose
+        # backoff expires are only noticed when the timeout lapses.
+        due = self.client.zrangebyscore(self._delayed, "-inf", "+inf", start=0, num=1, withscores=True)
+        if due:
+            timeout = min(timeout, max(due[0][1] - self._clock(), 0))
+        if timeout <= 0:
+            return
+        self.client.xread({self.stream: "$"}, count=1, block=max(int(timeout * 1000), 1))
+
+    def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+
+def create_queue(
+    backend: str,
+    *,
+    connect: Callable[[], Any],
+    max_attempts: int,
+    redis_url: str | None = None,
+    listen: bool = True,
+    logger: logging.Logger | None = None,
+) -> JobQueue:
+    if backend == "postgres":
+        return PostgresJobQueue(connect, max_attempts=max_attempts, listen=listen, logger=logger)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("redis backend needs a Redis URL (REDIS_URL)")
+        return RedisJobQueue.from_url(redis_url, max_attempts=max_attempts, logger=logger)
+    raise ValueError(f"unknown queue backend: {backend}")
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+# A child that stays up this long is considered healthy again and its backoff resets.
+_STABLE_SECONDS = 60.0
+
+
+@dataclass
+class _Child:
+    worker_id: str
+    process: subprocess.Popen | None = None
+    started_at: float = 0.0
+    restarts: int = 0
+    failures: int = 0
+    restart_at: float = 0.0
+    exit_codes: list[int] = field(default_factory=list)
+    # Exited with status 0 (``--once``, or a clean shutdown of its own): not restarted.
+    finished: bool = False
+
+
+def _spawn_worker(worker_id: str, worker_args: Sequence[str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "jobs.worker", "--worker-id", worker_id, *worker_args]
+    )
+
+
+class Supervisor:
+    """Keeps ``processes`` worker processes running under stable ids ``<prefix>:w<N>``.
+
+    Children that crash (non-zero exit status or killed by a signal) are restarted with
+    exponential backoff (capped at ``max_backoff``); a child that exits 0 is done and stays
+    down. :meth:`stop` sends SIGTERM to every child so they drain their in-flight jobs, and
+    escalates to SIGKILL after ``drain_timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        *,
+        prefix: str,
+        worker_args: Sequence[str] = (),
+        max_backoff: float = 60.0,
+        drain_timeout: float = 150.0,
+        spawn: Callable[[str, Sequence[str]], subprocess.Popen] = _spawn_worker,
+        clock: Callable[[], float] = time.monotonic,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        if processes <= 0:
+            raise ValueError("processes must be positive")
+        self.worker_args = list(worker_args)
+        self.max_backoff = max_backoff
+        self.drain_timeout = drain_timeout
+        self._spawn = spawn
+        self._clock = clock
+        self._logger = logger or logging.getLogger(__name__)
+        self.children = [_Child(f"{prefix}:w{index}") for index in range(processes)]
+
+    def _start(self, child: _Child) -> None:
+        child.process = self._spawn(child.worker_id, self.worker_args)
+        child.started_at = self._clock()
+        self._logger.info(
+            "supervisor_worker_started worker_id=%s pid=%s restarts=%s",
+            child.worker_id,
+            child.process.pid,
+            child.restarts,
+        )
+
+    def tick(self) -> None:
+        """Reap exited children and (re)start any whose backoff has elapsed."""
+        now = self._clock()
+        for child in self.children:
+            if child.finished:
+                continue
+            if child.process is not None:
+                code = child.process.poll()
+                if code is None:
+                    if child.failures and now - child.started_at >= _STABLE_SECONDS:
+                        child.failures = 0
+                    continue
+                child.exit_codes = (child.exit_codes + [code])[-10:]
+                child.process = None
+                if code == 0:
+                    child.finished = True
+                    self._logger.info("supervisor_worker_finished worker_id=%s", child.worker_id)
+                    continue
+                child.failures += 1
+                backoff = min(2 ** (child.failures - 1), self.max_backoff)
+                child.restart_at = now + backoff
+                self._logger.error(
+                    "supervisor_worker_exited worker_id=%s exit_code=%s restart_in_seconds=%s",
+                    child.worker_id,
+                    code,
+                    backoff,
+                )
+            if now >= child.restart_at:
+                if child.exit_codes:
+                    child.restarts += 1
+                self._start(child)
+
+    def finished(self) -> bool:
+        """True once every child has exited cleanly; there is nothing left to supervise."""
+        return all(child.finished for child in self.children)
+
+    def alive(self) -> int:
+        return sum(
+            1 for child in self.children if child.process is not None and child.process.poll() is None
+        )
+
+    def status(self) -> dict:
+        return {
+            "updated_at": time.time(),
+            "processes": len(self.children),
+            "alive": self.alive(),
+            "workers": [
+                {
+                    "worker_id": child.worker_id,
+                    "pid": child.process.pid if child.process is not None else None,
+                    "alive": child.process is not None and child.process.poll() is None,
+                    "restarts": child.restarts,
+                    "last_exit_code": child.exit_codes[-1] if child.exit_codes else None,
+                }
+                for child in self.children
+            ],
+        }
+
+    def stop(self) -> None:
+        """SIGTERM all children, wait up to ``drain_timeout``, then SIGKILL stragglers."""
+        running = [child.process for child in self.children if child.process is not None]
+        for process in running:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        deadline = self._clock() + self.drain_timeout
+        for process in running:
+            try:
+                process.wait(timeout=max(deadline - self._clock(), 0))
+            except subprocess.TimeoutExpired:
+                self._logger.error("supervisor_worker_killed pid=%s", process.pid)
+                process.kill()
+                process.wait()
+        for child in self.children:
+            child.process = None
+
+
+def write_status(path: str, status: dict) -> None:
+    """Atomically replace the status file read by ``--check``."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(status, handle)
+    os.replace(tmp_path, path)
+
+
+def check_status(path: str, max_age_seconds: float, min_alive: int | None = None) -> tuple[bool, str]:
+    """Liveness verdict from a status file: fresh, and enough workers alive."""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            status = json.load(handle)
+    except (OSError, ValueError) as exc:
+        return False, f"status_unreadable: {exc}"
+    age = time.time() - float(status.get("updated_at", 0))
+    if age > max_age_seconds:
+        return False, f"status_stale age_seconds={age:.0f}"
+    required = status.get("processes", 0) if min_alive is None else min_alive
+    alive = status.get("alive", 0)
+    if alive < required:
+        return False, f"workers_down alive={alive} required={required}"
+    return True, f"ok alive={alive}"
+
+
+def _parse_args() -> tuple[argparse.Namespace, list[str]]:
+    parser = argparse.ArgumentParser(
+        description="Run several analysis workers; unknown arguments are passed to each worker"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1))),
+        help="Worker processes to keep running (default: CPU count)",
+    )
+    parser.add_argument(
+        "--worker-prefix",
+        default=os.getenv("WORKER_ID_PREFIX") or socket.gethostname(),
+        help="Worker ids are <prefix>:w0 .. <prefix>:w<N-1>",
+    )
+    parser.add_argument(
+        "--status-file",
+        default=os.getenv("WORKER_STATUS_FILE", "/tmp/jobs-supervisor.json"),
+        help="JSON liveness file rewritten every second",
+    )
+    parser.add_argument("--max-backoff", type=float, default=60.0, help="Max seconds between restarts")
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=float(os.getenv("WORKER_DRAIN_TIMEOUT_SECONDS", "150")),
+        help="Seconds to wait for workers to drain on shutdown before killing them",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit 0 if the status file is fresh and all workers are alive (for health checks)",
+    )
+    parser.add_argument("--max-age", type=float, default=30.0, help="Max status file age for --check")
+    parser.add_argument("--min-alive", type=int, default=None, help="Workers required by --check")
+    args, worker_args = parser.parse_known_args()
+    if args.processes < 1:
+        parser.error("--processes must be at least 1")
+    if "--worker-id" in worker_args:
+        parser.error("--worker-id is assigned by the supervisor")
+    return args, worker_args
+
+
+def main() -> int:
+    args, worker_args = _parse_args()
+    if args.check:
+        healthy, message = check_status(args.status_file, args.max_age, args.min_alive)
+        print(message)
+        return 0 if healthy else 1
+
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    logger = logging.getLogger(__name__)
+
+    running = {"value": True}
+
+    def _handle_shutdown(signum, _frame):  # noqa: ANN001
+        logger.info("supervisor_shutdown signal=%s", signum)
+        running["value"] = False
+
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    signal.signal(signal.SIGINT, _handle_shutdown)
+
+    supervisor = Supervisor(
+        args.processes,
+        prefix=args.worker_prefix,
+        worker_args=worker_args,
+        max_backoff=args.max_backoff,
+        drain_timeout=args.drain_timeout,
+        logger=logger,
+    )
+    while running["value"]:
+        supervisor.tick()
+        write_status(args.status_file, supervisor.status())
+        if supervisor.finished():
+            logger.info("supervisor_workers_finished")
+            break
+        time.sleep(1)
+
+    supervisor.stop()
+    write_status(args.status_file, supervisor.status())
+    logger.info("supervisor_stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
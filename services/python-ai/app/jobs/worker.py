@@ -6,31 +6,141 @@ import os
 import signal
 import socket
 import time
-from dataclasses import dataclass
 from datetime import timedelta
 from typing import Iterable
+from uuid import UUID
 
 import psycopg2
 
-from analysis.service import analyze_news_event
-
-@dataclass(frozen=True)
-class JobRow:
-    id: int
-    job_uuid: str
-    news_event_id: int
-    job_type: str
-    trace_id: str
-    attempts: int
+from analysis.service import analyze_news_event, persist_analyses
+from db import close_pool, configure_pool, connect, pooled_connection
+from jobs.clusters import cluster_members, inherit_cluster_analyses, promote_cluster_member
+from jobs.concurrency import JobPool
+from jobs.lease import LeaseHeartbeat
+from jobs.outbox import publish_staged, stage_jobs, sweep_outbox
+from jobs.priority import FifoSchedule, job_priorities
+from jobs.queue import BACKENDS, JobQueue, JobRow, create_queue
+from llm.factory import configured_model, get_governor, set_governor
+from llm.governor import LLMGovernor, is_outage_error
 
 
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Analysis job worker")
-    parser.add_argument("--poll-interval", type=int, default=10, help="Seconds between polls")
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=10,
+        help="Seconds between polls when idle (a fallback when listening for notifications)",
+    )
     parser.add_argument("--batch-size", type=int, default=1, help="Jobs to claim per loop")
     parser.add_argument("--once", action="store_true", help="Process once and exit")
     parser.add_argument("--worker-id", default=None, help="Worker identifier for locking")
-    return parser.parse_args()
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("WORKER_CONCURRENCY", "1")),
+        help="Jobs to run at once on a thread pool (1 runs them one after another)",
+    )
+    parser.add_argument(
+        "--job-timeout",
+        type=float,
+        default=float(os.getenv("WORKER_JOB_TIMEOUT_SECONDS", "120")),
+        help=(
+            "Seconds a job may run: LLM call timeouts, retries and rate-limit waits are cut to fit, "
+            "and a job still running after it is logged as overrunning (0 disables)"
+        ),
+    )
+    parser.add_argument(
+        "--persist-every",
+        type=int,
+        default=int(os.getenv("WORKER_PERSIST_EVERY", "10")),
+        help="Store a batch's successful analyses once this many are waiting (0: only at the end of the batch)",
+    )
+    parser.add_argument(
+        "--persist-seconds",
+        type=float,
+        default=float(os.getenv("WORKER_PERSIST_SECONDS", "5")),
+        help="Store a batch's successful analyses once the oldest has waited this long (0: no time bound)",
+    )
+    parser.add_argument(
+        "--fifo-every",
+        type=int,
+        default=int(os.getenv("WORKER_FIFO_EVERY", "10")),
+        help="Every Nth claim takes the oldest runnable jobs instead of the highest priority (0 disables)",
+    )
+    parser.add_argument(
+        "--visibility-timeout",
+        type=int,
+        default=int(os.getenv("WORKER_VISIBILITY_TIMEOUT_SECONDS", "60")),
+        help="Seconds without a lease heartbeat before a running job is considered stuck",
+    )
+    parser.add_argument(
+        "--heartbeat-interval",
+        type=float,
+        default=float(os.getenv("WORKER_HEARTBEAT_SECONDS", "0")) or None,
+        help="Seconds between lease heartbeats for running jobs (default: a quarter of --visibility-timeout)",
+    )
+    parser.add_argument(
+        "--recover-interval",
+        type=float,
+        default=float(os.getenv("WORKER_RECOVER_SECONDS", "30")),
+        help="Seconds between stuck-job recovery sweeps",
+    )
+    parser.add_argument(
+        "--queue-backend",
+        choices=BACKENDS,
+        default=os.getenv("JOB_QUEUE_BACKEND", "postgres"),
+        help="Where jobs are queued: analysis_jobs rows (postgres) or Redis Streams (redis)",
+    )
+    parser.add_argument(
+        "--redis-url",
+        default=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+        help="Redis URL for --queue-backend redis",
+    )
+    parser.add_argument(
+        "--llm-rpm",
+        type=float,
+        default=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+        help="LLM requests per minute shared by all workers using the same provider and model (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--llm-tpm",
+        type=float,
+        default=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+        help="LLM tokens per minute shared by all workers using the same provider and model (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--breaker-failures",
+        type=int,
+        default=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+        help="Consecutive provider outage errors (429, 5xx, timeouts) that open the circuit breaker (0 disables)",
+    )
+    parser.add_argument(
+        "--breaker-open-seconds",
+        type=float,
+        default=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "60")),
+        help="Seconds an open breaker pauses claiming before a probe call is allowed",
+    )
+    parser.add_argument(
+        "--listen",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("WORKER_LISTEN", "true").lower() not in {"0", "false", "no"},
+        help="Wake on analysis_jobs NOTIFY instead of waiting for the next poll",
+    )
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.visibility_timeout <= 0:
+        parser.error("--visibility-timeout must be positive")
+    if args.heartbeat_interval is None:
+        args.heartbeat_interval = args.visibility_timeout / 4
+    if not 0 < args.heartbeat_interval < args.visibility_timeout:
+        parser.error("--heartbeat-interval must be positive and shorter than --visibility-timeout")
+    if args.llm_rpm < 0 or args.llm_tpm < 0:
+        parser.error("--llm-rpm and --llm-tpm must not be negative")
+    if args.breaker_open_seconds <= 0:
+        parser.error("--breaker-open-seconds must be positive")
+    return args
 
 
 def _configure_logging() -> None:
@@ -41,61 +151,6 @@ def _configure_logging() -> None:
     )
 
 
-def _connect_db():
-    host = os.getenv("POSTGRES_HOST")
-    port = int(os.getenv("POSTGRES_PORT", "5432"))
-    name = os.getenv("POSTGRES_DB")
-    user = os.getenv("POSTGRES_USER")
-    password = os.getenv("POSTGRES_PASSWORD")
-    missing = [key for key, value in {
-        "POSTGRES_HOST": host,
-        "POSTGRES_DB": name,
-        "POSTGRES_USER": user,
-        "POSTGRES_PASSWORD": password,
-    }.items() if not value]
-    if missing:
-        raise SystemExit(f"Missing DB environment variables: {', '.join(missing)}")
-    conn = psycopg2.connect(
-        host=host,
-        port=port,
-        dbname=name,
-        user=user,
-        password=password,
-    )
-    with conn.cursor() as cursor:
-        cursor.execute("SET TIME ZONE 'UTC'")
-    conn.commit()
-    return conn
-
-
-def _claim_jobs(
-    conn, batch_size: int, worker_id: str, max_attempts: int, run_after_column: str
-) -> list[JobRow]:
-    sql = (
-        "WITH cte AS ("
-        "  SELECT id, job_uuid, news_event_id, job_type, trace_id, attempts "
-        "  FROM analysis_jobs "
-        "  WHERE status = 'pending' "
-        f"    AND {run_after_column} <= NOW() "
-        "    AND attempts < %s "
-        f"  ORDER BY {run_after_column} ASC, created_at ASC "
-        "  FOR UPDATE SKIP LOCKED "
-        "  LIMIT %s"
-        ") "
-        "UPDATE analysis_jobs j "
-        "SET status = 'running', locked_at = NOW(), locked_by = %s, updated_at = NOW() "
-        "FROM cte "
-        "WHERE j.id = cte.id "
-        "RETURNING j.id, j.job_uuid::text, j.news_event_id, j.job_type, j.trace_id::text, "
-        "cte.attempts"
-    )
-    with conn.cursor() as cursor:
-        cursor.execute(sql, (max_attempts, batch_size, worker_id))
-        rows = cursor.fetchall()
-    conn.commit()
-    return [JobRow(*row) for row in rows]
-
-
 def _load_news_event(conn, news_event_id: int) -> tuple[int, str, str]:
     sql = "SELECT id, news_id, title FROM news_events WHERE id = %s"
     with conn.cursor() as cursor:
@@ -106,65 +161,15 @@ def _load_news_event(conn, news_event_id: int) -> tuple[int, str, str]:
     return row[0], row[1], row[2]
 
 
-def _mark_done(conn, job_id: int) -> None:
-    sql = (
-        "UPDATE analysis_jobs "
-        "SET status = 'done', updated_at = NOW(), last_error = NULL "
-        "WHERE id = %s"
-    )
-    with conn.cursor() as cursor:
-        cursor.execute(sql, (job_id,))
-    conn.commit()
-
-
-def _mark_failed(
-    conn, job: JobRow, error: str, retryable: bool, max_attempts: int, run_after_column: str
-) -> None:
-    next_attempts = job.attempts + 1
-    if retryable and next_attempts < max_attempts:
-        backoff_seconds = 2 ** next_attempts
-        sql = (
-            "UPDATE analysis_jobs "
-            "SET status = 'pending', attempts = attempts + 1, last_error = %s, "
-            f"{run_after_column} = NOW() + (%s || ' seconds')::interval, updated_at = NOW(), "
-            "locked_at = NULL, locked_by = NULL "
-            "WHERE id = %s"
-        )
-        params = (error[:500], backoff_seconds, job.id)
-    else:
-        sql = (
-            "UPDATE analysis_jobs "
-            "SET status = 'failed', attempts = attempts + 1, last_error = %s, updated_at = NOW(), "
-            "locked_at = NULL, locked_by = NULL "
-            "WHERE id = %s"
-        )
-        params = (error[:500], job.id)
-    with conn.cursor() as cursor:
-        cursor.execute(sql, params)
-    conn.commit()
-
-
-def _recover_stuck_jobs(conn, visibility_timeout_seconds: int) -> int:
-    sql = (
-        "UPDATE analysis_jobs "
-        "SET status = 'pending', locked_at = NULL, locked_by = NULL, updated_at = NOW() "
-        "WHERE status = 'running' AND locked_at IS NOT NULL "
-        "AND locked_at < NOW() - (%s || ' seconds')::interval"
-    )
-    with conn.cursor() as cursor:
-        cursor.execute(sql, (visibility_timeout_seconds,))
-        recovered = cursor.rowcount
-    conn.commit()
-    return recovered
-
-
 def _is_retryable_error(error_message: str | None) -> bool:
     if not error_message:
         return False
     lowered = error_message.lower()
     if "insufficient_quota" in lowered or "401" in lowered or "403" in lowered:
         return False
-    if "timeout" in lowered:
+    if "circuit_open" in lowered or is_outage_error(lowered):
+        return True
+    if "timeout" in lowered or "deadline" in lowered:
         return True
     if "json" in lowered:
         return True
@@ -173,83 +178,259 @@ def _is_retryable_error(error_message: str | None) -> bool:
     return False
 
 
+def _share_with_cluster(news_event_id: int, logger: logging.Logger) -> None:
+    """Copy a representative's new analysis onto its near-duplicates, which have no jobs."""
+    try:
+        with pooled_connection() as conn:
+            members = cluster_members(conn, news_event_id)
+            inherited = inherit_cluster_analyses(conn, members) if members else 0
+    except (psycopg2.Error, RuntimeError) as exc:  # RuntimeError: no pooled connection in time
+        # The job is already done; ingestion re-inherits members when they are fetched again.
+        logger.error("llm_analysis_inherit_failed news_event_id=%s error=%s", news_event_id, exc)
+        return
+    if members:
+        logger.info(
+            "llm_analysis_inherited news_event_id=%s members=%s analyses=%s",
+            news_event_id,
+            len(members),
+            inherited,
+        )
+
+
+def _hand_off_cluster(queue: JobQueue, job: JobRow, logger: logging.Logger) -> None:
+    """A representative failed for good: enqueue a near-duplicate so the story is still analysed."""
+    with pooled_connection() as conn:
+        promoted = promote_cluster_member(conn, job.news_event_id, job.job_type)
+        if promoted is None:
+            return
+        priorities = job_priorities(conn, [promoted], job.job_type)
+        if queue.transactional:
+            queue.publish_many(conn, [promoted[0]], UUID(job.trace_id), job.job_type, priorities=priorities)
+        else:
+            stage_jobs(conn, priorities, UUID(job.trace_id), job.job_type)
+    if not queue.transactional:
+        with pooled_connection() as conn:
+            publish_staged(conn, queue, priorities, UUID(job.trace_id), job.job_type)
+    logger.info(
+        "cluster_representative_promoted job_id=%s failed_news_event_id=%s news_event_id=%s",
+        job.id,
+        job.news_event_id,
+        promoted[0],
+    )
+
+
+def _sweep_outbox(queue: JobQueue, logger: logging.Logger) -> None:
+    """Publish jobs whose ingestion process committed the events but died before publishing."""
+    try:
+        with pooled_connection() as conn:
+            enqueued = sweep_outbox(conn, queue)
+    except (psycopg2.Error, RuntimeError) as exc:  # RuntimeError: no pooled connection in time
+        logger.error("worker_outbox_sweep_failed error=%s", exc)
+        return
+    if enqueued:
+        logger.info("worker_outbox_published count=%s", enqueued)
+
+
+def _wait_for_breaker(queue: JobQueue, job: JobRow, logger: logging.Logger) -> None:
+    """Requeue a job the open breaker kept from the provider, without using an attempt."""
+    governor = get_governor()
+    delay = governor.paused_for() if governor is not None else 0.0
+    # At least a second, so a breaker that just expired is not hammered by every worker.
+    delay = max(delay, 1.0)
+    queue.release(job, delay)
+    logger.info(
+        "job_deferred job_id=%s news_event_id=%s reason=circuit_open delay_seconds=%.1f",
+        job.id,
+        job.news_event_id,
+        delay,
+    )
+
+
+def _mark_failed(queue: JobQueue, job: JobRow, error_message: str, retryable: bool, logger: logging.Logger) -> None:
+    if not queue.mark_failed(job, error_message, retryable) or job.job_type != "llm_analysis":
+        return
+    try:
+        _hand_off_cluster(queue, job, logger)
+    except Exception as exc:  # noqa: BLE001
+        logger.error("cluster_handoff_failed job_id=%s news_event_id=%s error=%s", job.id, job.news_event_id, exc)
+
+
 def _process_jobs(
-    conn,
+    queue: JobQueue,
     jobs: Iterable[JobRow],
     logger: logging.Logger,
-    max_attempts: int,
-    run_after_column: str,
+    lease: LeaseHeartbeat | None = None,
+    job_timeout: float | None = None,
+    *,
+    persist_every: int = 0,
+    persist_seconds: float = 0.0,
 ) -> None:
-    for job in jobs:
-        start_time = time.monotonic()
-        try:
-            if job.job_type == "llm_analysis":
-                result = analyze_news_event(job.news_event_id)
-                duration_ms = int((time.monotonic() - start_time) * 1000)
-                if result.get("status") == "succeeded":
-                    _mark_done(conn, job.id)
-                    logger.info(
-                        "job_done job_id=%s news_event_id=%s attempts=%s provider=%s duration_ms=%s",
-                        job.id,
-                        job.news_event_id,
-                        job.attempts + 1,
-                        result.get("provider"),
-                        duration_ms,
-                    )
-                else:
-                    error_message = result.get("error_message", "analysis_failed")
-                    retryable = _is_retryable_error(error_message)
-                    _mark_failed(conn, job, error_message, retryable, max_attempts, run_after_column)
-                    logger.error(
-                        "job_failed job_id=%s news_event_id=%s attempts=%s retryable=%s provider=%s error=%s duration_ms=%s",
-                        job.id,
-                        job.news_event_id,
-                        job.attempts + 1,
-                        retryable,
-                        result.get("provider"),
-                        error_message,
-                        duration_ms,
-                    )
-                continue
+    """Run claimed jobs in turn and store their successful analyses a group at a time.
+
+    Held analyses are written with one statement once ``persist_every`` are waiting, once
+    the oldest has waited ``persist_seconds``, and at the end of the batch (0 disables a bound).
+    """
+    jobs = list(jobs)
+    succeeded: list[tuple[JobRow, dict]] = []
+    held_since = 0.0
+    try:
+        for job in jobs:
+            result = _process_job(queue, job, logger, job_timeout)
+            if result is not None:
+                # Keep the lease until the analysis is stored.
+                if not succeeded:
+                    held_since = time.monotonic()
+                succeeded.append((job, result))
+            elif lease is not None:
+                lease.discard(job.id)
+            if succeeded and (
+                (persist_every > 0 and len(succeeded) >= persist_every)
+                or (persist_seconds > 0 and time.monotonic() - held_since >= persist_seconds)
+            ):
+                _store_succeeded(queue, succeeded, logger)
+                if lease is not None:
+                    for stored, _result in succeeded:
+                        lease.discard(stored.id)
+                succeeded = []
+        _store_succeeded(queue, succeeded, logger)
+    finally:
+        if lease is not None:
+            for job in jobs:
+                lease.discard(job.id)
+
+
+def _store_succeeded(queue: JobQueue, succeeded: list[tuple[JobRow, dict]], logger: logging.Logger) -> None:
+    """Persist analyses held back by _process_job with one persist_analyses call."""
+    if not succeeded:
+        return
+    try:
+        with pooled_connection() as conn:
+            # A Postgres queue's jobs are completed in the same transaction as their analyses.
+            saved = persist_analyses(conn, [result["record"] for _job, result in succeeded])
+    except Exception as exc:  # noqa: BLE001
+        error_message = f"persist_failed: {exc}"
+        for job, _result in succeeded:
+            _mark_failed(queue, job, error_message, True, logger)
+        logger.error("job_persist_failed jobs=%s error=%s", len(succeeded), exc)
+        return
+    for (job, result), (_analysis_id, job_done) in zip(succeeded, saved):
+        if not job_done:
+            queue.mark_done(job)
+        _share_with_cluster(job.news_event_id, logger)
+        logger.info(
+            "job_done job_id=%s news_event_id=%s attempts=%s provider=%s duration_ms=%s",
+            job.id,
+            job.news_event_id,
+            job.attempts + 1,
+            result.get("provider"),
+            result["duration_ms"],
+        )
 
-            event_id, news_id, _title = _load_news_event(conn, job.news_event_id)
-            duration_ms = int((time.monotonic() - start_time) * 1000)
-            logger.info(
-                "job_done job_id=%s news_event_id=%s attempts=%s duration_ms=%s",
-                job.id,
-                event_id,
-                job.attempts + 1,
-                duration_ms,
+
+def _process_job(
+    queue: JobQueue,
+    job: JobRow,
+    logger: logging.Logger,
+    job_timeout: float | None = None,
+) -> dict | None:
+    """Run one job; a successful analysis is returned unstored for _store_succeeded."""
+    start_time = time.monotonic()
+    deadline = start_time + job_timeout if job_timeout and job_timeout > 0 else None
+    try:
+        if job.job_type == "llm_analysis":
+            complete_job = (job.id, job.receipt) if queue.transactional else None
+            result = analyze_news_event(
+                job.news_event_id, complete_job=complete_job, persist=False, deadline=deadline
             )
-            _mark_done(conn, job.id)
-        except Exception as exc:  # noqa: BLE001
-            error_message = str(exc)
+            duration_ms = int((time.monotonic() - start_time) * 1000)
+            if result.get("status") == "succeeded":
+                result["duration_ms"] = duration_ms
+                return result
+            error_message = result.get("error_message", "analysis_failed")
+            if "circuit_open" in error_message:
+                _wait_for_breaker(queue, job, logger)
+                return None
             retryable = _is_retryable_error(error_message)
-            _mark_failed(conn, job, error_message, retryable, max_attempts, run_after_column)
+            _mark_failed(queue, job, error_message, retryable, logger)
             logger.error(
-                "job_failed job_id=%s news_event_id=%s attempts=%s retryable=%s error=%s",
+                "job_failed job_id=%s news_event_id=%s attempts=%s retryable=%s provider=%s error=%s duration_ms=%s",
                 job.id,
                 job.news_event_id,
                 job.attempts + 1,
                 retryable,
+                result.get("provider"),
                 error_message,
+                duration_ms,
             )
+            return None
+
+        with pooled_connection() as conn:
+            event_id, news_id, _title = _load_news_event(conn, job.news_event_id)
+        duration_ms = int((time.monotonic() - start_time) * 1000)
+        logger.info(
+            "job_done job_id=%s news_event_id=%s attempts=%s duration_ms=%s",
+            job.id,
+            event_id,
+            job.attempts + 1,
+            duration_ms,
+        )
+        queue.mark_done(job)
+    except Exception as exc:  # noqa: BLE001
+        error_message = str(exc)
+        retryable = _is_retryable_error(error_message)
+        _mark_failed(queue, job, error_message, retryable, logger)
+        logger.error(
+            "job_failed job_id=%s news_event_id=%s attempts=%s retryable=%s error=%s",
+            job.id,
+            job.news_event_id,
+            job.attempts + 1,
+            retryable,
+            error_message,
+        )
 
 
-def _get_run_after_column(conn) -> str:
-    sql = (
-        "SELECT column_name "
-        "FROM information_schema.columns "
-        "WHERE table_name = 'analysis_jobs' AND column_name IN ('run_after','next_run_at')"
+def _run_pooled_job(
+    queue: JobQueue,
+    job: JobRow,
+    logger: logging.Logger,
+    lease: LeaseHeartbeat | None = None,
+    job_timeout: float | None = None,
+) -> None:
+    """Thread-pool entry point for one job."""
+    try:
+        _process_jobs(queue, [job], logger, lease, job_timeout)
+    except Exception as exc:  # noqa: BLE001
+        # The job keeps its claim and is picked up again by stuck-job recovery.
+        logger.error("job_state_update_failed job_id=%s error=%s", job.id, exc)
+
+
+def _report_overrun(job: JobRow, job_timeout: float, logger: logging.Logger) -> None:
+    # The LLM call is cut to the job's deadline, so an overrun is a slow database step or a
+    # provider ignoring its timeout. The job keeps its claim: releasing it while the call is
+    # still running would let another worker pay for the same LLM call.
+    logger.warning(
+        "job_overrun job_id=%s news_event_id=%s attempts=%s timeout_seconds=%g",
+        job.id,
+        job.news_event_id,
+        job.attempts + 1,
+        job_timeout,
+    )
+
+
+def _build_governor(args: argparse.Namespace, logger: logging.Logger) -> LLMGovernor | None:
+    if args.llm_rpm <= 0 and args.llm_tpm <= 0 and args.breaker_failures <= 0:
+        return None
+    provider, model = configured_model()
+    return LLMGovernor(
+        connect,
+        provider,
+        model,
+        requests_per_minute=args.llm_rpm,
+        tokens_per_minute=args.llm_tpm,
+        failure_threshold=args.breaker_failures,
+        open_seconds=args.breaker_open_seconds,
+        logger=logger,
     )
-    with conn.cursor() as cursor:
-        cursor.execute(sql)
-        columns = {row[0] for row in cursor.fetchall()}
-    if "run_after" in columns:
-        return "run_after"
-    if "next_run_at" in columns:
-        return "next_run_at"
-    raise RuntimeError("analysis_jobs missing run_after/next_run_at column")
 
 
 def main() -> int:
@@ -271,29 +452,125 @@ def main() -> int:
         worker_id = f"{socket.gethostname()}:{os.getpid()}"
 
     poll_seconds = int(os.getenv("WORKER_POLL_SECONDS", str(args.poll_interval)))
-    visibility_timeout = int(os.getenv("WORKER_VISIBILITY_TIMEOUT_SECONDS", "300"))
+    visibility_timeout = args.visibility_timeout
     max_attempts = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
 
-    with _connect_db() as conn:
-        run_after_column = _get_run_after_column(conn)
+    queue = create_queue(
+        args.queue_backend,
+        connect=connect,
+        max_attempts=max_attempts,
+        redis_url=args.redis_url,
+        listen=args.listen and not args.once,
+        logger=logger,
+    )
+
+    # One pooled connection per job slot plus one for the main loop's outbox sweep; analyses
+    # borrow from it instead of reconnecting and hand it back during the LLM call.
+    configure_pool(args.concurrency + 1)
+    governor = _build_governor(args, logger)
+    set_governor(governor)
+
+    lease = LeaseHeartbeat(queue, worker_id, interval=args.heartbeat_interval, logger=logger)
+    lease.start()
+
+    pool = (
+        JobPool(args.concurrency, job_timeout=args.job_timeout) if args.concurrency > 1 else None
+    )
+
+    fifo = FifoSchedule(args.fifo_every)
+
+    def _idle_wait(seconds: float) -> None:
+        if pool is not None:
+            # Wake in time to report jobs that overrun their timeout.
+            until_deadline = pool.seconds_until_deadline()
+            if until_deadline is not None:
+                seconds = min(seconds, max(until_deadline, 0.01))
+        queue.wait(seconds)
+
+    def _llm_paused() -> bool:
+        """While the provider's breaker is open, leave jobs queued rather than failing them."""
+        paused = governor.paused_for() if governor is not None else 0.0
+        if paused <= 0:
+            return False
+        logger.info("worker_llm_paused name=%s seconds=%.1f", governor.name, paused)
+        if not args.once:
+            _idle_wait(min(paused, max(poll_seconds, 1)))
+        return True
+
+    def _overrun(job: JobRow) -> None:
+        _report_overrun(job, args.job_timeout, logger)
 
-        while running["value"]:
-            recovered = _recover_stuck_jobs(conn, visibility_timeout)
+    next_recover_at = 0.0
+    while running["value"]:
+        if time.monotonic() >= next_recover_at:
+            recovered = queue.recover_stuck(visibility_timeout, worker_id)
             if recovered:
                 logger.info("worker_recovered_jobs count=%s", recovered)
-
-            jobs = _claim_jobs(conn, args.batch_size, worker_id, max_attempts, run_after_column)
-            if not jobs:
+            if not queue.transactional:
+                _sweep_outbox(queue, logger)
+            next_recover_at = time.monotonic() + args.recover_interval
+
+        if pool is not None:
+            for job in pool.expire():
+                _overrun(job)
+            slots = pool.free_slots()
+            if slots <= 0:
+                pool.wait(max(poll_seconds, 1))
+                continue
+            if _llm_paused():
                 if args.once:
                     break
-                time.sleep(max(poll_seconds, 1))
                 continue
+            # Only claim what can start now; extra claims would sit 'running' unworked.
+            jobs = queue.claim(slots, worker_id, oldest_first=fifo.oldest_first())
+            lease.add(job.id for job in jobs)
+            for job in jobs:
+                pool.submit(
+                    job, lambda claimed: _run_pooled_job(queue, claimed, logger, lease, args.job_timeout)
+                )
+            if args.once:
+                break
+            if not jobs:
+                _idle_wait(max(poll_seconds, 1))
+            continue
 
-            _process_jobs(conn, jobs, logger, max_attempts, run_after_column)
+        if _llm_paused():
+            if args.once:
+                break
+            continue
 
+        jobs = queue.claim(args.batch_size, worker_id, oldest_first=fifo.oldest_first())
+        if not jobs:
             if args.once:
                 break
+            _idle_wait(max(poll_seconds, 1))
+            continue
+
+        lease.add(job.id for job in jobs)
+        _process_jobs(
+            queue,
+            jobs,
+            logger,
+            lease,
+            args.job_timeout,
+            persist_every=args.persist_every,
+            persist_seconds=args.persist_seconds,
+        )
+
+        if args.once:
+            break
+
+    if pool is not None:
+        logger.info("worker_draining in_flight=%s", pool.in_flight)
+        pool.drain(_overrun)
+        pool.shutdown()
 
+    lease.stop()
+    queue.close()
+    if governor is not None:
+        set_governor(None)
+        governor.close()
+    close_pool()
     return 0
 
 
@@ -1,11 +1,54 @@
 from __future__ import annotations
 
 import os
+import threading
+from typing import Any, Callable
 
 from llm.gemini_client import GeminiClient
-from llm.interface import LLMClient
+from llm.governor import LLMGovernor
+from llm.interface import LLMClient, LLMProvider
 from llm.openai_client import OpenAIClient
 
+_governor: LLMGovernor | None = None
+# SDK clients hold HTTP connection pools and are safe to share between threads, so one per
+# configuration is built and reused. LLMClient keeps per-call state and stays per call.
+_providers: dict[tuple, LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def set_governor(governor: LLMGovernor | None) -> None:
+    """Route clients from :func:`load_llm_client` through ``governor`` when its provider and model match."""
+    global _governor
+    _governor = governor
+
+
+def get_governor() -> LLMGovernor | None:
+    """The governor installed by :func:`set_governor`, if any."""
+    return _governor
+
+
+def _cached_provider(key: tuple, build: Callable[[], Any]) -> LLMProvider:
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = build()
+            _providers[key] = provider
+        return provider
+
+
+def clear_llm_clients() -> None:
+    """Drop cached SDK clients (e.g. after rotating API keys)."""
+    with _providers_lock:
+        _providers.clear()
+
+
+def configured_model(provider_override: str | None = None) -> tuple[str, str]:
+    """``(provider, model)`` that :func:`load_llm_client` will use."""
+    provider = (provider_override or os.getenv("LLM_PROVIDER", "openai")).lower()
+    if provider == "openai":
+        return provider, os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    return "gemini", os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
+
 
 def load_llm_client(
     *,
@@ -13,24 +56,24 @@ def load_llm_client(
     openai_cls=OpenAIClient,
     gemini_cls=GeminiClient,
 ) -> LLMClient:
-    provider = (provider_override or os.getenv("LLM_PROVIDER", "openai")).lower()
+    provider, model = configured_model(provider_override)
     timeout_seconds = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
     if timeout_seconds <= 0:
         timeout_seconds = 20.0
     max_retries = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    governor = _governor if _governor is not None and _governor.matches(provider, model) else None
 
     if provider == "openai":
         api_key = os.getenv("OPENAI_API_KEY")
-        model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-        client = openai_cls(api_key=api_key, model=model)
-        return LLMClient(client, timeout_seconds, max_retries)
-
-    if provider != "gemini":
-        provider = "gemini"
+        client = _cached_provider(
+            (openai_cls, api_key, model),
+            lambda: openai_cls(api_key=api_key, model=model),
+        )
+        return LLMClient(client, timeout_seconds, max_retries, governor)
 
     api_key = os.getenv("GOOGLE_API_KEY")
-    model = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
-    client = gemini_cls(api_key=api_key, model=model, timeout_seconds=timeout_seconds)
-    return LLMClient(client, timeout_seconds, max_retries)
-
-    # unreachable
+    client = _cached_provider(
+        (gemini_cls, api_key, model, timeout_seconds),
+        lambda: gemini_cls(api_key=api_key, model=model, timeout_seconds=timeout_seconds),
+    )
+    return LLMClient(client, timeout_seconds, max_retries, governor)
@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 
 from google import genai
+from google.genai import types
 
 from llm.interface import LLMProviderResponse
 
@@ -25,15 +26,23 @@ class GeminiClient:
         if not api_key:
             raise ValueError("GOOGLE_API_KEY is required")
         self.model = model
+        self._timeout_seconds = timeout_seconds
         # google-genai HttpOptions expects milliseconds; convert seconds -> ms
         timeout_ms = int(timeout_seconds * 1000)
         self._client = genai.Client(api_key=api_key, http_options={"timeout": timeout_ms})
 
     def generate(self, prompt: str, timeout_seconds: int) -> LLMProviderResponse:
         logger = logging.getLogger(__name__)
+        config = None
+        if timeout_seconds < self._timeout_seconds:
+            # A job deadline left less time than the client default.
+            config = types.GenerateContentConfig(
+                http_options=types.HttpOptions(timeout=int(timeout_seconds * 1000))
+            )
         response = self._client.models.generate_content(
             model=self.model,
             contents=prompt,
+            config=config,
         )
         response_dict = _response_to_dict(response)
         text = getattr(response, "text", None)
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+import psycopg2
+
+from ingestion.rate_limiter import PostgresTokenBucket
+from llm.interface import CircuitOpenError, DeadlineExceededError
+
+# Prompt tokens are estimated before the call (~4 characters per token) and corrected
+# from the provider's usage report afterwards.
+CHARS_PER_TOKEN = 4
+DEFAULT_OUTPUT_TOKENS = 300
+
+# Errors that say the provider (not the request) is in trouble: throttling, overload, 5xx
+# and network failures. Only these count against the circuit breaker.
+_OUTAGE_MARKERS = (
+    "429",
+    "too many requests",
+    "rate limit",
+    "rate_limit",
+    "resource_exhausted",
+    "overloaded",
+    "internal server error",
+    "502",
+    "503",
+    "504",
+    "service unavailable",
+    "timeout",
+    "timed out",
+    "connection",
+)
+
+
+def is_outage_error(error: BaseException | str) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    lowered = str(error).lower()
+    return any(marker in lowered for marker in _OUTAGE_MARKERS)
+
+
+def estimate_tokens(prompt: str, expected_output_tokens: int = DEFAULT_OUTPUT_TOKENS) -> int:
+    return len(prompt) // CHARS_PER_TOKEN + 1 + expected_output_tokens
+
+
+def usage_tokens(response: dict[str, Any] | None) -> int | None:
+    """Total tokens reported by OpenAI (``usage``) or Gemini (``usage_metadata``), if any."""
+    if not isinstance(response, dict):
+        return None
+    usage = response.get("usage")
+    if isinstance(usage, dict) and usage.get("total_tokens") is not None:
+        return int(usage["total_tokens"])
+    metadata = response.get("usage_metadata")
+    if isinstance(metadata, dict) and metadata.get("total_token_count") is not None:
+        return int(metadata["total_token_count"])
+    return None
+
+
+class LLMGovernor:
+    """Request and token budgets plus a circuit breaker for one LLM provider and model.
+
+    State lives in Postgres so every worker calling the same model shares it:
+
+    - ``rate_limit_buckets`` rows ``llm:<provider>:<model>:requests`` / ``:tokens`` enforce
+      requests and tokens per minute (the same buckets ingestion uses for Finnhub). Token
+      reservations use an estimate and are corrected once the provider reports usage.
+    - ``llm_circuit_breakers`` counts consecutive outage errors (429, 5xx, timeouts). At
+      ``failure_threshold`` the breaker opens for ``open_seconds``: calls fail fast with
+      :class:`CircuitOpenError` and workers stop claiming (:meth:`paused_for`). After that a
+      single call probes the provider; success closes the breaker, failure re-opens it.
+
+    A ``requests_per_minute`` / ``tokens_per_minute`` of 0 and a ``failure_threshold`` of 0
+    disable that part. The governor fails open: if its own DB calls fail the LLM call goes
+    ahead unthrottled.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        provider: str,
+        model: str,
+        *,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        failure_threshold: int = 5,
+        open_seconds: float = 60.0,
+        expected_output_tokens: int = DEFAULT_OUTPUT_TOKENS,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        if requests_per_minute < 0 or tokens_per_minute < 0:
+            raise ValueError("rate limits must not be negative")
+        if open_seconds <= 0:
+            raise ValueError("open_seconds must be positive")
+        self._connect = connect
+        self.provider = provider
+        self.model = model
+        self.name = f"{provider}:{model}"
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.expected_output_tokens = expected_output_tokens
+        self.check_interval = check_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._requests: PostgresTokenBucket | None = None
+        self._tokens: PostgresTokenBucket | None = None
+        self._paused_until = 0.0
+        self._checked_at: float | None = None
+
+    def matches(self, provider: str, model: str) -> bool:
+        return provider == self.provider and model == self.model
+
+    def _connection(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = self._connect()
+            self._requests = (
+                PostgresTokenBucket(self._conn, f"llm:{self.name}:requests", self.requests_per_minute)
+                if self.requests_per_minute > 0
+                else None
+            )
+            self._tokens = (
+                # A few requests' worth of burst; a default of rate/10 could be smaller than one prompt.
+                PostgresTokenBucket(
+                    self._conn,
+                    f"llm:{self.name}:tokens",
+                    self.tokens_per_minute,
+                    capacity=max(self.tokens_per_minute / 10.0, 4.0 * self.expected_output_tokens),
+                )
+                if self.tokens_per_minute > 0
+                else None
+            )
+        return self._conn
+
+    def _call(self, operation: str, func: Callable[[Any], Any], default: Any) -> Any:
+        """Run ``func(conn)`` under the lock; on a DB error log, reconnect next time and return ``default``."""
+        with self._lock:
+            try:
+                return func(self._connection())
+            except psycopg2.Error as exc:
+                self._logger.warning("llm_governor_db_error name=%s op=%s error=%s", self.name, operation, exc)
+                if self._conn is not None:
+                    try:
+                        self._conn.close()
+                    except psycopg2.Error:
+                        pass
+                self._conn = None
+                return default
+
+    def _breaker_state(self, conn) -> tuple[str, float]:
+        """``(state, seconds left in the open period)``."""
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT state, EXTRACT(EPOCH FROM opened_until - clock_timestamp()) "
+                "FROM llm_circuit_breakers WHERE name = %s",
+                (self.name,),
+            )
+            row = cursor.fetchone()
+        conn.commit()
+        if row is None:
+            return "closed", 0.0
+        return row[0], max(float(row[1] or 0.0), 0.0)
+
+    def _remember_pause(self, seconds: float) -> None:
+        now = self._clock()
+        self._checked_at = now
+        self._paused_until = now + seconds
+
+    def paused_for(self) -> float:
+        """Seconds until the breaker lets calls through (0 when closed or a probe is due).
+
+        Cached for ``check_interval`` seconds so a claim loop does not query on every pass.
+        """
+        if self.failure_threshold <= 0:
+            return 0.0
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            state, remaining = self._call("breaker_check", self._breaker_state, ("closed", 0.0))
+            self._remember_pause(remaining if state == "open" else 0.0)
+        return max(self._paused_until - self._clock(), 0.0)
+
+    def _claim_probe(self, conn) -> bool:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE llm_circuit_breakers SET "
+                "opened_until = clock_timestamp() + (%s || ' seconds')::interval, "
+                "updated_at = clock_timestamp() "
+                "WHERE name = %s AND state = 'open' AND opened_until <= clock_timestamp()",
+                (self.open_seconds, self.name),
+            )
+            claimed = cursor.rowcount == 1
+        conn.commit()
+        return claimed
+
+    def _check_breaker(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+        state, remaining = self._call("breaker_check", self._breaker_state, ("closed", 0.0))
+        if state != "open":
+            self._remember_pause(0.0)
+            return
+        if remaining > 0:
+            self._remember_pause(remaining)
+            raise CircuitOpenError(f"circuit open for {self.name}, retry in {remaining:.0f}s")
+        # The open period is over: exactly one caller probes, the others keep waiting.
+        if not self._call("breaker_probe", self._claim_probe, True):
+            self._remember_pause(self.open_seconds)
+            raise CircuitOpenError(f"circuit open for {self.name}, probe in progress")
+        self._logger.info("llm_circuit_probe name=%s", self.name)
+
+    def acquire(self, prompt: str, *, max_wait: float | None = None) -> int:
+        """Pass the breaker and wait for budget before one call; returns the tokens reserved.
+
+        Raises :class:`CircuitOpenError` while the breaker is open, and
+        :class:`DeadlineExceededError` (with the reservation handed back) when the budget
+        frees up more than ``max_wait`` seconds from now.
+        """
+        self._check_breaker()
+        reserved = estimate_tokens(prompt, self.expected_output_tokens) if self.tokens_per_minute > 0 else 0
+
+        def _reserve(_conn) -> float:
+            wait_seconds = 0.0
+            if self._requests is not None:
+                wait_seconds = max(wait_seconds, self._requests.reserve())
+            if self._tokens is not None:
+                wait_seconds = max(wait_seconds, self._tokens.reserve(reserved))
+            return wait_seconds
+
+        def _refund(_conn) -> None:
+            if self._requests is not None:
+                self._requests.reserve(-1.0)
+            if self._tokens is not None:
+                self._tokens.reserve(-reserved)
+
+        wait_seconds = self._call("reserve", _reserve, 0.0)
+        if max_wait is not None and wait_seconds > max_wait:
+            self._call("refund", _refund, None)
+            raise DeadlineExceededError(f"{self.name} budget frees up in {wait_seconds:.1f}s, past the deadline")
+        if wait_seconds > 0:
+            self._logger.debug("llm_governor_wait name=%s seconds=%.2f", self.name, wait_seconds)
+            self._sleep(wait_seconds)
+        return reserved
+
+    def record_success(self, reserved_tokens: int, response: dict[str, Any] | None = None) -> None:
+        """The provider answered: close the breaker and settle the token reservation."""
+        used = usage_tokens(response)
+
+        def _settle(conn) -> None:
+            if self._tokens is not None and used is not None and used != reserved_tokens:
+                self._tokens.reserve(used - reserved_tokens)
+            if self.failure_threshold > 0:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "UPDATE llm_circuit_breakers SET state = 'closed', consecutive_failures = 0, "
+                        "opened_until = NULL, updated_at = clock_timestamp() "
+                        "WHERE name = %s AND (state <> 'closed' OR consecutive_failures > 0) "
+                        "RETURNING 1",
+                        (self.name,),
+                    )
+                    closed = cursor.fetchone() is not None
+                conn.commit()
+                if closed:
+                    self._logger.info("llm_circuit_closed name=%s", self.name)
+
+        self._call("record_success", _settle, None)
+        if self._paused_until > self._clock():
+            self._remember_pause(0.0)
+
+    def record_failure(self, error: BaseException | str) -> None:
+        """Count an outage-type error; opens the breaker at ``failure_threshold``."""
+        if self.failure_threshold <= 0 or isinstance(error, CircuitOpenError) or not is_outage_error(error):
+            return
+        # The row lock taken by ON CONFLICT DO UPDATE serializes concurrent failures.
+        sql = (
+            "INSERT INTO llm_circuit_breakers "
+            "(name, state, consecutive_failures, opened_until, last_error, updated_at) "
+            "VALUES (%s, CASE WHEN %s <= 1 THEN 'open' ELSE 'closed' END, 1, "
+            "CASE WHEN %s <= 1 THEN clock_timestamp() + (%s || ' seconds')::interval END, "
+            "%s, clock_timestamp()) "
+            "ON CONFLICT (name) DO UPDATE SET "
+            "consecutive_failures = llm_circuit_breakers.consecutive_failures + 1, "
+            "state = CASE WHEN llm_circuit_breakers.consecutive_failures + 1 >= %s "
+            "  THEN 'open' ELSE llm_circuit_breakers.state END, "
+            "opened_until = CASE WHEN llm_circuit_breakers.consecutive_failures + 1 >= %s "
+            "  THEN clock_timestamp() + (%s || ' seconds')::interval "
+            "  ELSE llm_circuit_breakers.opened_until END, "
+            "last_error = EXCLUDED.last_error, updated_at = clock_timestamp() "
+            "RETURNING state, consecutive_failures"
+        )
+        message = str(error)[:500]
+
+        def _count(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    sql,
+                    (
+                        self.name,
+                        self.failure_threshold,
+                        self.failure_threshold,
+                        self.open_seconds,
+                        message,
+                        self.failure_threshold,
+                        self.failure_threshold,
+                        self.open_seconds,
+                    ),
+                )
+                row = cursor.fetchone()
+            conn.commit()
+            return row
+
+        row = self._call("record_failure", _count, None)
+        if row is not None and row[0] == "open":
+            self._remember_pause(self.open_seconds)
+            self._logger.warning(
+                "llm_circuit_open name=%s failures=%s open_seconds=%s error=%s",
+                self.name,
+                row[1],
+                self.open_seconds,
+                message,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
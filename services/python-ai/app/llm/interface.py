@@ -2,12 +2,16 @@ from __future__ import annotations
 
 import json
 import logging
+import random
 import time
 from dataclasses import dataclass
-from typing import Any, Iterable, Protocol
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Protocol
 
 from pydantic import BaseModel, Field, ValidationError, field_validator
 
+if TYPE_CHECKING:
+    from llm.governor import LLMGovernor
+
 
 class AnalysisResult(BaseModel):
     tickers: list[str] = Field(default_factory=list)
@@ -96,6 +100,20 @@ class ProviderError(RuntimeError):
         self.code = code
 
 
+class CircuitOpenError(ProviderError):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+    def __init__(self, message: str):
+        super().__init__(message, code="circuit_open")
+
+
+class DeadlineExceededError(ProviderError):
+    """Raised instead of waiting for budget past the caller's deadline."""
+
+    def __init__(self, message: str):
+        super().__init__(message, code="deadline_exceeded")
+
+
 def build_prompt(input_text: str) -> str:
     return (
         "You are a financial news analyst. "
@@ -127,11 +145,54 @@ def parse_analysis_json(text: str) -> tuple[AnalysisResult, dict[str, Any]]:
     return AnalysisResult.model_validate(payload), payload
 
 
+# Backoff before retrying a provider error: full jitter over an exponential ceiling, unless
+# the provider sent Retry-After.
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 30.0
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """Seconds from the provider's Retry-After hint on an SDK error, if it sent one."""
+    value = getattr(error, "retry_after", None)
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if value is None and headers is not None:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay_seconds(
+    attempt: int,
+    error: BaseException,
+    *,
+    jitter: Callable[[], float] = random.random,
+) -> float:
+    """Wait before retry number ``attempt`` (1-based) after the provider raised ``error``."""
+    hint = retry_after_seconds(error)
+    if hint is not None:
+        return min(hint, RETRY_MAX_SECONDS)
+    return jitter() * min(RETRY_BASE_SECONDS * 2 ** (attempt - 1), RETRY_MAX_SECONDS)
+
+
 class LLMClient:
-    def __init__(self, provider: LLMProvider, timeout_seconds: int, max_retries: int):
+    def __init__(
+        self,
+        provider: LLMProvider,
+        timeout_seconds: int,
+        max_retries: int,
+        governor: LLMGovernor | None = None,
+        *,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self._provider = provider
         self._timeout_seconds = timeout_seconds
         self._max_retries = max_retries
+        self._governor = governor
+        self._sleep = sleep
+        self._clock = clock
         self.last_attempts: list[LLMRunAttempt] = []
         self.last_request: dict[str, Any] | None = None
         self.last_raw_output: dict[str, Any] | None = None
@@ -144,7 +205,16 @@ class LLMClient:
     def model(self) -> str:
         return self._provider.model
 
-    def analyze_news(self, input_text: str) -> AnalysisResult:
+    def _time_left(self, deadline: float | None) -> float | None:
+        return None if deadline is None else deadline - self._clock()
+
+    def analyze_news(self, input_text: str, *, deadline: float | None = None) -> AnalysisResult:
+        """Analyze ``input_text``, retrying up to ``max_retries`` times.
+
+        ``deadline`` is a ``clock()`` time the whole call must end by: each provider call's
+        timeout is cut to the time left, and a retry or budget wait that would run past it
+        fails the analysis instead.
+        """
         self.last_attempts = []
         self.last_request = None
         self.last_raw_output = None
@@ -152,9 +222,19 @@ class LLMClient:
         retry_prompt = build_retry_prompt(input_text)
         logger = logging.getLogger(__name__)
 
+        retry_delay = 0.0
         for attempt in range(self._max_retries + 1):
-            if attempt > 0:
-                time.sleep(2)
+            # Output errors (bad JSON, schema) retry at once; the governor already paces calls.
+            # While the governor's breaker is open the next call fails fast, so don't wait for it.
+            time_left = self._time_left(deadline)
+            if retry_delay > 0 and not (self._governor is not None and self._governor.paused_for() > 0):
+                if time_left is not None and retry_delay >= time_left:
+                    raise LLMAnalysisError("LLM analysis deadline exceeded", self.last_attempts)
+                self._sleep(retry_delay)
+                time_left = self._time_left(deadline)
+            if time_left is not None and time_left <= 0:
+                raise LLMAnalysisError("LLM analysis deadline exceeded", self.last_attempts)
+            retry_delay = 0.0
             prompt = prompts[0] if attempt == 0 else retry_prompt
             self.last_request = {
                 "prompt": prompt,
@@ -176,7 +256,21 @@ class LLMClient:
                     self.model,
                     attempt + 1,
                 )
-                provider_response = self._provider.generate(prompt, self._timeout_seconds)
+                reserved_tokens = (
+                    self._governor.acquire(prompt, max_wait=time_left) if self._governor is not None else 0
+                )
+                time_left = self._time_left(deadline)
+                timeout_seconds = self._timeout_seconds
+                if time_left is not None:
+                    timeout_seconds = min(timeout_seconds, time_left)
+                try:
+                    provider_response = self._provider.generate(prompt, timeout_seconds)
+                except Exception as exc:
+                    if self._governor is not None:
+                        self._governor.record_failure(exc)
+                    raise
+                if self._governor is not None:
+                    self._governor.record_success(reserved_tokens, provider_response.response)
                 output_text = provider_response.output_text
                 response_payload = provider_response.response
                 result, output_json = parse_analysis_json(output_text)
@@ -221,13 +315,16 @@ class LLMClient:
                     error,
                     (output_text or "")[:200],
                 )
-                if exc.code == "insufficient_quota":
+                # Retrying now would hit the same wall; let the job's backoff handle it.
+                if exc.code in {"insufficient_quota", "circuit_open", "deadline_exceeded"}:
                     raise LLMAnalysisError("LLM analysis failed", self.last_attempts)
+                retry_delay = retry_delay_seconds(attempt + 1, exc)
                 continue
             except (json.JSONDecodeError, ValidationError, ValueError) as exc:
                 error = str(exc)
             except Exception as exc:  # noqa: BLE001
                 error = f"provider_error: {exc}"
+                retry_delay = retry_delay_seconds(attempt + 1, exc)
 
             self.last_attempts.append(
                 LLMRunAttempt(
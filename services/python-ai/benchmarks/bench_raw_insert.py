@@ -0,0 +1,95 @@
+"""Compare the execute_values and COPY paths of ingestion.raw_store.insert_raw_items.
+
+Requires a database with the SentinelStream schema and the POSTGRES_* env vars:
+
+    PYTHONPATH=services/python-ai/app \\
+      python services/python-ai/benchmarks/bench_raw_insert.py --rows 50000
+
+Each path loads the same synthetic payloads into its own throwaway source, first as fresh
+inserts and then again as unchanged duplicates. Rows are deleted afterwards.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import psycopg2
+from dotenv import load_dotenv
+
+from ingestion.raw_store import insert_raw_items
+
+
+def _connect():
+    return psycopg2.connect(
+        host=os.getenv("POSTGRES_HOST"),
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+        dbname=os.getenv("POSTGRES_DB"),
+        user=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+    )
+
+
+def _make_items(count: int) -> list[dict]:
+    now = int(time.time())
+    return [
+        {
+            "category": "company",
+            "datetime": now - index,
+            "headline": f"Synthetic headline {index}",
+            "id": index,
+            "related": "AAPL",
+            "source": "bench",
+            "summary": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            "url": f"https://example.com/news/{index}?utm_source=bench",
+        }
+        for index in range(count)
+    ]
+
+
+def _timed(conn, source: str, items: list[dict], bulk_threshold: int) -> tuple[float, tuple[int, int, int]]:
+    start = time.perf_counter()
+    counts = insert_raw_items(
+        conn,
+        source,
+        uuid4(),
+        datetime.now(timezone.utc),
+        items,
+        bulk_threshold=bulk_threshold,
+    )
+    return time.perf_counter() - start, counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+    load_dotenv()
+
+    items = _make_items(args.rows)
+    paths = {
+        "execute_values": args.rows + 1,
+        "copy": 0,
+    }
+    with _connect() as conn:
+        for label, threshold in paths.items():
+            source = f"bench-{label}-{uuid4().hex[:8]}"
+            try:
+                fresh_seconds, fresh_counts = _timed(conn, source, items, threshold)
+                repeat_seconds, repeat_counts = _timed(conn, source, items, threshold)
+            finally:
+                with conn.cursor() as cursor:
+                    cursor.execute("DELETE FROM raw_news_items WHERE source = %s", (source,))
+                conn.commit()
+            print(
+                f"{label:15s} rows={args.rows} "
+                f"insert={fresh_seconds:.2f}s ({args.rows / fresh_seconds:,.0f} rows/s) counts={fresh_counts} "
+                f"unchanged={repeat_seconds:.2f}s ({args.rows / repeat_seconds:,.0f} rows/s) counts={repeat_counts}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
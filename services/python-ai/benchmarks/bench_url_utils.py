@@ -0,0 +1,74 @@
+"""Compare per-item URL work before and after the cached canonicalization in ingestion.url_utils.
+
+No database needed:
+
+    PYTHONPATH=services/python-ai/app \\
+      python services/python-ai/benchmarks/bench_url_utils.py --items 100000
+
+"legacy" repeats what staging plus normalization used to do for every item. It canonicalized
+in raw_store, again in normalize_finnhub, and a third time inside generate_news_id before
+hashing. "cached" is the current path: canonicalize_url in raw_store plus one resolve_url in
+the normalizer. Both run cold (empty caches) and warm (replaying the same items).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import time
+
+from ingestion import url_utils
+
+
+def _make_urls(count: int) -> list[str]:
+    urls = []
+    for index in range(count):
+        if index % 2:
+            urls.append(f"https://Example.com/news/{index}/?utm_source=feed&id={index}&a=1")
+        else:
+            urls.append(f"https://example.com/news/{index}")
+    return urls
+
+
+def _legacy(source: str, url: str) -> tuple[str, str]:
+    url_utils._canonicalize(url)
+    canonical_url = url_utils._canonicalize(url)
+    raw = f"{source}|{url_utils._canonicalize(canonical_url)}"
+    return canonical_url, hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cached(source: str, url: str) -> tuple[str, str]:
+    url_utils.canonicalize_url(url)
+    resolved = url_utils.resolve_url(source, url)
+    return resolved.url, resolved.news_id
+
+
+def _timed(func, urls: list[str]) -> float:
+    start = time.perf_counter()
+    for url in urls:
+        func("finnhub", url)
+    return time.perf_counter() - start
+
+
+def _clear_caches() -> None:
+    url_utils._canonicalize_cached.cache_clear()
+    url_utils.resolve_url.cache_clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark URL canonicalization paths")
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+
+    urls = _make_urls(args.items)
+    assert all(_legacy("finnhub", url) == _cached("finnhub", url) for url in urls[:1000])
+    _clear_caches()
+
+    legacy = _timed(_legacy, urls)
+    cold = _timed(_cached, urls)
+    warm = _timed(_cached, urls)
+    for label, elapsed in (("legacy", legacy), ("cached-cold", cold), ("cached-warm", warm)):
+        print(f"{label:12s} items={args.items} seconds={elapsed:.3f} items_per_sec={args.items / elapsed:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,3 +23,19 @@ def test_load_gemini_provider(monkeypatch):
     monkeypatch.setenv("GOOGLE_API_KEY", "test")
     client = load_llm_client(provider_override=None, openai_cls=StubProvider, gemini_cls=StubProvider)
     assert client.provider_name == "stub"
+
+
+def test_sdk_client_is_reused_between_calls(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_MODEL", "reuse-model")
+    first = load_llm_client(openai_cls=StubProvider, gemini_cls=StubProvider)
+    second = load_llm_client(openai_cls=StubProvider, gemini_cls=StubProvider)
+    # The SDK client is shared; the LLMClient wrapper (per-call state) is not.
+    assert first is not second
+    assert first._provider is second._provider
+
+    monkeypatch.setenv("OPENAI_MODEL", "other-model")
+    third = load_llm_client(openai_cls=StubProvider, gemini_cls=StubProvider)
+    assert third._provider is not first._provider
+    assert third.model == "other-model"
@@ -1,6 +1,14 @@
 import pytest
 
-from llm.interface import LLMClient, LLMProvider, AnalysisResult
+from llm.interface import (
+    RETRY_MAX_SECONDS,
+    AnalysisResult,
+    LLMAnalysisError,
+    LLMClient,
+    LLMProvider,
+    LLMProviderResponse,
+    retry_delay_seconds,
+)
 
 
 class FakeProvider:
@@ -39,3 +47,67 @@ def test_retry_on_schema_error_then_success():
     result = client.analyze_news("Title: Example")
     assert result.confidence == 0.7
     assert len(client.last_attempts) == 2
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429 too many requests")
+        self.retry_after = retry_after
+
+
+class ScriptedProvider:
+    name = "fake"
+    model = "fake-model"
+
+    def __init__(self, outputs):
+        self._outputs = list(outputs)
+        self.timeouts = []
+
+    def generate(self, prompt: str, timeout_seconds: int) -> LLMProviderResponse:
+        self.timeouts.append(timeout_seconds)
+        next_item = self._outputs.pop(0)
+        if isinstance(next_item, Exception):
+            raise next_item
+        return LLMProviderResponse(output_text=next_item, response=None)
+
+
+GOOD = '{"tickers":[],"sentiment":"neutral","confidence":0.5,"reasoning_summary":"No clear impact."}'
+
+
+def test_provider_error_waits_for_retry_after():
+    sleeps = []
+    provider = ScriptedProvider([RateLimited(retry_after="7"), GOOD])
+    client = LLMClient(provider, timeout_seconds=5, max_retries=1, sleep=sleeps.append)
+    assert client.analyze_news("Title: Example").sentiment == "neutral"
+    assert sleeps == [7.0]
+
+
+def test_output_errors_retry_without_waiting():
+    sleeps = []
+    client = LLMClient(ScriptedProvider(["not-json", GOOD]), timeout_seconds=5, max_retries=1, sleep=sleeps.append)
+    assert client.analyze_news("Title: Example").sentiment == "neutral"
+    assert sleeps == []
+
+
+def test_retry_delay_backs_off_exponentially_with_a_cap():
+    error = RateLimited()
+    assert [retry_delay_seconds(attempt, error, jitter=lambda: 1.0) for attempt in (1, 2, 3)] == [1.0, 2.0, 4.0]
+    assert retry_delay_seconds(20, error, jitter=lambda: 1.0) == RETRY_MAX_SECONDS
+    assert retry_delay_seconds(1, RateLimited(retry_after=120)) == RETRY_MAX_SECONDS
+
+
+def test_deadline_caps_the_call_timeout():
+    provider = ScriptedProvider([GOOD])
+    client = LLMClient(provider, timeout_seconds=20, max_retries=0, clock=lambda: 100.0)
+    client.analyze_news("Title: Example", deadline=107.5)
+    assert provider.timeouts == [7.5]
+
+
+def test_retry_that_would_pass_the_deadline_fails_instead_of_waiting():
+    sleeps = []
+    provider = ScriptedProvider([RateLimited(retry_after="7"), GOOD])
+    client = LLMClient(provider, timeout_seconds=5, max_retries=1, sleep=sleeps.append, clock=lambda: 100.0)
+    with pytest.raises(LLMAnalysisError, match="deadline exceeded") as excinfo:
+        client.analyze_news("Title: Example", deadline=105.0)
+    assert sleeps == []
+    assert len(excinfo.value.attempts) == 1
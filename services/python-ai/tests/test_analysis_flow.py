@@ -8,7 +8,8 @@ import psycopg2
 import pytest
 
 from jobs import worker
-from llm.interface import LLMClient, LLMProviderResponse, ProviderError
+from jobs.queue import PostgresJobQueue
+from llm.interface import AnalysisResult, CircuitOpenError, LLMClient, LLMProviderResponse, ProviderError
 import analysis.service as analysis_service
 
 
@@ -119,11 +120,13 @@ def _run_with_provider(monkeypatch, provider, max_retries=2):
     monkeypatch.setattr(analysis_service, "load_llm_client", lambda: client)
 
 
-def _run_worker_once(max_attempts: int = 1):
-    with _db_conn() as conn:
-        run_after_column = worker._get_run_after_column(conn)
-        jobs = worker._claim_jobs(conn, 10, "test", max_attempts, run_after_column)
-        worker._process_jobs(conn, jobs, logging.getLogger("test"), max_attempts, run_after_column)
+def _run_worker_once(max_attempts: int = 1, **options):
+    queue = PostgresJobQueue(_db_conn, max_attempts=max_attempts, listen=False)
+    try:
+        jobs = queue.claim(10, "test")
+        worker._process_jobs(queue, jobs, logging.getLogger("test"), **options)
+    finally:
+        queue.close()
 
 
 def test_happy_path(monkeypatch):
@@ -153,6 +156,60 @@ def test_happy_path(monkeypatch):
         _cleanup(conn, news_event_id)
 
 
+def test_worker_stores_a_batch_of_analyses_with_one_write(monkeypatch):
+    output = '{"tickers":["AAPL"],"sentiment":"positive","confidence":0.8,"reasoning_summary":"Batch."}'
+    provider = FakeProvider([output, output])
+    calls = []
+
+    def _persist(conn, records):
+        records = list(records)
+        calls.append(len(records))
+        return analysis_service.persist_analyses(conn, records)
+
+    monkeypatch.setattr(worker, "persist_analyses", _persist)
+    with _db_conn() as conn:
+        first = _insert_news_event(conn)
+        second = _insert_news_event(conn)
+        _insert_job(conn, first)
+        _insert_job(conn, second)
+    _run_with_provider(monkeypatch, provider, max_retries=0)
+    _run_worker_once(max_attempts=1)
+
+    with _db_conn() as conn:
+        assert calls == [2]
+        assert _fetch_analysis(conn, first)[0] == "succeeded"
+        assert _fetch_analysis(conn, second)[0] == "succeeded"
+        assert _fetch_job_status(conn, first) == "done"
+        assert _fetch_job_status(conn, second) == "done"
+        _cleanup(conn, first)
+        _cleanup(conn, second)
+
+
+def test_worker_flushes_stored_analyses_every_persist_every(monkeypatch):
+    output = '{"tickers":["AAPL"],"sentiment":"positive","confidence":0.8,"reasoning_summary":"Batch."}'
+    provider = FakeProvider([output, output, output])
+    calls = []
+
+    def _persist(conn, records):
+        records = list(records)
+        calls.append(len(records))
+        return analysis_service.persist_analyses(conn, records)
+
+    monkeypatch.setattr(worker, "persist_analyses", _persist)
+    with _db_conn() as conn:
+        events = [_insert_news_event(conn) for _ in range(3)]
+        for news_event_id in events:
+            _insert_job(conn, news_event_id)
+    _run_with_provider(monkeypatch, provider, max_retries=0)
+    _run_worker_once(max_attempts=1, persist_every=2)
+
+    with _db_conn() as conn:
+        assert calls == [2, 1]
+        assert [_fetch_job_status(conn, news_event_id) for news_event_id in events] == ["done"] * 3
+        for news_event_id in events:
+            _cleanup(conn, news_event_id)
+
+
 def test_invalid_json_retries_and_fails(monkeypatch):
     provider = FakeProvider(["not-json", "still-bad", "nope"])
     with _db_conn() as conn:
@@ -225,3 +282,84 @@ def test_non_retryable_error(monkeypatch):
         assert raw_output["error"]
         assert _fetch_job_status(conn, news_event_id) == "failed"
         _cleanup(conn, news_event_id)
+
+
+def test_open_circuit_requeues_without_using_an_attempt(monkeypatch):
+    provider = FakeProvider([CircuitOpenError("circuit open for fake:fake-model, retry in 30s")])
+    with _db_conn() as conn:
+        news_event_id = _insert_news_event(conn)
+        _insert_job(conn, news_event_id)
+    _run_with_provider(monkeypatch, provider, max_retries=2)
+    _run_worker_once(max_attempts=1)
+
+    with _db_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT status, attempts, run_after > NOW() FROM analysis_jobs WHERE news_event_id = %s",
+                (news_event_id,),
+            )
+            assert cursor.fetchone() == ("pending", 0, True)
+        _cleanup(conn, news_event_id)
+
+
+def _insert_running_job(conn, news_event_id: int) -> tuple[int, str]:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO analysis_jobs "
+            "(news_event_id, trace_id, job_type, status, locked_at, locked_by, lease_token) "
+            "VALUES (%s, %s, 'llm_analysis', 'running', NOW(), 'test', gen_random_uuid()) "
+            "RETURNING id, lease_token::text",
+            (news_event_id, str(uuid4())),
+        )
+        job = cursor.fetchone()
+    conn.commit()
+    return job
+
+
+def _record(news_event_id: int, tickers: list[str], job=None) -> analysis_service.AnalysisRecord:
+    return analysis_service.AnalysisRecord(
+        news_event_id=news_event_id,
+        trace_id=str(uuid4()),
+        provider="fake",
+        model="fake-model",
+        result=AnalysisResult(
+            tickers=tickers,
+            sentiment="neutral",
+            confidence=0.5,
+            reasoning_summary="Batch.",
+        ),
+        raw_output={"error": None},
+        job=job,
+    )
+
+
+def test_persist_analyses_writes_batch_with_ticker_diff_and_job_completion():
+    with _db_conn() as conn:
+        first = _insert_news_event(conn)
+        second = _insert_news_event(conn)
+        first_job = _insert_running_job(conn, first)
+        second_job = _insert_running_job(conn, second)
+
+        saved = analysis_service.persist_analyses(
+            conn,
+            [
+                _record(first, ["AAPL", "MSFT"], job=first_job),
+                _record(second, ["TSLA"], job=(second_job[0], str(uuid4()))),  # stale lease: job left alone
+            ],
+        )
+        conn.commit()
+        (first_id, first_done), (second_id, second_done) = saved
+        assert (first_done, second_done) == (True, False)
+        assert _fetch_job_status(conn, first) == "done"
+        assert _fetch_job_status(conn, second) == "running"
+        assert _fetch_analysis_tickers(conn, first_id) == ["AAPL", "MSFT"]
+        assert _fetch_analysis_tickers(conn, second_id) == ["TSLA"]
+
+        [(again_id, _done)] = analysis_service.persist_analyses(conn, [_record(first, ["MSFT", "NVDA"])])
+        conn.commit()
+        assert again_id == first_id
+        assert _fetch_analysis_tickers(conn, first_id) == ["MSFT", "NVDA"]
+        assert _fetch_analysis(conn, first)[0] == "succeeded"
+
+        _cleanup(conn, first)
+        _cleanup(conn, second)
@@ -0,0 +1,21 @@
+from datetime import date, datetime, timezone
+
+from jobs.archive import months_before, months_between, next_month, parse_partition_month, partition_name
+
+
+def test_partition_names_round_trip():
+    assert partition_name(date(2024, 3, 1)) == "analysis_jobs_history_202403"
+    assert parse_partition_month("analysis_jobs_history_202403") == date(2024, 3, 1)
+    assert parse_partition_month("analysis_jobs_history_202413") is None
+    assert parse_partition_month("analysis_jobs_history_default") is None
+    assert parse_partition_month("news_events") is None
+
+
+def test_month_arithmetic_crosses_years():
+    assert next_month(date(2024, 12, 1)) == date(2025, 1, 1)
+    assert months_before(date(2025, 2, 1), 3) == date(2024, 11, 1)
+    assert months_before(date(2025, 2, 1), 12) == date(2024, 2, 1)
+    assert months_between(
+        datetime(2024, 11, 20, tzinfo=timezone.utc),
+        datetime(2025, 1, 3, tzinfo=timezone.utc),
+    ) == [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)]
@@ -0,0 +1,55 @@
+import os
+from datetime import date
+from uuid import uuid4
+
+import psycopg2
+import pytest
+
+from ingestion.backfill import BackfillUnit, load_pending_units, plan_units, seed_units
+
+
+def test_plan_units_covers_every_ticker_and_day_newest_first():
+    units = plan_units(["AAPL", "MSFT", "AAPL"], date(2024, 1, 1), date(2024, 1, 3))
+    assert len(units) == 6
+    assert units[0] == BackfillUnit(ticker="AAPL", day=date(2024, 1, 3))
+    assert units[-1] == BackfillUnit(ticker="MSFT", day=date(2024, 1, 1))
+    assert {unit.day for unit in units} == {date(2024, 1, day) for day in (1, 2, 3)}
+
+
+def test_plan_units_single_day():
+    assert plan_units(["AAPL"], date(2024, 1, 1), date(2024, 1, 1)) == [
+        BackfillUnit(ticker="AAPL", day=date(2024, 1, 1))
+    ]
+
+
+def test_plan_units_rejects_inverted_range():
+    with pytest.raises(ValueError):
+        plan_units(["AAPL"], date(2024, 1, 2), date(2024, 1, 1))
+
+
+def test_pending_units_are_limited_to_the_shard_tickers():
+    host = os.getenv("POSTGRES_HOST")
+    name = os.getenv("POSTGRES_DB")
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    if not all([host, name, user, password]):
+        pytest.skip("POSTGRES_* env vars not set")
+    conn = psycopg2.connect(
+        host=host,
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+        dbname=name,
+        user=user,
+        password=password,
+    )
+    backfill = f"test-{uuid4().hex[:8]}"
+    try:
+        seed_units(conn, backfill, plan_units(["AAPL", "MSFT"], date(2024, 1, 1), date(2024, 1, 2)))
+        owned = load_pending_units(conn, backfill, max_attempts=3, tickers=["MSFT"])
+        assert {unit.ticker for unit in owned} == {"MSFT"}
+        assert len(owned) == 2
+        assert len(load_pending_units(conn, backfill, max_attempts=3)) == 4
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM backfill_units WHERE backfill_name = %s", (backfill,))
+        conn.commit()
+        conn.close()
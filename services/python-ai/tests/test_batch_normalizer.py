@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from ingestion.batch_normalizer import normalize_batch, timestamps_of, top_k_per_day
+from ingestion.normalizer import NormalizationError, normalize_finnhub
+
+NYC = ZoneInfo("America/New_York")
+
+
+def _utc(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+ITEMS = [
+    {
+        "headline": "Apple beats",
+        "url": "https://Example.com/a/?utm_source=x",
+        "datetime": 1_700_000_000,
+        "related": "aapl, MSFT,AAPL",
+        "summary": "  text  ",
+    },
+    {"title": "ISO", "url": "https://example.com/b", "published_at": "2024-03-10T06:30:00.123456Z"},
+    {"headline": "missing url", "datetime": 1_700_000_000},
+    {"headline": "list related", "url": "https://example.com/c", "datetime": 1, "related": ["AAPL"]},
+    {"headline": 42, "url": "https://example.com/d", "datetime": 1},
+    {"headline": "blank url", "url": "   ", "datetime": 1},
+    {"headline": "digits", "url": "https://example.com/e", "datetime": "1700000000", "source": "reuters"},
+]
+
+
+def _legacy(items, trace_id, ingested_at):
+    events, failures = [], []
+    for position, item in enumerate(items):
+        try:
+            events.append((position, normalize_finnhub(item, trace_id, ingested_at)))
+        except NormalizationError as exc:
+            failures.append((position, str(exc)))
+        except Exception as exc:  # noqa: BLE001
+            failures.append((position, f"unexpected_error: {exc}"))
+    return events, failures
+
+
+def test_batch_matches_per_item_normalizer():
+    trace_id = uuid4()
+    ingested_at = datetime(2024, 3, 10, tzinfo=timezone.utc)
+    batch = normalize_batch(ITEMS, trace_id, ingested_at)
+    expected_events, expected_failures = _legacy(ITEMS, trace_id, ingested_at)
+
+    assert batch.failures == expected_failures
+    assert list(batch.positions) == [position for position, _event in expected_events]
+    for index, (_position, expected) in enumerate(expected_events):
+        assert batch.row(index) == (
+            expected.news_id,
+            expected.trace_id,
+            expected.source,
+            expected.published_at,
+            expected.ingested_at,
+            expected.title,
+            expected.url,
+            expected.content,
+            expected.tickers,
+            expected.raw_payload,
+        )
+    assert batch.tickers[0] == ["AAPL", "MSFT"]
+
+
+def test_top_k_per_day_uses_local_days_and_newest_first():
+    timestamps = [
+        _utc(2024, 1, 2, 15),
+        _utc(2024, 1, 2, 16),
+        _utc(2024, 1, 3, 3),  # still Jan 2 in New York
+        _utc(2024, 1, 3, 15),
+        float("nan"),
+    ]
+    assert top_k_per_day(timestamps, 2, NYC) == [3, 2, 1, 4]
+    assert top_k_per_day(timestamps, 0, NYC) == [0, 1, 2, 3, 4]
+
+
+def test_top_k_per_day_respects_dst_transitions():
+    # 2024-03-10 04:30 UTC is 23:30 EST on Mar 9; 05:30 UTC is 00:30 EST on Mar 10.
+    timestamps = [_utc(2024, 3, 10, 4, 30), _utc(2024, 3, 10, 5, 30), _utc(2024, 11, 3, 4, 30)]
+    assert top_k_per_day(timestamps, 1, NYC) == [2, 1, 0]
+
+
+def test_timestamps_column_marks_missing_as_nan():
+    columns = timestamps_of([{"datetime": 10}, {"published_at": "bad"}, {}])
+    assert columns[0] == 10.0
+    assert columns[1] != columns[1] and columns[2] != columns[2]
@@ -0,0 +1,108 @@
+import threading
+
+import psycopg2
+import pytest
+
+from db import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnect:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+
+def test_connections_are_reused_and_committed():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(connect.opened) == 1
+    assert first.commits == 2
+
+
+def test_error_rolls_back_and_keeps_healthy_connection():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, max_size=1)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError("boom")
+    assert conn.rollbacks == 1
+    assert pool.idle == 1
+
+
+def test_connection_errors_discard_the_connection():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, max_size=1)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+    assert broken.closed
+    with pool.connection() as fresh:
+        pass
+    assert fresh is not broken
+
+
+def test_closed_idle_connections_are_skipped():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, max_size=2)
+    with pool.connection() as conn:
+        pass
+    conn.close()
+    with pool.connection() as replacement:
+        pass
+    assert replacement is not conn
+
+
+def test_checkout_blocks_until_a_connection_is_returned():
+    pool = ConnectionPool(FakeConnect(), max_size=1, timeout=5)
+    held = pool.getconn()
+    borrowed = []
+
+    thread = threading.Thread(target=lambda: borrowed.append(pool.getconn()))
+    thread.start()
+    thread.join(0.05)
+    assert borrowed == []
+    pool.putconn(held)
+    thread.join(1)
+    assert borrowed == [held]
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = ConnectionPool(FakeConnect(), max_size=1, timeout=0.01)
+    pool.getconn()
+    with pytest.raises(RuntimeError):
+        pool.getconn()
+
+
+def test_close_closes_idle_connections():
+    pool = ConnectionPool(FakeConnect(), max_size=2)
+    with pool.connection() as conn:
+        pass
+    pool.close()
+    assert conn.closed
+    with pytest.raises(RuntimeError):
+        pool.getconn()
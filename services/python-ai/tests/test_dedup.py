@@ -0,0 +1,43 @@
+from ingestion.dedup import band_values, estimated_similarity, minhash_signature, shingles, tokenize
+
+STORY = (
+    "Apple reports record quarterly revenue as iPhone sales beat expectations. Apple Inc said on "
+    "Thursday its fiscal first quarter revenue rose 8 percent to a record, driven by strong demand "
+    "for the iPhone 15 lineup and growth in services, sending shares higher in extended trading."
+)
+SYNDICATED = STORY.replace("expectations.", "expectations - Reuters.")
+OTHER = (
+    "Apple misses quarterly revenue estimates as iPhone sales disappoint. Apple Inc said on Thursday "
+    "its fiscal first quarter revenue fell 2 percent, hurt by weak demand for the iPhone 15 lineup "
+    "in China, sending shares lower in extended trading."
+)
+
+
+def _signature(text: str) -> list[int]:
+    return minhash_signature(shingles(tokenize(text)))
+
+
+def test_syndicated_copy_is_above_threshold_and_shares_a_band():
+    story, copy = _signature(STORY), _signature(SYNDICATED)
+    assert estimated_similarity(story, copy) >= 0.8
+    assert set(band_values(story)) & set(band_values(copy))
+    assert _signature(STORY) == _signature(STORY.upper())
+
+
+def test_different_story_is_below_threshold():
+    assert estimated_similarity(_signature(STORY), _signature(OTHER)) < 0.8
+
+
+def test_shingles_are_word_bigrams():
+    assert shingles(["a", "b", "c"]) == {"a b", "b c"}
+    assert shingles(["solo"]) == {"solo"}
+
+
+def test_signature_values_fit_bigint():
+    signature = _signature(STORY)
+    assert len(signature) == 64
+    for value in signature:
+        assert 0 <= value < 1 << 63
+    for band, value in band_values(signature):
+        assert 0 <= band < 16
+        assert -(1 << 63) <= value < 1 << 63
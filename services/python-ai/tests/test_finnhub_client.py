@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+
+from ingestion import finnhub_client
+from ingestion.finnhub_client import fetch_company_news_many
+
+
+def _run(transport: httpx.MockTransport, symbols: list[str], concurrency: int = 4):
+    async def _inner():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await fetch_company_news_many(
+                client,
+                "token",
+                symbols,
+                "2024-01-01",
+                "2024-01-02",
+                concurrency=concurrency,
+            )
+
+    return asyncio.run(_inner())
+
+
+def test_fetch_many_preserves_order_and_payloads():
+    def handler(request: httpx.Request) -> httpx.Response:
+        symbol = request.url.params["symbol"]
+        return httpx.Response(200, json=[{"headline": symbol, "url": f"https://example.com/{symbol}"}])
+
+    results = _run(httpx.MockTransport(handler), ["AAPL", "MSFT", "GOOGL"])
+    assert [result.symbol for result in results] == ["AAPL", "MSFT", "GOOGL"]
+    assert all(result.error is None for result in results)
+    assert results[1].items[0]["headline"] == "MSFT"
+
+
+def test_fetch_many_isolates_ticker_failures(monkeypatch):
+    async def _no_sleep(_seconds):
+        return None
+
+    monkeypatch.setattr(finnhub_client.asyncio, "sleep", _no_sleep)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params["symbol"] == "BAD":
+            return httpx.Response(503)
+        return httpx.Response(200, json=[])
+
+    results = _run(httpx.MockTransport(handler), ["AAPL", "BAD", "MSFT"])
+    assert results[0].error is None
+    assert isinstance(results[1].error, finnhub_client.FinnhubError)
+    assert results[2].error is None
+
+
+def test_fetch_many_retries_on_429(monkeypatch):
+    sleeps: list[float] = []
+
+    async def _record_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(finnhub_client.asyncio, "sleep", _record_sleep)
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            return httpx.Response(429, headers={"Retry-After": "3"})
+        return httpx.Response(200, json=[{"headline": "ok"}])
+
+    results = _run(httpx.MockTransport(handler), ["AAPL"])
+    assert results[0].error is None
+    assert sleeps == [3]
+    assert calls["count"] == 2
+
+
+def test_fetch_many_respects_concurrency_limit():
+    state = {"in_flight": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        return httpx.Response(200, json=[])
+
+    _run(httpx.MockTransport(handler), [f"T{i}" for i in range(10)], concurrency=3)
+    assert state["peak"] <= 3
+
+
+def test_fetch_market_news_many_labels_categories():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith("/news")
+        category = request.url.params["category"]
+        if category == "merger":
+            return httpx.Response(404)
+        return httpx.Response(200, json=[{"id": 1, "related": "AAPL"}])
+
+    async def _inner():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await finnhub_client.fetch_market_news_many(client, "token", ["general", "merger"])
+
+    results = asyncio.run(_inner())
+    assert [result.symbol for result in results] == ["market:general", "market:merger"]
+    assert results[0].items == [{"id": 1, "related": "AAPL"}]
+    assert isinstance(results[1].error, httpx.HTTPStatusError)
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from ingestion.run import _filter_new_items, _limit_items_per_day
+
+
+def _ts(hour: int, minute: int = 0) -> int:
+    return int(datetime(2024, 1, 2, hour, minute, tzinfo=timezone.utc).timestamp())
+
+
+def test_filter_new_items_drops_items_at_or_below_watermark():
+    mark = datetime.fromtimestamp(_ts(12), tz=timezone.utc)
+    items = [
+        {"headline": "old", "datetime": _ts(11)},
+        {"headline": "same", "datetime": _ts(12)},
+        {"headline": "new", "datetime": _ts(13)},
+    ]
+    kept, dropped, newest = _filter_new_items(items, mark)
+    assert [item["headline"] for item in kept] == ["new"]
+    assert dropped == 2
+    assert newest == datetime.fromtimestamp(_ts(13), tz=timezone.utc)
+
+
+def test_filter_new_items_without_watermark_keeps_everything():
+    items = [{"headline": "a", "datetime": _ts(9)}, {"headline": "b"}]
+    kept, dropped, newest = _filter_new_items(items, None)
+    assert kept == items
+    assert dropped == 0
+    assert newest == datetime.fromtimestamp(_ts(9), tz=timezone.utc)
+
+
+def test_filter_new_items_keeps_items_without_timestamp():
+    mark = datetime.fromtimestamp(_ts(12), tz=timezone.utc)
+    kept, dropped, _newest = _filter_new_items([{"headline": "no-ts"}], mark)
+    assert len(kept) == 1
+    assert dropped == 0
+
+
+def test_limit_items_per_day_keeps_newest():
+    items = [{"datetime": _ts(hour)} for hour in (15, 16, 17)]
+    kept, dropped = _limit_items_per_day(items, 2, ZoneInfo("America/New_York"))
+    assert [item["datetime"] for item in kept] == [_ts(17), _ts(16)]
+    assert dropped == 1
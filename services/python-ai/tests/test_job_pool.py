@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from jobs.concurrency import JobPool
+
+
+def test_runs_jobs_concurrently_up_to_the_limit():
+    release = threading.Event()
+    started = []
+
+    def work(job):
+        started.append(job)
+        release.wait(5)
+
+    pool = JobPool(3)
+    for job in range(3):
+        pool.submit(job, work)
+    assert pool.free_slots() == 0
+    with pytest.raises(RuntimeError):
+        pool.submit(99, work)
+
+    deadline = time.monotonic() + 2
+    while len(started) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(started) == [0, 1, 2]
+
+    release.set()
+    pool.drain()
+    assert pool.in_flight == 0
+    assert pool.free_slots() == 3
+    pool.shutdown()
+
+
+def test_overrunning_job_is_reported_once_and_keeps_its_slot():
+    release = threading.Event()
+    pool = JobPool(2, job_timeout=0.05)
+    pool.submit("slow", lambda _job: release.wait(5))
+    pool.submit("fast", lambda _job: None)
+
+    pool.wait(1)
+    time.sleep(0.06)
+    assert pool.expire() == ["slow"]
+    assert pool.expire() == []
+    # Still running, so it still counts against the concurrency bound.
+    assert pool.in_flight == 1
+
+    # Draining still waits for it rather than abandoning a call that is still running.
+    threading.Timer(0.05, release.set).start()
+    pool.drain()
+    assert release.is_set()
+    assert pool.in_flight == 0
+    pool.shutdown()
+
+
+def test_drain_waits_for_in_flight_jobs():
+    done = []
+
+    def work(job):
+        time.sleep(0.05)
+        done.append(job)
+
+    pool = JobPool(4, job_timeout=5)
+    for job in range(4):
+        pool.submit(job, work)
+    pool.drain()
+    assert sorted(done) == [0, 1, 2, 3]
+    pool.shutdown()
@@ -0,0 +1,420 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import psycopg2
+import pytest
+
+from jobs.outbox import stage_jobs, sweep_outbox
+from jobs.publisher import publish_jobs
+from jobs.queue import (
+    DEFER_SCRIPT,
+    PROMOTE_SCRIPT,
+    PUBLISH_SCRIPT,
+    REQUEUE_SCRIPT,
+    PostgresJobQueue,
+    RedisJobQueue,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeScript:
+    """Runs the Python equivalent of a RedisJobQueue Lua script; nothing interleaves with it."""
+
+    def __init__(self, client, body):
+        self._run = {
+            PUBLISH_SCRIPT: client._publish,
+            REQUEUE_SCRIPT: client._requeue,
+            DEFER_SCRIPT: client._defer,
+            PROMOTE_SCRIPT: client._promote,
+        }[body]
+
+    def __call__(self, keys=(), args=()):
+        return self._run(list(keys), [str(arg) for arg in args])
+
+
+class FakeRedis:
+    """In-process stand-in for the Redis commands RedisJobQueue uses (single-threaded)."""
+
+    def __init__(self, clock):
+        self._clock = clock
+        self.strings = {}
+        self.hashes = {}
+        self.zsets = {}
+        self.streams = {}
+        self.groups = {}
+        self._last_ms = 0
+        self._seq = 0
+
+    @staticmethod
+    def _key(entry_id):
+        ms, seq = entry_id.split("-")
+        return int(ms), int(seq)
+
+    def _ms(self):
+        return int(self._clock() * 1000)
+
+    def register_script(self, body):
+        return FakeScript(self, body)
+
+    def _publish(self, keys, args):
+        dedup_key, job_key, stream = keys
+        if not self.set(dedup_key, args[0], nx=True):
+            return 0
+        self.hset(job_key, mapping=dict(zip(args[1::2], args[2::2])))
+        self.xadd(stream, {"job_id": args[0]})
+        return 1
+
+    def _requeue(self, keys, args):
+        stream, job_key = keys
+        group, entry_id, job_id = args
+        if not self.xack(stream, group, entry_id):
+            return 0
+        self.xdel(stream, entry_id)
+        self.hset(job_key, mapping={"status": "pending"})
+        self.xadd(stream, {"job_id": job_id})
+        return 1
+
+    def _defer(self, keys, args):
+        stream, job_key, delayed = keys
+        group, entry_id, job_id, due = args[:4]
+        if not self.xack(stream, group, entry_id):
+            return 0
+        self.xdel(stream, entry_id)
+        self.hset(job_key, mapping=dict(zip(args[4::2], args[5::2])))
+        self.zadd(delayed, {job_id: float(due)})
+        return 1
+
+    def _promote(self, keys, args):
+        delayed, stream = keys
+        if not self.zrem(delayed, args[0]):
+            return 0
+        self.xadd(stream, {"job_id": args[0]})
+        return 1
+
+    def incr(self, name):
+        self.strings[name] = int(self.strings.get(name, 0)) + 1
+        return self.strings[name]
+
+    def set(self, name, value, nx=False):
+        if nx and name in self.strings:
+            return None
+        self.strings[name] = value
+        return True
+
+    def hset(self, name, mapping):
+        self.hashes.setdefault(name, {}).update({key: str(value) for key, value in mapping.items()})
+
+    def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+    def expire(self, name, seconds):
+        return True
+
+    def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update(mapping)
+
+    def zrangebyscore(self, name, low, high, start=None, num=None, withscores=False):
+        low = float(low)
+        high = float(high)
+        members = sorted(
+            (score, member) for member, score in self.zsets.get(name, {}).items() if low <= score <= high
+        )
+        if start is not None:
+            members = members[start : start + num]
+        if withscores:
+            return [(member, score) for score, member in members]
+        return [member for _score, member in members]
+
+    def zrem(self, name, member):
+        return 1 if self.zsets.get(name, {}).pop(member, None) is not None else 0
+
+    def xgroup_create(self, name, groupname, id="0", mkstream=False):
+        if (name, groupname) in self.groups:
+            raise RuntimeError("BUSYGROUP Consumer Group name already exists")
+        self.streams.setdefault(name, {})
+        self.groups[(name, groupname)] = {"last": (0, 0), "pending": {}}
+
+    def xadd(self, name, fields):
+        ms = max(self._ms(), self._last_ms)
+        self._seq = self._seq + 1 if ms == self._last_ms else 0
+        self._last_ms = ms
+        entry_id = f"{ms}-{self._seq}"
+        self.streams.setdefault(name, {})[entry_id] = {key: str(value) for key, value in fields.items()}
+        return entry_id
+
+    def xdel(self, name, *ids):
+        return sum(1 for entry_id in ids if self.streams[name].pop(entry_id, None) is not None)
+
+    def xreadgroup(self, groupname, consumername, streams, count=None, block=None):
+        response = []
+        for name, position in streams.items():
+            assert position == ">"
+            group = self.groups[(name, groupname)]
+            entries = sorted(
+                (entry_id for entry_id in self.streams[name] if self._key(entry_id) > group["last"]),
+                key=self._key,
+            )[:count]
+            if not entries:
+                continue
+            for entry_id in entries:
+                group["pending"][entry_id] = [consumername, self._ms()]
+            group["last"] = self._key(entries[-1])
+            response.append([name, [(entry_id, dict(self.streams[name][entry_id])) for entry_id in entries]])
+        return response
+
+    def xack(self, name, groupname, *ids):
+        pending = self.groups[(name, groupname)]["pending"]
+        return sum(1 for entry_id in ids if pending.pop(entry_id, None) is not None)
+
+    def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None):
+        pending = self.groups[(name, groupname)]["pending"]
+        claimed, deleted = [], []
+        for entry_id in sorted(pending, key=self._key):
+            if self._key(entry_id) < self._key(start_id):
+                continue
+            owner, delivered_at = pending[entry_id]
+            if self._ms() - delivered_at < min_idle_time:
+                continue
+            if entry_id not in self.streams[name]:
+                del pending[entry_id]
+                deleted.append(entry_id)
+                continue
+            pending[entry_id] = [consumername, self._ms()]
+            claimed.append((entry_id, dict(self.streams[name][entry_id])))
+        return ["0-0", claimed, deleted]
+
+    def xclaim(self, name, groupname, consumername, min_idle_time, message_ids, justid=False):
+        pending = self.groups[(name, groupname)]["pending"]
+        claimed = []
+        for entry_id in message_ids:
+            if entry_id in pending and self._ms() - pending[entry_id][1] >= min_idle_time:
+                pending[entry_id] = [consumername, self._ms()]
+                claimed.append(entry_id)
+        return claimed
+
+    def xread(self, streams, count=None, block=None):
+        return []
+
+
+@pytest.fixture()
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture()
+def queue(clock):
+    return RedisJobQueue(FakeRedis(clock), max_attempts=3, clock=clock)
+
+
+def test_publish_is_idempotent(queue):
+    trace_id = uuid4()
+    assert queue.publish_many(None, [1, 2, 2], trace_id) == 2
+    assert queue.publish_many(None, [1, 2, 3], trace_id) == 1
+    # Duplicates leave no job hash or stream entry behind.
+    assert len(queue.client.hashes) == 3
+    assert len(queue.client.streams[queue.stream]) == 3
+
+
+def test_workers_claim_disjoint_jobs_and_finish_them(queue):
+    queue.publish_many(None, [1, 2, 3], uuid4())
+    first = queue.claim(2, "host:w0")
+    second = queue.claim(2, "host:w1")
+    assert [job.news_event_id for job in first] == [1, 2]
+    assert [job.news_event_id for job in second] == [3]
+
+    for job in first + second:
+        queue.mark_done(job)
+    assert queue.claim(10, "host:w0") == []
+    assert queue.client.hgetall(queue._job_key(first[0].id))["status"] == "done"
+    assert queue.client.streams[queue.stream] == {}
+
+
+def test_retryable_failure_waits_for_backoff(queue, clock):
+    queue.publish_many(None, [1], uuid4())
+    [job] = queue.claim(1, "host:w0")
+    queue.mark_failed(job, "timeout", retryable=True)
+
+    assert queue.claim(1, "host:w0") == []
+    clock.now += 2
+    [retry] = queue.claim(1, "host:w0")
+    assert retry.id == job.id
+    assert retry.attempts == 1
+
+    queue.mark_failed(retry, "401 unauthorized", retryable=False)
+    fields = queue.client.hgetall(queue._job_key(job.id))
+    assert fields["status"] == "failed"
+    assert fields["attempts"] == "2"
+
+
+def test_released_job_waits_without_using_an_attempt(queue, clock):
+    queue.publish_many(None, [1], uuid4())
+    [job] = queue.claim(1, "host:w0")
+    queue.release(job, 30)
+
+    assert queue.claim(1, "host:w0") == []
+    clock.now += 31
+    [again] = queue.claim(1, "host:w0")
+    assert again.id == job.id
+    assert again.attempts == 0
+
+
+def test_stuck_job_is_recovered_and_late_result_is_ignored(queue, clock):
+    queue.publish_many(None, [1], uuid4())
+    [job] = queue.claim(1, "host:w0")
+
+    clock.now += 30
+    assert queue.recover_stuck(60, "host:w1") == 0
+    clock.now += 31
+    assert queue.recover_stuck(60, "host:w1") == 1
+
+    [again] = queue.claim(1, "host:w1")
+    assert again.id == job.id
+    queue.mark_done(job)
+    queue.mark_failed(job, "timeout", retryable=True)
+    queue.release(job, 0)
+    assert queue.client.hgetall(queue._job_key(job.id))["status"] == "running"
+    assert queue.client.zsets.get(queue._delayed, {}) == {}
+    queue.mark_done(again)
+    assert queue.client.hgetall(queue._job_key(job.id))["status"] == "done"
+
+
+def test_heartbeat_keeps_the_lease(queue, clock):
+    queue.publish_many(None, [1], uuid4())
+    [job] = queue.claim(1, "host:w0")
+    clock.now += 40
+    assert queue.extend_leases([job.id], "host:w0") == {job.id}
+    clock.now += 40
+    assert queue.recover_stuck(60, "host:w1") == 0
+
+    queue.mark_done(job)
+    assert queue.extend_leases([job.id], "host:w0") == set()
+
+
+def test_against_local_redis():
+    url = os.getenv("REDIS_URL")
+    if not url:
+        pytest.skip("REDIS_URL not set")
+    pytest.importorskip("redis")
+    queue = RedisJobQueue.from_url(url, max_attempts=3, prefix=f"test-jobs-{uuid4().hex}")
+    try:
+        assert queue.publish_many(None, [1, 2], uuid4()) == 2
+        jobs = queue.claim(5, "test:w0")
+        assert sorted(job.news_event_id for job in jobs) == [1, 2]
+        for job in jobs:
+            queue.mark_done(job)
+        assert queue.claim(5, "test:w0") == []
+    finally:
+        keys = queue.client.keys(f"{queue.prefix}:*")
+        if keys:
+            queue.client.delete(*keys)
+        queue.close()
+
+
+def _db_conn():
+    host = os.getenv("POSTGRES_HOST")
+    port = int(os.getenv("POSTGRES_PORT", "5432"))
+    name = os.getenv("POSTGRES_DB")
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    if not all([host, name, user, password]):
+        pytest.skip("POSTGRES_* env vars not set")
+    return psycopg2.connect(host=host, port=port, dbname=name, user=user, password=password)
+
+
+def test_outbox_sweep_publishes_jobs_a_crashed_ingestion_left_behind(queue):
+    conn = _db_conn()
+    news_id = hashlib.sha256(uuid4().hex.encode("utf-8")).hexdigest()
+    now = datetime.now(timezone.utc)
+    news_event_id = None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO news_events (news_id, trace_id, source, published_at, title, url) "
+                "VALUES (%s, %s, 'test-outbox', %s, 'Test title', %s) RETURNING id",
+                (news_id, str(uuid4()), now, f"https://example.com/{news_id}"),
+            )
+            news_event_id = cursor.fetchone()[0]
+        # Staged with the event, then the process dies before publish_staged. Backdating the
+        # row keeps the sweep below away from other rows in a shared database.
+        stage_jobs(conn, {news_event_id: 700}, uuid4())
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE job_outbox SET created_at = '2000-01-01' WHERE news_event_id = %s", (news_event_id,)
+            )
+        conn.commit()
+
+        older_than = int((now - datetime(2000, 1, 2, tzinfo=timezone.utc)).total_seconds())
+        assert sweep_outbox(conn, queue, older_than_seconds=older_than) == 1
+        assert sweep_outbox(conn, queue, older_than_seconds=older_than) == 0
+        [job] = queue.claim(1, "host:w0")
+        assert job.news_event_id == news_event_id
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM job_outbox WHERE news_event_id = %s", (news_event_id,))
+            assert cursor.fetchone()[0] == 0
+    finally:
+        conn.rollback()
+        if news_event_id is not None:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM news_events WHERE id = %s", (news_event_id,))
+            conn.commit()
+        conn.close()
+
+
+def test_postgres_finishing_calls_ignore_a_recovered_claim():
+    conn = _db_conn()
+    news_id = hashlib.sha256(uuid4().hex.encode("utf-8")).hexdigest()
+    news_event_id = None
+    queue = PostgresJobQueue(_db_conn, max_attempts=3, listen=False)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO news_events (news_id, trace_id, source, published_at, title, url) "
+                "VALUES (%s, %s, 'test-lease', NOW(), 'Test title', %s) RETURNING id",
+                (news_id, str(uuid4()), f"https://example.com/{news_id}"),
+            )
+            news_event_id = cursor.fetchone()[0]
+        # Priority far above compute_job_priority's range, so this test claims its own job.
+        publish_jobs(conn, [news_event_id], uuid4(), priorities={news_event_id: 1_000_000})
+        conn.commit()
+
+        [first] = queue.claim(1, "host:w0")
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE analysis_jobs SET locked_at = NOW() - INTERVAL '1 hour' WHERE id = %s", (first.id,)
+            )
+        conn.commit()
+        assert queue.recover_stuck(60, "host:w1") >= 1
+        [second] = queue.claim(1, "host:w1")
+        assert second.id == first.id and second.receipt != first.receipt
+
+        # The first worker's late results must not touch the second worker's claim.
+        queue.mark_done(first)
+        assert queue.mark_failed(first, "timeout", retryable=True) is False
+        queue.release(first, 30)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT status, locked_by, attempts FROM analysis_jobs WHERE id = %s", (first.id,))
+            assert cursor.fetchone() == ("running", "host:w1", 0)
+        conn.commit()
+
+        queue.mark_done(second)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT status FROM analysis_jobs WHERE id = %s", (first.id,))
+            assert cursor.fetchone()[0] == "done"
+        conn.commit()
+    finally:
+        queue.close()
+        conn.rollback()
+        if news_event_id is not None:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM news_events WHERE id = %s", (news_event_id,))
+            conn.commit()
+        conn.close()
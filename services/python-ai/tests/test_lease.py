@@ -0,0 +1,47 @@
+from jobs.lease import LeaseHeartbeat
+
+
+class FakeQueue:
+    def __init__(self, held, fail=0):
+        self.held = set(held)
+        self.fail = fail
+        self.calls = []
+
+    def extend_leases(self, job_ids, worker_id):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("server closed the connection")
+        self.calls.append((sorted(job_ids), worker_id))
+        return {job_id for job_id in job_ids if job_id in self.held}
+
+
+def test_beat_extends_registered_leases():
+    queue = FakeQueue({1, 2})
+    lease = LeaseHeartbeat(queue, "host:w0", interval=5)
+    lease.beat()
+    assert queue.calls == []
+
+    lease.add([1, 2])
+    lease.beat()
+    assert queue.calls == [([1, 2], "host:w0")]
+
+    lease.discard(1)
+    lease.beat()
+    assert queue.calls[-1] == ([2], "host:w0")
+
+
+def test_lost_lease_is_dropped():
+    lease = LeaseHeartbeat(FakeQueue({1}), "host:w0", interval=5)
+    lease.add([1, 2])
+    lease.beat()
+    assert lease.held() == {1}
+
+
+def test_failed_heartbeat_keeps_leases_for_the_next_beat():
+    queue = FakeQueue({1}, fail=1)
+    lease = LeaseHeartbeat(queue, "host:w0", interval=5)
+    lease.add([1])
+    lease.beat()
+    assert lease.held() == {1}
+    lease.beat()
+    assert queue.calls == [([1], "host:w0")]
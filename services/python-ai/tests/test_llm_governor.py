@@ -0,0 +1,200 @@
+import os
+import time
+from uuid import uuid4
+
+import psycopg2
+import pytest
+
+from jobs.worker import _is_retryable_error
+from llm.governor import LLMGovernor, estimate_tokens, is_outage_error, usage_tokens
+from llm.interface import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    LLMAnalysisError,
+    LLMClient,
+    LLMProviderResponse,
+)
+
+GOOD = '{"tickers":["AAPL"],"sentiment":"positive","confidence":0.9,"reasoning_summary":"Strong demand."}'
+
+
+class FakeProvider:
+    name = "fake"
+    model = "fake-model"
+
+    def __init__(self, outputs):
+        self._outputs = list(outputs)
+        self.calls = 0
+
+    def generate(self, prompt: str, timeout_seconds: int) -> LLMProviderResponse:
+        self.calls += 1
+        next_item = self._outputs.pop(0)
+        if isinstance(next_item, Exception):
+            raise next_item
+        return LLMProviderResponse(output_text=next_item, response={"usage": {"total_tokens": 42}})
+
+
+class FakeGovernor:
+    def __init__(self, open_circuit=False):
+        self.open_circuit = open_circuit
+        self.events = []
+
+    def acquire(self, prompt, max_wait=None):
+        if self.open_circuit:
+            raise CircuitOpenError("circuit open for fake:fake-model")
+        self.events.append("acquire")
+        return 100
+
+    def record_success(self, reserved_tokens, response=None):
+        self.events.append(("success", reserved_tokens, usage_tokens(response)))
+
+    def record_failure(self, error):
+        self.events.append(("failure", type(error).__name__))
+
+
+def test_outage_errors_are_recognized():
+    assert is_outage_error(TimeoutError("slow"))
+    assert is_outage_error("Error code: 429 - rate limit reached")
+    assert is_outage_error("503 Service Unavailable")
+    assert not is_outage_error("Expecting value: line 1 column 1 (char 0)")
+    assert not is_outage_error("401 unauthorized")
+
+
+def test_usage_tokens_reads_openai_and_gemini_payloads():
+    assert usage_tokens({"usage": {"total_tokens": 812}}) == 812
+    assert usage_tokens({"usage_metadata": {"total_token_count": 640}}) == 640
+    assert usage_tokens({"usage": None}) is None
+    assert usage_tokens(None) is None
+
+
+def test_estimate_includes_expected_output():
+    assert estimate_tokens("x" * 400, expected_output_tokens=300) == 401
+
+
+def test_client_reports_success_and_usage_to_governor():
+    governor = FakeGovernor()
+    client = LLMClient(FakeProvider([GOOD]), timeout_seconds=5, max_retries=0, governor=governor)
+    client.analyze_news("Title: Example")
+    assert governor.events == ["acquire", ("success", 100, 42)]
+
+
+def test_client_reports_provider_failures_to_governor():
+    governor = FakeGovernor()
+    client = LLMClient(FakeProvider([TimeoutError("timeout")]), timeout_seconds=5, max_retries=0, governor=governor)
+    with pytest.raises(LLMAnalysisError):
+        client.analyze_news("Title: Example")
+    assert governor.events == ["acquire", ("failure", "TimeoutError")]
+
+
+def test_open_circuit_fails_fast_without_calling_provider():
+    provider = FakeProvider([GOOD, GOOD, GOOD])
+    client = LLMClient(provider, timeout_seconds=5, max_retries=2, governor=FakeGovernor(open_circuit=True))
+    with pytest.raises(LLMAnalysisError) as excinfo:
+        client.analyze_news("Title: Example")
+    assert provider.calls == 0
+    assert len(excinfo.value.attempts) == 1
+    assert "circuit_open" in excinfo.value.attempts[0].error
+    assert _is_retryable_error(f"LLM analysis failed: {excinfo.value.attempts[0].error}")
+
+
+def test_deadline_errors_are_retryable():
+    assert _is_retryable_error("LLM analysis deadline exceeded")
+    assert _is_retryable_error("LLM analysis failed: provider_error:deadline_exceeded:budget frees up in 9.0s")
+
+
+def test_rate_limit_errors_are_retryable():
+    assert _is_retryable_error("LLM analysis failed: provider_error: Error code: 429 - rate limit")
+    assert not _is_retryable_error("LLM analysis failed: provider_error:insufficient_quota:429 quota")
+
+
+def _connect():
+    host = os.getenv("POSTGRES_HOST")
+    name = os.getenv("POSTGRES_DB")
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    if not all([host, name, user, password]):
+        pytest.skip("POSTGRES_* env vars not set")
+    return psycopg2.connect(
+        host=host,
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+        dbname=name,
+        user=user,
+        password=password,
+    )
+
+
+@pytest.fixture()
+def breaker_name():
+    model = f"model-{uuid4().hex}"
+    yield model
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM llm_circuit_breakers WHERE name LIKE %s", (f"%:{model}",))
+            cursor.execute("DELETE FROM rate_limit_buckets WHERE name LIKE %s", (f"llm:%:{model}:%",))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_breaker_opens_shares_state_and_closes_after_probe(breaker_name):
+    first = LLMGovernor(_connect, "test", breaker_name, failure_threshold=2, open_seconds=0.5, check_interval=0)
+    second = LLMGovernor(_connect, "test", breaker_name, failure_threshold=2, open_seconds=0.5, check_interval=0)
+    try:
+        first.record_failure(TimeoutError("timeout"))
+        assert second.paused_for() == 0
+        second.record_failure("Error code: 429")
+        assert first.paused_for() > 0
+        with pytest.raises(CircuitOpenError):
+            first.acquire("prompt")
+
+        time.sleep(0.6)
+        assert first.acquire("prompt") == 0
+        # The probe is in flight; everyone else keeps waiting.
+        with pytest.raises(CircuitOpenError):
+            second.acquire("prompt")
+        first.record_success(0)
+        assert second.acquire("prompt") == 0
+    finally:
+        first.close()
+        second.close()
+
+
+def test_non_outage_errors_do_not_count(breaker_name):
+    governor = LLMGovernor(_connect, "test", breaker_name, failure_threshold=1, check_interval=0)
+    try:
+        governor.record_failure("Expecting value: line 1 column 1 (char 0)")
+        assert governor.paused_for() == 0
+    finally:
+        governor.close()
+
+
+def test_request_budget_is_shared(breaker_name):
+    waits = []
+    first = LLMGovernor(_connect, "test", breaker_name, requests_per_minute=60, sleep=waits.append)
+    second = LLMGovernor(_connect, "test", breaker_name, requests_per_minute=60, sleep=waits.append)
+    try:
+        # Capacity is max(1, 60 / 10) = 6 requests of burst, then one per second.
+        for _ in range(6):
+            first.acquire("prompt")
+        assert waits == []
+        second.acquire("prompt")
+        assert waits and waits[0] == pytest.approx(1.0, abs=0.1)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_budget_wait_past_the_deadline_is_refused_and_refunded(breaker_name):
+    waits = []
+    governor = LLMGovernor(_connect, "test", breaker_name, requests_per_minute=60, sleep=waits.append)
+    try:
+        for _ in range(6):
+            governor.acquire("prompt")
+        with pytest.raises(DeadlineExceededError):
+            governor.acquire("prompt", max_wait=0.5)
+        # The refused call gave its request back, so one more call only waits about a second.
+        governor.acquire("prompt", max_wait=2.0)
+        assert waits and waits[0] == pytest.approx(1.0, abs=0.1)
+    finally:
+        governor.close()
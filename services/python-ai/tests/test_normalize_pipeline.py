@@ -0,0 +1,275 @@
+import os
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import psycopg2
+import pytest
+
+from ingestion.dedup import NearDedupConfig
+from ingestion.pipeline import drain_raw_items, normalize_raw_rows, stream_normalize
+from ingestion.raw_store import (
+    claim_raw_items,
+    delete_checkpoint,
+    insert_raw_items,
+    iter_raw_items,
+    load_checkpoint,
+    save_checkpoint,
+    select_raw_items,
+)
+from jobs.clusters import promote_cluster_member
+from jobs.publisher import publish_jobs
+
+
+@pytest.fixture()
+def db_conn():
+    host = os.getenv("POSTGRES_HOST")
+    port = int(os.getenv("POSTGRES_PORT", "5432"))
+    name = os.getenv("POSTGRES_DB")
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    if not all([host, name, user, password]):
+        pytest.skip("POSTGRES_* env vars not set")
+    conn = psycopg2.connect(
+        host=host,
+        port=port,
+        dbname=name,
+        user=user,
+        password=password,
+    )
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _cleanup(conn, source: str) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM news_events WHERE source = %s", (source,))
+        cursor.execute("DELETE FROM raw_news_items WHERE source = %s", (source,))
+    conn.commit()
+
+
+def test_normalize_raw_rows_isolates_bad_rows(db_conn):
+    source = f"test-{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    good = [
+        {
+            "headline": f"Headline {index}",
+            "url": f"https://example.com/{uuid4().hex}",
+            "datetime": int(now.timestamp()),
+            "source": source,
+            "related": "AAPL",
+        }
+        for index in range(3)
+    ]
+    bad = {"headline": "Missing url and time", "source": source}
+    try:
+        insert_raw_items(db_conn, source, uuid4(), now, good + [bad])
+        rows = select_raw_items(db_conn, source, 10)
+        stats = normalize_raw_rows(db_conn, rows, uuid4(), now, chunk_size=2)
+
+        assert stats.normalized_ok == 3
+        assert stats.normalized_failed == 1
+        assert stats.news_inserted == 3
+        assert stats.jobs_enqueued == 3
+
+        with db_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT status, COUNT(*), MAX(last_error) FROM raw_news_items "
+                "WHERE source = %s GROUP BY status",
+                (source,),
+            )
+            by_status = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        assert by_status["normalized"][0] == 3
+        assert by_status["failed"][0] == 1
+        assert "Missing required fields" in by_status["failed"][1]
+    finally:
+        _cleanup(db_conn, source)
+
+
+def test_claimed_rows_are_skipped_by_other_workers(db_conn):
+    source = f"test-{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    items = [
+        {
+            "headline": f"Headline {index}",
+            "url": f"https://example.com/{uuid4().hex}",
+            "datetime": int(now.timestamp()),
+            "source": source,
+        }
+        for index in range(4)
+    ]
+    other = psycopg2.connect(db_conn.dsn, password=os.getenv("POSTGRES_PASSWORD"))
+    try:
+        insert_raw_items(db_conn, source, uuid4(), now, items)
+        first = claim_raw_items(db_conn, source, 2)
+        second = claim_raw_items(other, source, 10)
+        assert len(first) == 2
+        assert len(second) == 2
+        assert not {row.id for row in first} & {row.id for row in second}
+        db_conn.rollback()
+        other.rollback()
+
+        stats = drain_raw_items(db_conn, source, uuid4(), now, chunk_size=3)
+        assert stats.normalized_ok == 4
+        assert claim_raw_items(db_conn, source, 10) == []
+        db_conn.rollback()
+    finally:
+        other.close()
+        _cleanup(db_conn, source)
+
+
+def test_iter_raw_items_pages_in_key_order(db_conn):
+    source = f"test-{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    items = [
+        {"headline": f"Headline {index}", "url": f"https://example.com/{uuid4().hex}", "source": source}
+        for index in range(5)
+    ]
+    try:
+        insert_raw_items(db_conn, source, uuid4(), now, items)
+        rows = list(iter_raw_items(db_conn, source, page_size=2, itersize=1))
+        assert len(rows) == 5
+        keys = [(row.fetched_at, row.id) for row in rows]
+        assert keys == sorted(keys)
+        resumed = list(iter_raw_items(db_conn, source, after=keys[2], page_size=2))
+        assert [row.id for row in resumed] == [row.id for row in rows[3:]]
+    finally:
+        _cleanup(db_conn, source)
+
+
+def test_stream_normalize_resumes_from_checkpoint_and_clears_it(db_conn):
+    source = f"test-{uuid4().hex[:8]}"
+    checkpoint = f"test-{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    items = [
+        {
+            "headline": f"Headline {index}",
+            "url": f"https://example.com/{uuid4().hex}",
+            "datetime": int(now.timestamp()),
+            "source": source,
+        }
+        for index in range(3)
+    ]
+    read_conn = psycopg2.connect(db_conn.dsn, password=os.getenv("POSTGRES_PASSWORD"))
+    try:
+        insert_raw_items(db_conn, source, uuid4(), now, items)
+        first = list(iter_raw_items(read_conn, source))[0]
+        # As if a previous run crashed right after committing the first row.
+        save_checkpoint(db_conn, checkpoint, first.fetched_at, first.id)
+        db_conn.commit()
+
+        stats = stream_normalize(
+            read_conn, db_conn, source, uuid4(), now, checkpoint_name=checkpoint, chunk_size=2
+        )
+        assert stats.normalized_ok == 2
+        assert [row.id for row in select_raw_items(db_conn, source, 10)] == [first.id]
+        assert load_checkpoint(db_conn, checkpoint) is None
+    finally:
+        read_conn.close()
+        delete_checkpoint(db_conn, checkpoint)
+        _cleanup(db_conn, source)
+
+
+def test_next_stream_run_retries_failed_rows(db_conn):
+    source = f"test-{uuid4().hex[:8]}"
+    checkpoint = f"test-{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    good = {
+        "headline": "Headline",
+        "url": f"https://example.com/{uuid4().hex}",
+        "datetime": int(now.timestamp()),
+        "source": source,
+    }
+    bad = {"headline": "Missing url and time", "source": source}
+    read_conn = psycopg2.connect(db_conn.dsn, password=os.getenv("POSTGRES_PASSWORD"))
+    try:
+        insert_raw_items(db_conn, source, uuid4(), now, [bad, good])
+        for expected_attempts in (1, 2):
+            stats = stream_normalize(
+                read_conn, db_conn, source, uuid4(), now, checkpoint_name=checkpoint, chunk_size=1
+            )
+            assert stats.normalized_failed == 1
+            with db_conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT attempts FROM raw_news_items WHERE source = %s AND status = 'failed'",
+                    (source,),
+                )
+                assert cursor.fetchone()[0] == expected_attempts
+            db_conn.commit()
+    finally:
+        read_conn.close()
+        delete_checkpoint(db_conn, checkpoint)
+        _cleanup(db_conn, source)
+
+
+def _near_duplicate_items(source: str, now: datetime) -> list[dict]:
+    body = (
+        "Apple Inc said on Thursday its fiscal first quarter revenue rose 8 percent to a record, "
+        "driven by strong demand for the iPhone lineup and growth in services. "
+    ) + uuid4().hex
+    return [
+        {
+            "headline": "Apple reports record quarterly revenue",
+            "summary": body,
+            "url": f"https://example.com/{uuid4().hex}",
+            "datetime": int(now.timestamp()),
+            "source": source,
+        },
+        {
+            "headline": "Apple reports record quarterly revenue - Reuters",
+            "summary": body,
+            "url": f"https://example.org/{uuid4().hex}",
+            "datetime": int(now.timestamp()) + 60,
+            "source": source,
+        },
+    ]
+
+
+def test_near_duplicates_share_one_job(db_conn):
+    source = f"test-{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    try:
+        insert_raw_items(db_conn, source, uuid4(), now, _near_duplicate_items(source, now))
+        rows = select_raw_items(db_conn, source, 10)
+        stats = normalize_raw_rows(db_conn, rows, uuid4(), now, near_dedup=NearDedupConfig())
+
+        assert stats.news_inserted == 2
+        assert stats.near_duplicates == 1
+        assert stats.jobs_enqueued == 1
+        with db_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(DISTINCT cluster_id) FROM news_events WHERE source = %s",
+                (source,),
+            )
+            assert cursor.fetchone()[0] == 1
+    finally:
+        _cleanup(db_conn, source)
+
+
+def test_failed_representative_hands_its_cluster_to_a_member(db_conn):
+    source = f"test-{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    try:
+        insert_raw_items(db_conn, source, uuid4(), now, _near_duplicate_items(source, now))
+        rows = select_raw_items(db_conn, source, 10)
+        normalize_raw_rows(db_conn, rows, uuid4(), now, near_dedup=NearDedupConfig())
+        with db_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT id FROM news_events WHERE source = %s ORDER BY cluster_id = id DESC, id",
+                (source,),
+            )
+            representative, member = [row[0] for row in cursor.fetchall()]
+
+        promoted = promote_cluster_member(db_conn, representative)
+        assert promoted is not None and promoted[0] == member
+        assert publish_jobs(db_conn, [member], uuid4()) == 1
+        db_conn.commit()
+        with db_conn.cursor() as cursor:
+            cursor.execute("SELECT id, cluster_id FROM news_events WHERE source = %s", (source,))
+            assert dict(cursor.fetchall()) == {representative: member, member: member}
+        # The old representative already had its job, so nobody is left to promote.
+        assert promote_cluster_member(db_conn, member) is None
+        db_conn.rollback()
+    finally:
+        _cleanup(db_conn, source)
@@ -0,0 +1,84 @@
+import socket
+import time
+
+import psycopg2
+
+from jobs.notify import JobNotifier
+
+
+class FakeCursor:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+
+class FakeConnection:
+    """Socket-backed stand-in: writing to ``peer`` makes the connection readable."""
+
+    def __init__(self):
+        self._sock, self.peer = socket.socketpair()
+        self.autocommit = False
+        self.notifies = []
+        self.statements = []
+        self.closed = False
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def cursor(self):
+        return FakeCursor(self.statements)
+
+    def poll(self):
+        for _ in self._sock.recv(64):
+            self.notifies.append(("analysis_jobs", ""))
+
+    def close(self):
+        self.closed = True
+        self._sock.close()
+        self.peer.close()
+
+
+def test_wait_wakes_on_notification():
+    conn = FakeConnection()
+    notifier = JobNotifier(lambda: conn)
+    assert notifier.start()
+    assert conn.autocommit is True
+    assert conn.statements == ['LISTEN "analysis_jobs"']
+
+    conn.peer.send(b"xx")
+    start = time.monotonic()
+    assert notifier.wait(5) is True
+    assert time.monotonic() - start < 1
+    assert conn.notifies == []
+
+
+def test_wait_times_out_without_notification():
+    notifier = JobNotifier(FakeConnection)
+    notifier.start()
+    start = time.monotonic()
+    assert notifier.wait(0.05) is False
+    assert time.monotonic() - start >= 0.04
+
+
+def test_failed_listen_falls_back_to_sleeping_and_retries():
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise psycopg2.OperationalError("connection refused")
+        return FakeConnection()
+
+    notifier = JobNotifier(connect)
+    assert notifier.start() is False
+    assert notifier.wait(0.01) is False
+    assert notifier.listening
+    assert len(attempts) == 2
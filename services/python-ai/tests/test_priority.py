@@ -0,0 +1,101 @@
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import psycopg2
+import pytest
+
+from jobs.priority import STALE_PRIORITY, FifoSchedule, compute_job_priority
+from jobs.publisher import publish_jobs
+from jobs.queue import PostgresJobQueue
+
+NOW = datetime(2024, 3, 1, 15, 0, tzinfo=timezone.utc)
+
+
+def test_fresher_news_ranks_higher():
+    ages = [timedelta(minutes=5), timedelta(minutes=30), timedelta(hours=3), timedelta(hours=12), timedelta(days=2)]
+    priorities = [compute_job_priority(NOW - age, now=NOW) for age in ages]
+    assert priorities == sorted(priorities, reverse=True)
+    assert len(set(priorities)) == len(priorities)
+    assert compute_job_priority(NOW - timedelta(days=30), now=NOW) == STALE_PRIORITY
+    assert compute_job_priority(None, now=NOW) == STALE_PRIORITY
+
+
+def test_best_ticker_tier_counts():
+    published_at = NOW - timedelta(hours=2)
+    untracked = compute_job_priority(published_at, [], now=NOW)
+    tier_three = compute_job_priority(published_at, [3], now=NOW)
+    tier_one = compute_job_priority(published_at, [3, 1], now=NOW)
+    assert untracked < tier_three < tier_one
+
+
+def test_breaking_news_beats_stale_top_tier_backfill():
+    breaking = compute_job_priority(NOW - timedelta(minutes=2), [3], now=NOW)
+    backfill = compute_job_priority(NOW - timedelta(days=90), [1], now=NOW)
+    assert breaking > backfill
+
+
+def test_fifo_schedule_takes_every_nth_claim():
+    schedule = FifoSchedule(3)
+    assert [schedule.oldest_first() for _ in range(6)] == [False, False, True, False, False, True]
+    disabled = FifoSchedule(0)
+    assert not any(disabled.oldest_first() for _ in range(5))
+
+
+def _db_conn():
+    host = os.getenv("POSTGRES_HOST")
+    port = int(os.getenv("POSTGRES_PORT", "5432"))
+    name = os.getenv("POSTGRES_DB")
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    if not all([host, name, user, password]):
+        pytest.skip("POSTGRES_* env vars not set")
+    return psycopg2.connect(host=host, port=port, dbname=name, user=user, password=password)
+
+
+def _insert_news_event(conn, published_at: datetime) -> int:
+    news_id = hashlib.sha256(uuid4().hex.encode("utf-8")).hexdigest()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO news_events (news_id, trace_id, source, published_at, title, url) "
+            "VALUES (%s, %s, %s, %s, %s, %s) RETURNING id",
+            (news_id, str(uuid4()), "test-priority", published_at, "Test title", f"https://example.com/{news_id}"),
+        )
+        return cursor.fetchone()[0]
+
+
+def test_claims_prefer_fresher_news_and_fifo_pass_serves_the_oldest():
+    # Priorities far above compute_job_priority's range and a run_after far in the past keep
+    # other pending jobs in a shared database out of these claims.
+    top = 1_000_000
+    now = datetime.now(timezone.utc)
+    conn = _db_conn()
+    events: list[int] = []
+    queue = PostgresJobQueue(_db_conn, listen=False)
+    try:
+        older, fresher, backlog = (
+            _insert_news_event(conn, now - timedelta(hours=2)),
+            _insert_news_event(conn, now - timedelta(minutes=1)),
+            _insert_news_event(conn, now - timedelta(days=3)),
+        )
+        events = [older, fresher, backlog]
+        publish_jobs(conn, events, uuid4(), priorities={older: top, fresher: top, backlog: top - 1})
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE analysis_jobs SET run_after = '2000-01-01' WHERE news_event_id = %s", (backlog,)
+            )
+        conn.commit()
+
+        schedule = FifoSchedule(3)
+        claimed = []
+        for _ in range(3):
+            [job] = queue.claim(1, "test", oldest_first=schedule.oldest_first())
+            claimed.append(job.news_event_id)
+        assert claimed == [fresher, older, backlog]
+    finally:
+        queue.close()
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM news_events WHERE id = ANY(%s)", (events,))
+        conn.commit()
+        conn.close()
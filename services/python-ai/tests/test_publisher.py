@@ -6,6 +6,7 @@ from uuid import uuid4
 import psycopg2
 import pytest
 
+from jobs.archive import HISTORY_TABLE, ensure_partitions, month_start
 from jobs.publisher import publish_job
 
 
@@ -74,3 +75,51 @@ def test_publish_job_dedup(db_conn):
         cursor.execute("DELETE FROM analysis_jobs WHERE news_event_id = %s", (news_event_id,))
         cursor.execute("DELETE FROM news_events WHERE id = %s", (news_event_id,))
     db_conn.commit()
+
+
+def test_archived_job_is_not_republished(db_conn):
+    news_id = hashlib.sha256(uuid4().hex.encode("utf-8")).hexdigest()
+    trace_id = uuid4()
+    now = datetime.now(timezone.utc)
+
+    with db_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO news_events (news_id, trace_id, source, published_at, ingested_at, title, url, content, tickers, raw_payload) "
+            "VALUES (%s, %s, 'finnhub', %s, %s, 'Test title', %s, NULL, '{}', '{}') "
+            "RETURNING id",
+            (news_id, str(trace_id), now, now, f"https://example.com/{news_id}"),
+        )
+        news_event_id = cursor.fetchone()[0]
+    db_conn.commit()
+
+    assert publish_job(db_conn, news_event_id, trace_id) is True
+    # Archive only this test's job, the way archive_finished_jobs moves a row, so other done
+    # jobs in a shared database stay where they are.
+    ensure_partitions(db_conn, [month_start(now)])
+    with db_conn.cursor() as cursor:
+        cursor.execute(
+            "WITH moved AS ("
+            "  DELETE FROM analysis_jobs WHERE news_event_id = %s "
+            "  RETURNING id, job_uuid, news_event_id, trace_id, job_type, attempts, priority, "
+            "  run_after, created_at"
+            ") "
+            f"INSERT INTO {HISTORY_TABLE} (id, job_uuid, news_event_id, trace_id, job_type, status, "
+            "attempts, priority, run_after, created_at, updated_at, finished_at) "
+            "SELECT id, job_uuid, news_event_id, trace_id, job_type, 'done', attempts, priority, "
+            "run_after, created_at, NOW(), NOW() FROM moved",
+            (news_event_id,),
+        )
+        assert cursor.rowcount == 1
+    db_conn.commit()
+    assert publish_job(db_conn, news_event_id, trace_id) is False
+
+    # Dropping the history partition removes the job row but not its published_jobs key.
+    with db_conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {HISTORY_TABLE} WHERE news_event_id = %s", (news_event_id,))
+    db_conn.commit()
+    assert publish_job(db_conn, news_event_id, trace_id) is False
+
+    with db_conn.cursor() as cursor:
+        cursor.execute("DELETE FROM analysis_jobs WHERE news_event_id = %s", (news_event_id,))
+        cursor.execute("DELETE FROM news_events WHERE id = %s", (news_event_id,))
+    db_conn.commit()
@@ -0,0 +1,57 @@
+import pytest
+
+from ingestion.rate_limiter import FileTokenBucket
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_file_bucket_allows_burst_then_waits(tmp_path):
+    clock = FakeClock()
+    bucket = FileTokenBucket(str(tmp_path / "bucket.json"), 60, capacity=2, clock=clock)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_file_bucket_refills_over_time(tmp_path):
+    clock = FakeClock()
+    bucket = FileTokenBucket(str(tmp_path / "bucket.json"), 60, capacity=1, clock=clock)
+    assert bucket.reserve() == 0
+    clock.now += 1.0
+    assert bucket.reserve() == 0
+    clock.now += 30.0
+    # Refill is capped at capacity, so a long idle period does not allow a large burst.
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_file_bucket_state_is_shared_between_instances(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "bucket.json")
+    first = FileTokenBucket(path, 120, capacity=1, clock=clock)
+    second = FileTokenBucket(path, 120, capacity=1, clock=clock)
+    assert first.reserve() == 0
+    assert second.reserve() == pytest.approx(0.5)
+
+
+def test_bucket_rejects_non_positive_rate(tmp_path):
+    with pytest.raises(ValueError):
+        FileTokenBucket(str(tmp_path / "bucket.json"), 0)
+
+
+def test_file_bucket_reserves_and_returns_weighted_costs(tmp_path):
+    clock = FakeClock()
+    bucket = FileTokenBucket(str(tmp_path / "bucket.json"), 600, capacity=100, clock=clock)
+    assert bucket.reserve(80) == 0
+    assert bucket.reserve(40) == pytest.approx(2.0)
+    # Handing back an over-estimate clears the debt but never lifts the bucket past capacity.
+    assert bucket.reserve(-500) == 0
+    assert bucket.reserve(100) == 0
+    assert bucket.reserve(1) == pytest.approx(0.1)
@@ -0,0 +1,71 @@
+import os
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import psycopg2
+import pytest
+
+from ingestion.raw_store import _CopyStream, _copy_field, _payload_text, insert_raw_items
+
+
+@pytest.fixture()
+def db_conn():
+    host = os.getenv("POSTGRES_HOST")
+    port = int(os.getenv("POSTGRES_PORT", "5432"))
+    name = os.getenv("POSTGRES_DB")
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    if not all([host, name, user, password]):
+        pytest.skip("POSTGRES_* env vars not set")
+    conn = psycopg2.connect(
+        host=host,
+        port=port,
+        dbname=name,
+        user=user,
+        password=password,
+    )
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def test_payload_text_ignores_key_order():
+    assert _payload_text({"a": 1, "b": 2}) == _payload_text({"b": 2, "a": 1})
+
+
+def test_copy_field_escapes_text_format():
+    assert _copy_field(None) == "\\N"
+    assert _copy_field('{"a":"x\\y"}') == '{"a":"x\\\\y"}'
+    assert _copy_field("tab\tnew\nline") == "tab\\tnew\\nline"
+
+
+def test_copy_stream_reads_in_chunks():
+    stream = _CopyStream([("a", None), ("b", "c")])
+    chunks = []
+    while True:
+        chunk = stream.read(3)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    assert "".join(chunks) == "a\t\\N\nb\tc\n"
+
+
+@pytest.mark.parametrize("bulk_threshold", [1_000_000, 1])
+def test_insert_raw_items_skips_unchanged_payloads(db_conn, bulk_threshold):
+    source = f"test-{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    item = {
+        "headline": "Test headline",
+        "url": f"https://example.com/{uuid4().hex}",
+        "datetime": int(now.timestamp()),
+    }
+    try:
+        assert insert_raw_items(db_conn, source, uuid4(), now, [item], bulk_threshold=bulk_threshold) == (1, 0, 0)
+        assert insert_raw_items(db_conn, source, uuid4(), now, [dict(item)], bulk_threshold=bulk_threshold) == (0, 0, 1)
+        changed = dict(item, summary="Updated summary")
+        assert insert_raw_items(db_conn, source, uuid4(), now, [changed], bulk_threshold=bulk_threshold) == (0, 1, 0)
+    finally:
+        with db_conn.cursor() as cursor:
+            cursor.execute("DELETE FROM raw_news_items WHERE source = %s", (source,))
+        db_conn.commit()
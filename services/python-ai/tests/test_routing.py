@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+from ingestion.routing import TickerIndex, route_items
+
+
+def _published_at(item):
+    return datetime.fromtimestamp(item["datetime"], tz=timezone.utc)
+
+
+def test_index_matches_only_tracked_symbols():
+    index = TickerIndex(["aapl", " MSFT ", ""])
+    assert len(index) == 2
+    assert index.match("AAPL, tsla,msft,AAPL") == ["AAPL", "MSFT"]
+    assert index.match(["MSFT", 3]) == ["MSFT"]
+    assert index.match("") == []
+    assert index.match(None) == []
+
+
+def test_route_items_drops_unrelated_and_duplicate_items():
+    index = TickerIndex(["AAPL", "MSFT"])
+    items = [
+        {"id": 1, "related": "AAPL", "datetime": 1_700_000_000},
+        {"id": 2, "related": "", "datetime": 1_700_000_000},
+        {"id": 1, "related": "AAPL", "datetime": 1_700_000_000},
+        {"id": 3, "related": "MSFT,AAPL", "datetime": 1_700_000_100},
+    ]
+    routed = route_items(items, index)
+    assert [item["id"] for item in routed.items] == [1, 3]
+    assert routed.by_ticker == {"AAPL": 2, "MSFT": 1}
+    assert routed.unrouted == 1
+    assert routed.duplicates == 1
+
+
+def test_route_items_counts_coverage_inside_window_only():
+    index = TickerIndex(["AAPL", "MSFT"])
+    items = [
+        {"id": 1, "related": "AAPL", "datetime": 1_700_000_000},
+        {"id": 2, "related": "MSFT", "datetime": 1_600_000_000},
+    ]
+    since = datetime.fromtimestamp(1_650_000_000, tz=timezone.utc)
+    routed = route_items(items, index, since=since, published_at=_published_at)
+    assert len(routed.items) == 2
+    assert routed.by_ticker == {"AAPL": 1}
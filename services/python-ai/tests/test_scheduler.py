@@ -0,0 +1,64 @@
+import pytest
+
+from ingestion.scheduler import AdaptivePollScheduler
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _scheduler(clock: FakeClock) -> AdaptivePollScheduler:
+    return AdaptivePollScheduler(min_interval=60, max_interval=1800, target_items=1.0, clock=clock)
+
+
+def test_new_tickers_are_due_immediately():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    scheduler.sync(["AAPL", "MSFT"])
+    assert sorted(scheduler.pop_due()) == ["AAPL", "MSFT"]
+    assert scheduler.pop_due() == []
+
+
+def test_busy_ticker_is_polled_more_often_than_quiet_one():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    scheduler.sync(["AAPL", "ZZZ"], {"AAPL": 1 / 120, "ZZZ": 0.0})
+    scheduler.pop_due()
+    assert scheduler.record("AAPL", 3) == pytest.approx(75)
+    assert scheduler.record("ZZZ", 0) == 1800
+
+    clock.now += 75
+    assert scheduler.pop_due() == ["AAPL"]
+    clock.now += 1725
+    assert scheduler.pop_due() == ["ZZZ"]
+
+
+def test_velocity_is_smoothed_between_polls():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    scheduler.add("AAPL", velocity=1 / 60)
+    scheduler.pop_due()
+    assert scheduler.record("AAPL", 1) == pytest.approx(60)
+    clock.now += 60
+    scheduler.pop_due()
+    # One quiet poll only nudges the estimate: 0.7 * (1/60) items/s.
+    assert scheduler.record("AAPL", 0) == pytest.approx(60 / 0.7)
+
+
+def test_failure_keeps_interval_and_removed_tickers_are_dropped():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    scheduler.sync(["AAPL", "MSFT"])
+    scheduler.pop_due()
+    assert scheduler.record_failure("AAPL") == 60
+    scheduler.record("MSFT", 0)
+    scheduler.sync(["MSFT"])
+
+    clock.now += 60
+    assert scheduler.pop_due() == []
+    assert scheduler.seconds_until_next() == pytest.approx(1740)
+    assert scheduler.symbols == {"MSFT"}
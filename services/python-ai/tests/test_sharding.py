@@ -0,0 +1,36 @@
+import pytest
+
+from ingestion.sharding import HashRing, shard_tickers
+
+TICKERS = [f"T{index:04d}" for index in range(2000)]
+
+
+def test_shards_partition_the_universe():
+    shards = [shard_tickers(TICKERS, index, 4) for index in range(4)]
+    owned = [symbol for shard in shards for symbol in shard]
+    assert sorted(owned) == sorted(TICKERS)
+    # Virtual nodes keep shards reasonably even.
+    assert all(300 < len(shard) < 700 for shard in shards)
+
+
+def test_adding_a_shard_only_moves_keys_to_the_new_shard():
+    before = HashRing([f"shard-{index}" for index in range(4)])
+    after = HashRing([f"shard-{index}" for index in range(5)])
+    moved = [symbol for symbol in TICKERS if before.node_for(symbol) != after.node_for(symbol)]
+    assert all(after.node_for(symbol) == "shard-4" for symbol in moved)
+    assert len(moved) < len(TICKERS) * 0.35
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(["a", "b", "c"])
+    owners = {symbol: ring.node_for(symbol) for symbol in TICKERS}
+    ring.remove("b")
+    for symbol, owner in owners.items():
+        if owner != "b":
+            assert ring.node_for(symbol) == owner
+
+
+def test_single_shard_keeps_everything_and_bad_index_is_rejected():
+    assert shard_tickers(["AAPL", "MSFT"], 0, 1) == ["AAPL", "MSFT"]
+    with pytest.raises(ValueError):
+        shard_tickers(["AAPL"], 2, 2)
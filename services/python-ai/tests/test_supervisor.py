@@ -0,0 +1,144 @@
+import json
+import time
+
+from jobs.supervisor import Supervisor, check_status, write_status
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProcess:
+    _next_pid = 100
+
+    def __init__(self):
+        FakeProcess._next_pid += 1
+        self.pid = FakeProcess._next_pid
+        self.returncode = None
+        self.signals = []
+
+    def poll(self):
+        return self.returncode
+
+    def send_signal(self, signum):
+        self.signals.append(signum)
+        self.returncode = 0
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+
+def _supervisor(processes=2):
+    clock = FakeClock()
+    spawned = []
+
+    def spawn(worker_id, worker_args):
+        process = FakeProcess()
+        spawned.append((worker_id, list(worker_args), process))
+        return process
+
+    supervisor = Supervisor(
+        processes, prefix="host", worker_args=["--concurrency", "4"], spawn=spawn, clock=clock
+    )
+    return supervisor, clock, spawned
+
+
+def test_starts_workers_with_stable_ids():
+    supervisor, _clock, spawned = _supervisor()
+    supervisor.tick()
+    assert [(worker_id, args) for worker_id, args, _ in spawned] == [
+        ("host:w0", ["--concurrency", "4"]),
+        ("host:w1", ["--concurrency", "4"]),
+    ]
+    assert supervisor.alive() == 2
+
+
+def test_crashed_worker_restarts_with_backoff_under_same_id():
+    supervisor, clock, spawned = _supervisor()
+    supervisor.tick()
+    spawned[0][2].returncode = 1
+
+    clock.now = 0.5
+    supervisor.tick()
+    assert len(spawned) == 2
+    assert supervisor.alive() == 1
+
+    clock.now = 1.5
+    supervisor.tick()
+    assert spawned[-1][0] == "host:w0"
+    assert supervisor.alive() == 2
+
+    # A second quick crash doubles the delay.
+    spawned[-1][2].returncode = 1
+    clock.now = 2.0
+    supervisor.tick()
+    clock.now = 3.5
+    supervisor.tick()
+    assert len(spawned) == 3
+    clock.now = 4.0
+    supervisor.tick()
+    assert len(spawned) == 4
+
+    status = supervisor.status()
+    assert status["alive"] == 2
+    assert status["workers"][0]["restarts"] == 2
+    assert status["workers"][0]["last_exit_code"] == 1
+
+
+def test_clean_exit_is_not_restarted():
+    supervisor, clock, spawned = _supervisor()
+    supervisor.tick()
+    spawned[0][2].returncode = 0
+    clock.now = 120.0
+    supervisor.tick()
+    supervisor.tick()
+    assert len(spawned) == 2
+    assert not supervisor.finished()
+
+    spawned[1][2].returncode = 0
+    supervisor.tick()
+    assert supervisor.finished()
+    assert supervisor.status()["workers"][0]["last_exit_code"] == 0
+
+
+def test_worker_killed_by_signal_restarts():
+    supervisor, clock, spawned = _supervisor(processes=1)
+    supervisor.tick()
+    spawned[0][2].returncode = -9
+    supervisor.tick()
+    clock.now = 1.0
+    supervisor.tick()
+    assert len(spawned) == 2
+
+
+def test_stop_sends_sigterm_to_every_worker():
+    supervisor, _clock, spawned = _supervisor()
+    supervisor.tick()
+    supervisor.stop()
+    assert all(process.signals for _, _, process in spawned)
+    assert supervisor.alive() == 0
+
+
+def test_check_status(tmp_path):
+    path = str(tmp_path / "status.json")
+    assert check_status(path, 30)[0] is False
+
+    write_status(path, {"updated_at": time.time(), "processes": 2, "alive": 2})
+    assert check_status(path, 30)[0] is True
+
+    write_status(path, {"updated_at": time.time(), "processes": 2, "alive": 1})
+    assert check_status(path, 30)[0] is False
+    assert check_status(path, 30, min_alive=1)[0] is True
+
+    write_status(path, {"updated_at": time.time() - 120, "processes": 2, "alive": 2})
+    healthy, message = check_status(path, 30)
+    assert healthy is False and message.startswith("status_stale")
+    with open(path, encoding="utf-8") as handle:
+        assert json.load(handle)["alive"] == 2
@@ -1,6 +1,7 @@
 import pytest
 
-from ingestion.url_utils import canonicalize_url, generate_news_id
+from ingestion import url_utils
+from ingestion.url_utils import canonicalize_url, generate_news_id, resolve_url
 
 
 def test_fragment_removed():
@@ -37,3 +38,32 @@ def test_generate_news_id_same_for_tracking_variants():
 def test_empty_url_raises():
     with pytest.raises(ValueError):
         canonicalize_url("")
+
+
+def test_already_canonical_urls_are_returned_unchanged():
+    for url in ("https://example.com/", "https://example.com/a/b", "http://news.example.com/x.html"):
+        assert canonicalize_url(url) == url
+
+
+def test_fast_path_matches_full_canonicalization():
+    urls = [
+        "https://Example.com/a",
+        "https://example.com",
+        "https://example.com/a/",
+        "https://example.com:443/a",
+        "https://user@example.com/a",
+        "https://example.com/a\t",
+        "https://example.com/a ",
+        "HTTPS://example.com/a",
+        "https://example.com/a#frag",
+    ]
+    for url in urls:
+        assert canonicalize_url(url) == url_utils._canonicalize(url)
+
+
+def test_resolve_url_matches_legacy_news_id():
+    url = "https://Example.com/article/?b=2&a=1&utm_source=x"
+    resolved = resolve_url("finnhub", url)
+    assert resolved.url == "https://example.com/article?a=1&b=2"
+    assert resolved.news_id == generate_news_id("finnhub", resolved.url)
+    assert resolve_url("finnhub", url) is resolved